@@ -1,26 +1,76 @@
 """Main FastAPI application for CSGirlies-AILAB"""
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from contextlib import asynccontextmanager
+from datetime import datetime
 from src.config import settings
-from src.agents import PartnerAgent, MentorAgent, EvaluatorAgent
-from src.scenarios import get_scenario, list_scenarios
-from src.wolfram_engine import wolfram_engine
+from src.agents import AgentPool, EvaluatorAgent, close_shared_ai_client
+from src.scenarios import (
+    get_scenario, get_compiled_scenario, list_scenarios, on_scenario_change,
+    ScenarioCatalog, ScenarioSearchIndex
+)
+from src.wolfram_engine import wolfram_engine, graph_store, graph_url, CURVES, CurveError, curve_delta
 from src.integrations import gitbook_integration
+from src.integrations.report import iter_comprehensive_report, report_templates, scenario_report_data
 from src.utils import generate_session_id
+from src.utils.profiling import RequestProfiler
+from src.utils.memory import MemoryMonitor
+from src.utils.sessions import SessionStore
+from src.utils.analytics import AnalyticsSink
+from src.utils.file_io import file_io, render_pool
+from src.utils.pdf_renderer import pdf_renderer, PdfQueueFullError, PdfRenderTimeout
+from src.utils.export_cache import ExportArtifactCache
+from src.utils.bulk_export import BulkExporter, BULK_EXPORT_FORMATS, snapshot_session
+from src.utils.catalog_cache import CatalogPayload, CatalogResponseCache
+from src.utils.compression import CompressionMiddleware
+from src.utils.responses import FastJSONResponse, dumps
+from src.utils.pagination import (
+    PaginationError, SEARCH_RESULT_FIELDS, SESSION_TURN_FIELDS, check_limit, decode_cursor, encode_cursor, parse_fields, project
+)
+from src.jobs import Job, JobQueue, PermanentJobError
+import asyncio
 import logging
+import time
 
 # Configure logging
 logging.basicConfig(level=getattr(logging, settings.log_level))
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background job and PDF workers on startup; stop them and close pooled clients on shutdown"""
+    job_queue.ensure_started()
+    pdf_renderer.warm()
+    await file_io.run(scenario_catalog.refresh)
+    catalog_cache.warm()
+    scenario_watcher = None
+    if settings.scenario_reload_seconds > 0:
+        scenario_watcher = asyncio.create_task(scenario_catalog.watch(settings.scenario_reload_seconds))
+    yield
+    if scenario_watcher is not None:
+        scenario_watcher.cancel()
+    await job_queue.shutdown()
+    await analytics.flush()
+    await gitbook_integration.client.aclose()
+    await close_shared_ai_client()
+    file_io.shutdown()
+    render_pool.shutdown()
+    pdf_renderer.shutdown()
+    bulk_exporter.shutdown()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="CSGirlies-AILAB",
     description="AI Simulated Lab Partner - Multi-agent educational experiment simulation",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Add CORS middleware
@@ -32,6 +82,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses above a size threshold (pre-compressed responses pass through)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_bytes,
+    gzip_level=settings.gzip_level,
+    brotli_quality=settings.brotli_quality
+)
+
+# Slow-request profiling for the simulation and export handlers
+PROFILED_PATH_PREFIXES = ("/simulate/", "/export/report")
+
+request_profiler = RequestProfiler(
+    profile_dir=settings.profile_dir,
+    slow_threshold_ms=settings.slow_request_threshold_ms,
+    sample_rate=settings.slow_request_sample_rate,
+    max_session_seconds=settings.max_profile_session_seconds
+)
+
+
+@app.middleware("http")
+async def profile_slow_requests(request: Request, call_next):
+    """
+    Profile sampled requests and keep the evidence when they exceed the SLO.
+
+    call_next returns once the headers are ready, so the response body is
+    wrapped and the request is only timed (and its profile stopped) when
+    the body has been sent; streamed exports and batch replays are measured
+    in full.
+    """
+    if not request.url.path.startswith(PROFILED_PATH_PREFIXES):
+        return await call_next(request)
+
+    profile = request_profiler.start_request_profile()
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except BaseException:
+        await record_request_profile(request, profile, start, 500)
+        raise
+
+    response.body_iterator = profiled_body(response.body_iterator, request, profile, start, response.status_code)
+    return response
+
+
+async def profiled_body(body, request: Request, profile, start: float, status_code: int):
+    """Pass a response body through, recording the request profile once it ends"""
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        await record_request_profile(request, profile, start, status_code)
+
+
+async def record_request_profile(request: Request, profile, start: float, status_code: int) -> None:
+    """Stop a request's profile, keeping it (and logging) if the request was slow"""
+    duration_ms = (time.perf_counter() - start) * 1000
+    try:
+        profile_file = await request_profiler.finish_request_profile(
+            profile,
+            duration_ms,
+            {
+                "method": request.method,
+                "path": request.url.path,
+                "query": str(request.url.query),
+                "status_code": status_code
+            }
+        )
+        if duration_ms >= settings.slow_request_threshold_ms:
+            logger.warning(
+                f"Slow request {request.method} {request.url.path}: "
+                f"{duration_ms:.0f} ms (profile: {profile_file or 'not sampled'})"
+            )
+    except Exception as e:
+        logger.error(f"Failed to record request profile: {str(e)}")
+
+
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+
+def require_admin(request: Request, admin_token: Optional[str]) -> None:
+    """
+    Reject admin calls without the configured token. When no token is
+    configured, only loopback clients are allowed.
+    """
+    if settings.admin_token:
+        if admin_token != settings.admin_token:
+            raise HTTPException(status_code=403, detail="Admin token required")
+    elif request.client is None or request.client.host not in LOOPBACK_HOSTS:
+        raise HTTPException(status_code=403, detail="Admin endpoints are limited to loopback clients unless admin_token is set")
+
 
 # Exception handler for HTTPException
 @app.exception_handler(HTTPException)
@@ -41,13 +181,101 @@ async def http_exception_handler(request, exc):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
+        headers=getattr(exc, "headers", None)
     )
 
 
-# Initialize agents
-partner_agent = PartnerAgent()
-mentor_agent = MentorAgent()
-evaluator_agent = EvaluatorAgent()
+# Initialize agents (partner and mentor keep conversation state, so one pair per session;
+# report jobs get their own evaluator)
+session_agents = AgentPool(max_sessions=settings.max_sessions)
+
+# Active experiment sessions (bounded, least recently used evicted first)
+analytics = AnalyticsSink(
+    settings.analytics_dir,
+    file_format=settings.analytics_format,
+    flush_rows=settings.analytics_flush_rows
+)
+active_sessions = SessionStore(
+    max_sessions=settings.max_sessions,
+    max_turns=settings.max_session_turns,
+    analytics=analytics
+)
+
+
+def discard_session_agents(session_id: str) -> None:
+    """Drop the agents of a session that was removed or evicted"""
+    if session_id not in active_sessions:
+        session_agents.discard(session_id)
+
+
+active_sessions.on_change(discard_session_agents)
+
+# Memory accounting for sessions, caches and agent histories
+memory_monitor = MemoryMonitor()
+memory_monitor.register(
+    "sessions",
+    lambda: active_sessions,
+    evict=lambda: active_sessions.evict_to(settings.max_sessions)
+)
+for _role in ("partner", "mentor"):
+    memory_monitor.register(
+        f"{_role}_history",
+        lambda role=_role: [getattr(agents, role).conversation_history for agents in session_agents.values()],
+        evict=lambda role=_role: sum(
+            getattr(agents, role).trim_history(settings.max_agent_history)
+            for agents in session_agents.values()
+        )
+    )
+memory_monitor.register(
+    "partner_experiment_memory",
+    lambda: [agents.partner.experiment_memory for agents in session_agents.values()],
+    evict=lambda: sum(agents.partner.trim_memory(settings.max_experiment_memory) for agents in session_agents.values())
+)
+memory_monitor.register("wolfram_cache", lambda: wolfram_engine.computation_cache)
+memory_monitor.register("graphs", lambda: graph_store)
+memory_monitor.register("report_templates", lambda: report_templates)
+
+# Background jobs (report generation and publishing)
+job_queue = JobQueue(
+    state_dir=settings.jobs_dir,
+    workers=settings.job_workers,
+    max_attempts=settings.job_max_attempts,
+    retry_backoff_seconds=settings.job_retry_backoff_seconds,
+    retention_seconds=settings.job_retention_hours * 3600
+)
+memory_monitor.register("jobs", lambda: job_queue.jobs)
+
+# Export artifacts, reused until the session (or its scenario) changes
+export_cache = ExportArtifactCache(settings.export_cache_dir, settings.export_cache_max_bytes)
+active_sessions.on_change(export_cache.invalidate)
+on_scenario_change(lambda experiment_id, scenario: export_cache.invalidate(experiment_id=experiment_id))
+memory_monitor.register("export_cache", lambda: export_cache)
+
+# Scenarios defined as files, loaded lazily and reloaded when they change
+scenario_catalog = ScenarioCatalog(settings.scenarios_dir, settings.scenario_cache_dir)
+
+# Experiment catalog responses, serialized once per scenario version
+catalog_cache = CatalogResponseCache(
+    list_scenarios,
+    min_compress_bytes=settings.catalog_compress_min_bytes,
+    max_payloads=settings.catalog_cache_max_payloads,
+    gzip_level=settings.gzip_level,
+    brotli_quality=settings.brotli_quality
+)
+on_scenario_change(catalog_cache.invalidate)
+memory_monitor.register("catalog_cache", lambda: catalog_cache)
+
+# Full-text catalog search, re-indexing changed scenarios on the next query
+search_index = ScenarioSearchIndex(list_scenarios, documents=scenario_catalog.search_document)
+on_scenario_change(search_index.invalidate)
+memory_monitor.register("search_index", lambda: search_index)
+
+# Class-wide exports, rendered in worker processes
+bulk_exporter = BulkExporter(
+    settings.bulk_export_dir,
+    workers=settings.bulk_export_workers,
+    retention_seconds=settings.bulk_export_retention_hours * 3600
+)
 
 # Request/Response models
 class StartExperimentRequest(BaseModel):
@@ -57,6 +285,14 @@ class StartExperimentRequest(BaseModel):
     student_name: Optional[str] = "Student"
 
 
+class BulkExportRequest(BaseModel):
+    """Sessions to export at once: explicit ids and/or a start time range"""
+    session_ids: Optional[List[str]] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    formats: List[str] = ["markdown", "csv", "json"]
+
+
 class StudentInputRequest(BaseModel):
     """Student input during experiment"""
     session_id: str
@@ -65,6 +301,20 @@ class StudentInputRequest(BaseModel):
     current_step: Optional[int] = 1
 
 
+class BatchInteractRequest(BaseModel):
+    """Scripted turns to replay: turns of a session run in order, sessions concurrently"""
+    turns: List[StudentInputRequest]
+    concurrency: Optional[int] = None
+
+
+class CurveRequest(BaseModel):
+    """Curve points the client is missing (pass back the cursor of the previous response)"""
+    curve: str
+    params: Dict[str, float]
+    upto: Optional[float] = None
+    cursor: Optional[str] = None
+
+
 class ExperimentResponse(BaseModel):
     """Response for experiment interaction"""
     session_id: str
@@ -88,56 +338,83 @@ async def root():
     }
 
 
-@app.get("/experiments")
-async def list_experiments():
-    """List all available experiments"""
-    scenarios = list_scenarios()
-    return {
-        "experiments": [
-            {
-                "id": exp_id,
-                "title": scenario.title,
-                "subject": scenario.subject,
-                "level": scenario.level,
-                "duration_minutes": scenario.duration_minutes,
-                "description": scenario.description
-            }
-            for exp_id, scenario in scenarios.items()
-        ]
+def catalog_response(payload: CatalogPayload,
+                     if_none_match: Optional[str],
+                     accept_encoding: Optional[str]) -> Response:
+    """Serve a pre-serialized catalog payload, or 304 when the client's copy is current"""
+    body, etag, encoding = payload.variant(accept_encoding)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": settings.catalog_cache_control,
+        "Vary": "Accept-Encoding"
     }
+    if payload.matches(if_none_match):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/experiments")
+async def list_experiments(cursor: Optional[str] = None,
+                           limit: Optional[int] = None,
+                           fields: Optional[str] = None,
+                           if_none_match: Optional[str] = Header(None),
+                           accept_encoding: Optional[str] = Header(None)):
+    """
+    List all available experiments.
+
+    With limit (or cursor) the list is paged in id order and includes
+    next_cursor; fields selects the experiment fields to return.
+    """
+    try:
+        if cursor and limit is None:
+            limit = settings.default_page_size
+        if limit is not None:
+            check_limit(limit, settings.page_max_limit)
+        payload = catalog_cache.listing(cursor, limit, fields)
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return catalog_response(payload, if_none_match, accept_encoding)
+
+
+@app.get("/experiments/search")
+async def search_experiments(q: str = "",
+                             subject: Optional[str] = None,
+                             level: Optional[str] = None,
+                             offset: int = 0,
+                             limit: int = settings.default_page_size,
+                             fields: Optional[str] = None):
+    """Search experiments by words (or word prefixes), filtered by subject and level"""
+    try:
+        if offset < 0:
+            raise PaginationError("offset must be >= 0")
+        check_limit(limit, settings.page_max_limit)
+        tree = parse_fields(fields, SEARCH_RESULT_FIELDS)
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Searching indexes changed scenarios first, which may load them from disk
+    result = await file_io.run(search_index.search, q, subject=subject, level=level, offset=offset, limit=limit)
+    result["results"] = project(result["results"], tree)
+    return FastJSONResponse(result)
 
 
 @app.get("/experiments/{experiment_id}")
-async def get_experiment_details(experiment_id: str):
-    """Get detailed information about a specific experiment"""
-    scenario = get_scenario(experiment_id)
+async def get_experiment_details(experiment_id: str,
+                                 fields: Optional[str] = None,
+                                 if_none_match: Optional[str] = Header(None),
+                                 accept_encoding: Optional[str] = Header(None)):
+    """Get detailed information about a specific experiment (fields selects what to return)"""
+    try:
+        payload = catalog_cache.details(experiment_id, fields)
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    if not scenario:
+    if payload is None:
         raise HTTPException(status_code=404, detail=f"Experiment '{experiment_id}' not found")
     
-    return {
-        "experiment_id": experiment_id,
-        "title": scenario.title,
-        "description": scenario.description,
-        "subject": scenario.subject,
-        "level": scenario.level,
-        "duration_minutes": scenario.duration_minutes,
-        "learning_objectives": scenario.learning_objectives,
-        "materials": scenario.materials,
-        "safety_notes": scenario.safety_notes,
-        "steps": [
-            {
-                "step_number": step.step_number,
-                "title": step.title,
-                "description": step.description,
-                "instructions": step.instructions,
-                "expected_observation": step.expected_observation,
-                "learning_objectives": step.learning_objectives,
-                "tips": step.tips
-            }
-            for step in scenario.steps
-        ]
-    }
+    return catalog_response(payload, if_none_match, accept_encoding)
 
 
 @app.post("/simulate/start")
@@ -145,117 +422,228 @@ async def start_experiment(request: StartExperimentRequest):
     """Start a new experiment session"""
     
     # Validate experiment
-    scenario = get_scenario(request.experiment_id)
-    if not scenario:
+    compiled = get_compiled_scenario(request.experiment_id)
+    if not compiled:
         raise HTTPException(status_code=404, detail=f"Experiment '{request.experiment_id}' not found")
     
     # Generate session ID
     session_id = generate_session_id()
     
-    # Clear agent histories for new session
-    partner_agent.clear_history()
-    mentor_agent.clear_history()
-    evaluator_agent.clear_history()
+    # Fresh agents for the new session
+    partner_agent = session_agents.reset(session_id).partner
     
     # Get partner's opening message
     context = {
-        "experiment_name": scenario.title,
-        "student_message": f"I want to start the {scenario.title} experiment",
+        "experiment_name": compiled.title,
+        "student_message": compiled.start_message,
         "current_step": 1
     }
     
+    started = time.perf_counter()
     partner_message = await partner_agent.think(context)
+    partner_latency_ms = (time.perf_counter() - started) * 1000
+
+    active_sessions.create(session_id, request.experiment_id, request.student_name)
+    active_sessions.record_turn(
+        session_id, partner_agent.role, partner_agent.name, partner_message,
+        step=1, latency_ms=partner_latency_ms
+    )
     
     logger.info(f"Started experiment session: {session_id} - {request.experiment_id}")
     
-    return {
+    return FastJSONResponse({
         "session_id": session_id,
         "experiment_id": request.experiment_id,
-        "experiment_title": scenario.title,
+        "experiment_title": compiled.title,
         "student_name": request.student_name,
         "partner_message": partner_message,
         "first_step": {
             "step_number": 1,
-            "title": scenario.steps[0].title,
-            "instructions": scenario.steps[0].instructions
+            "title": compiled.first_step.step.title,
+            "instructions": compiled.first_step.step.instructions
         }
-    }
+    })
 
 
-@app.post("/simulate/interact")
-async def interact_with_experiment(request: StudentInputRequest) -> ExperimentResponse:
+async def run_interaction(request: StudentInputRequest) -> Dict[str, Any]:
     """
-    Process student input and return partner/mentor responses and Wolfram computation.
+    Run one student turn: partner and mentor replies, the Wolfram computation
+    on the final step, and recording in the session store.
+
+    Returns:
+        The interaction response body
+
+    Raises:
+        HTTPException: Unknown experiment or session (404)
     """
-    
     # Validate experiment
-    scenario = get_scenario(request.experiment_id)
-    if not scenario:
+    compiled = get_compiled_scenario(request.experiment_id)
+    if not compiled:
         raise HTTPException(status_code=404, detail=f"Experiment '{request.experiment_id}' not found")
+
+    received_at = time.time()
+
+    # Get current step (indexed, with its progress values precomputed)
+    turn = compiled.turn(request.current_step)
+
+    # This session's agents (concurrent sessions must not share their history)
+    if request.session_id not in active_sessions:
+        raise HTTPException(status_code=404, detail=f"Session '{request.session_id}' not found")
+    agents = session_agents.get(request.session_id)
+    partner_agent, mentor_agent = agents.partner, agents.mentor
     
+    # Process student input through agents
+    context = {
+        "experiment_name": compiled.title,
+        "student_message": request.student_message,
+        "current_step": request.current_step
+    }
+    
+    # Partner responds
+    started = time.perf_counter()
+    partner_message = await partner_agent.think(context)
+    partner_at = time.time()
+    partner_latency_ms = (time.perf_counter() - started) * 1000
+    
+    # Mentor provides guidance
+    mentor_context = {
+        "experiment_name": compiled.title,
+        "conversation_history": [
+            {"sender": "Student", "content": request.student_message},
+            {"sender": "Partner", "content": partner_message}
+        ],
+        "student_progress": turn.progress
+    }
+    started = time.perf_counter()
+    mentor_message = await mentor_agent.think(mentor_context)
+    mentor_at = time.time()
+    mentor_latency_ms = (time.perf_counter() - started) * 1000
+    
+    # Generate Wolfram computation if applicable
+    wolfram_result = None
+    started = time.perf_counter()
+    if turn.is_final:
+        # On final step, generate computation
+        if request.experiment_id == "chem_titration":
+            wolfram_result = await wolfram_engine.compute_titration(0.1, 20, 0.1)
+        elif request.experiment_id == "phys_hookes_law":
+            wolfram_result = await wolfram_engine.compute_hookes_law(300, 0.1)
+        elif request.experiment_id == "bio_osmosis":
+            wolfram_result = await wolfram_engine.compute_osmosis(0.1, 298, 0.01)
+    wolfram_latency_ms = (time.perf_counter() - started) * 1000
+    graph_id = None
+    if wolfram_result and wolfram_result.graph_svg:
+        graph_id = await file_io.run(graph_store.put, wolfram_result.graph_svg)
+    
+    # Record the turn in the session store
+    active_sessions.record_turn(
+        request.session_id, "student", "Student", request.student_message,
+        step=request.current_step, timestamp=received_at
+    )
+    active_sessions.record_turn(
+        request.session_id, partner_agent.role, partner_agent.name, partner_message,
+        step=request.current_step, timestamp=partner_at, latency_ms=partner_latency_ms
+    )
+    active_sessions.record_turn(
+        request.session_id, mentor_agent.role, mentor_agent.name, mentor_message,
+        step=request.current_step, timestamp=mentor_at, latency_ms=mentor_latency_ms
+    )
+    if len(request.student_message) > 10:
+        active_sessions.record_observation(request.session_id, f"step_{request.current_step}_observation", request.student_message[:100])
+    if wolfram_result:
+        active_sessions.record_wolfram_result(request.session_id, {
+            "query": wolfram_result.query,
+            "result": wolfram_result.result,
+            "numeric_result": wolfram_result.numeric_result,
+            "latency_ms": wolfram_latency_ms,
+            "graph_id": graph_id
+        })
+
+    # Increment step for next interaction
+    next_step = turn.next_step
+    progress = turn.next_progress
+
+    logger.info(f"Session {request.session_id}: Step {request.current_step} completed, moving to step {next_step}")
+
+    return {
+        "session_id": request.session_id,
+        "experiment_id": request.experiment_id,
+        "partner_message": partner_message,
+        "mentor_guidance": mentor_message,
+        "wolfram_result": {
+            "query": wolfram_result.query,
+            "result": wolfram_result.result,
+            "graph_id": graph_id,
+            "graph_url": graph_url(graph_id) if graph_id else None
+        } if wolfram_result else None,
+        "current_step": next_step,
+        "progress": progress
+    }
+
+
+@app.post("/simulate/interact", response_model=ExperimentResponse)
+async def interact_with_experiment(request: StudentInputRequest):
+    """
+    Process student input and return partner/mentor responses and Wolfram computation.
+    """
     try:
-        # Get current step
-        current_step = scenario.get_step(request.current_step)
-        if not current_step:
-            current_step = scenario.steps[0]
-        
-        # Process student input through agents
-        context = {
-            "experiment_name": scenario.title,
-            "student_message": request.student_message,
-            "current_step": request.current_step
-        }
-        
-        # Partner responds
-        partner_message = await partner_agent.think(context)
-        
-        # Mentor provides guidance
-        mentor_context = {
-            "experiment_name": scenario.title,
-            "conversation_history": [
-                {"sender": "Student", "content": request.student_message},
-                {"sender": "Partner", "content": partner_message}
-            ],
-            "student_progress": request.current_step / len(scenario.steps)
-        }
-        mentor_message = await mentor_agent.think(mentor_context)
-        
-        # Generate Wolfram computation if applicable
-        wolfram_result = None
-        if request.current_step == len(scenario.steps):
-            # On final step, generate computation
-            if request.experiment_id == "chem_titration":
-                wolfram_result = await wolfram_engine.compute_titration(0.1, 20, 0.1)
-            elif request.experiment_id == "phys_hookes_law":
-                wolfram_result = await wolfram_engine.compute_hookes_law(300, 0.1)
-            elif request.experiment_id == "bio_osmosis":
-                wolfram_result = await wolfram_engine.compute_osmosis(0.1, 298, 0.01)
-        
-        # Increment step for next interaction
-        next_step = min(request.current_step + 1, len(scenario.steps))
-        progress = (next_step / len(scenario.steps)) * 100
-
-        logger.info(f"Session {request.session_id}: Step {request.current_step} completed, moving to step {next_step}")
-
-        return ExperimentResponse(
-            session_id=request.session_id,
-            experiment_id=request.experiment_id,
-            partner_message=partner_message,
-            mentor_guidance=mentor_message,
-            wolfram_result={
-                "query": wolfram_result.query if wolfram_result else None,
-                "result": wolfram_result.result if wolfram_result else None,
-                "graph_svg": wolfram_result.graph_svg if wolfram_result else None
-            } if wolfram_result else None,
-            current_step=next_step,
-            progress=progress
-        )
-        
+        # Built from trusted values: sent without re-validating against ExperimentResponse
+        return FastJSONResponse(await run_interaction(request))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in experiment interaction: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/simulate/interact/batch")
+async def interact_batch(request: BatchInteractRequest):
+    """
+    Replay many turns (e.g. scripted transcripts for automated grading).
+
+    Turns of the same session run in request order; different sessions run
+    concurrently, at most `concurrency` at a time. One NDJSON line is
+    streamed per turn as it completes: {"index", "status", "result"} or
+    {"index", "session_id", "status", "error"}.
+    """
+    if len(request.turns) > settings.batch_max_turns:
+        raise HTTPException(status_code=400, detail=f"At most {settings.batch_max_turns} turns per batch")
+    concurrency = settings.batch_concurrency if request.concurrency is None else request.concurrency
+    if not 1 <= concurrency <= settings.batch_concurrency:
+        raise HTTPException(status_code=400, detail=f"concurrency must be between 1 and {settings.batch_concurrency}")
+
+    by_session: Dict[str, List[int]] = {}
+    for index, turn in enumerate(request.turns):
+        by_session.setdefault(turn.session_id, []).append(index)
+
+    results: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def replay(indexes: List[int]) -> None:
+        async with semaphore:
+            for index in indexes:
+                turn = request.turns[index]
+                try:
+                    line = {"index": index, "status": 200, "result": await run_interaction(turn)}
+                except HTTPException as e:
+                    line = {"index": index, "session_id": turn.session_id, "status": e.status_code, "error": e.detail}
+                except Exception as e:
+                    logger.error(f"Error in batch interaction: {str(e)}")
+                    line = {"index": index, "session_id": turn.session_id, "status": 500, "error": str(e)}
+                await results.put(line)
+
+    async def lines():
+        tasks = [asyncio.create_task(replay(indexes)) for indexes in by_session.values()]
+        try:
+            for _ in range(len(request.turns)):
+                yield dumps(await results.get()) + b"\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @app.post("/simulate/complete")
 async def complete_experiment(session_id: str, experiment_id: str):
     """
@@ -265,19 +653,10 @@ async def complete_experiment(session_id: str, experiment_id: str):
     scenario = get_scenario(experiment_id)
     if not scenario:
         raise HTTPException(status_code=404, detail=f"Experiment '{experiment_id}' not found")
-    
-    # Generate evaluator feedback
-    eval_context = {
-        "experiment_name": scenario.title,
-        "full_conversation": [],
-        "results": {}
-    }
-    
-    evaluator_message = await evaluator_agent.think(eval_context)
 
-    # Collect conversation history from agents
+    # Collect conversation history from the session's agents
+    partner_agent = session_agents.get(session_id).partner
     partner_history = partner_agent.get_history()
-    mentor_history = mentor_agent.get_history()
 
     # Build full conversation log
     conversation_history = []
@@ -288,48 +667,370 @@ async def complete_experiment(session_id: str, experiment_id: str):
             "content": msg.content
         })
 
-    # Create comprehensive GitBook lab report with local file
-    gitbook_response = await gitbook_integration.create_experiment_report(
-        session_id=session_id,
-        experiment_name=scenario.title,
-        scenario_data={
-            "description": scenario.description,
-            "learning_objectives": scenario.learning_objectives,
-            "materials": scenario.materials,
-            "steps": [
-                {
-                    "step_number": s.step_number,
-                    "title": s.title,
-                    "instructions": s.instructions
-                }
-                for s in scenario.steps
-            ]
-        },
-        conversation_history=conversation_history,
-        observations=partner_agent.experiment_memory if hasattr(partner_agent, 'experiment_memory') else {},
-        wolfram_results=[],  # Could be enhanced to track all Wolfram results
-        evaluation={
-            "feedback": evaluator_message,
-            "status": "completed"
-        }
-    )
+    # Evaluation, report build and GitBook publish run off the request path
+    job = await job_queue.submit("lab_report", {
+        "session_id": session_id,
+        "experiment_id": experiment_id,
+        "conversation_history": conversation_history,
+        "observations": dict(partner_agent.experiment_memory),
+        "wolfram_results": []  # Could be enhanced to track all Wolfram results
+    })
 
-    logger.info(f"Completed experiment session: {session_id} - {experiment_id}")
-    logger.info(f"Lab report saved to: {gitbook_response.get('local_file', 'N/A')}")
-    logger.info(f"GitBook status: {gitbook_response}")
+    # Make the finished session visible to analytics right away
+    await analytics.flush()
 
+    logger.info(f"Completed experiment session: {session_id} - {experiment_id} (report job {job.job_id})")
 
-    # Return the full GitBook response to the frontend
     return {
         "session_id": session_id,
         "experiment_id": experiment_id,
         "status": "completed",
-        "evaluator_feedback": evaluator_message,
+        "job_id": job.job_id,
+        "job_status": job.status,
+        "status_url": f"/jobs/{job.job_id}",
+        "message": "Experiment completed. Your lab report is being generated."
+    }
+
+
+async def run_lab_report_job(job: Job) -> Dict[str, Any]:
+    """
+    Background job: evaluate the session, build the lab report and publish it.
+
+    The evaluator feedback and the publish result are checkpointed into
+    the payload, so a retry never re-runs a step that already completed
+    (and never creates a second GitBook page). The report is dated with the
+    job's creation time, so a retry reproduces the same bytes and is
+    deduplicated by the report store. A failed publish is not retried by
+    the job queue: the GitBook client has already retried it.
+    """
+    payload = job.payload
+    scenario = get_scenario(payload["experiment_id"])
+    if not scenario:
+        raise ValueError(f"Experiment '{payload['experiment_id']}' not found")
+
+    if "evaluator_feedback" not in payload:
+        payload["evaluator_feedback"] = await EvaluatorAgent().think({
+            "experiment_name": scenario.title,
+            "full_conversation": [],
+            "results": {}
+        })
+        await job_queue.checkpoint(job)
+
+    if "gitbook_response" not in payload:
+        # Create comprehensive GitBook lab report with local file
+        payload["gitbook_response"] = await gitbook_integration.create_experiment_report(
+            session_id=payload["session_id"],
+            experiment_name=scenario.title,
+            scenario_data=scenario_report_data(scenario),
+            template=report_templates.get(payload["experiment_id"], scenario),
+            conversation_history=payload["conversation_history"],
+            observations=payload["observations"],
+            wolfram_results=payload["wolfram_results"],
+            evaluation={
+                "feedback": payload["evaluator_feedback"],
+                "status": "completed"
+            },
+            report_date=datetime.fromisoformat(job.created_at)
+        )
+        await job_queue.checkpoint(job)
+
+    gitbook_response = payload["gitbook_response"]
+    logger.info(f"Lab report saved to: {gitbook_response.get('local_file', 'N/A')}")
+    logger.info(f"GitBook status: {gitbook_response}")
+
+    if not gitbook_response.get("success"):
+        raise PermanentJobError(gitbook_response.get("error", "Lab report publishing failed"))
+
+    return {
+        "evaluator_feedback": payload["evaluator_feedback"],
         "gitbook_response": gitbook_response,
         "message": gitbook_response.get("message", "Experiment completed.")
     }
 
 
+job_queue.register("lab_report", run_lab_report_job)
+
+
+@app.post("/export/bulk")
+async def bulk_export(request: BulkExportRequest):
+    """
+    Export many sessions (e.g. a whole class) into one zip archive.
+
+    Sessions are selected by id and/or by start time; the export runs as
+    a background job, see /jobs/{job_id} for progress.
+    """
+    unsupported = [f for f in request.formats if f not in BULK_EXPORT_FORMATS]
+    if unsupported or not request.formats:
+        raise HTTPException(status_code=400, detail=f"Unsupported formats: {unsupported or request.formats}")
+    if request.session_ids is None and request.since is None and request.until is None:
+        raise HTTPException(status_code=400, detail="Give session_ids and/or a since/until time range")
+
+    # Session timestamps are naive local times
+    since = request.since.astimezone().replace(tzinfo=None) if request.since else None
+    until = request.until.astimezone().replace(tzinfo=None) if request.until else None
+
+    wanted = set(request.session_ids) if request.session_ids is not None else None
+    sessions = []
+    for session_id in list(active_sessions):
+        if wanted is not None and session_id not in wanted:
+            continue
+        session = active_sessions[session_id]
+        started = datetime.fromisoformat(session["timestamp"])
+        if since and started < since:
+            continue
+        if until and started > until:
+            continue
+        scenario = get_scenario(session["experiment_id"])
+        if scenario:
+            sessions.append(snapshot_session(session, scenario))
+
+    if not sessions:
+        raise HTTPException(status_code=404, detail="No matching sessions")
+
+    # Snapshots go to a side file so job state stays small
+    job = await job_queue.submit("bulk_export", {
+        "snapshot_id": await bulk_exporter.save_snapshots(sessions),
+        "formats": request.formats
+    })
+
+    return {
+        "job_id": job.job_id,
+        "job_status": job.status,
+        "sessions": len(sessions),
+        "status_url": f"/jobs/{job.job_id}",
+        "download_url": f"/export/bulk/{job.job_id}/download"
+    }
+
+
+async def run_bulk_export_job(job: Job) -> Dict[str, Any]:
+    """Background job: render every session in worker processes into one archive"""
+    async def on_progress(done: int, total: int) -> None:
+        # Each step rewrites the job state, so record at most ~100 steps
+        if done == total or done % max(total // 100, 1) == 0:
+            await job_queue.update_progress(job, done / total)
+
+    snapshot_id = job.payload["snapshot_id"]
+    result = await bulk_exporter.export(
+        job.job_id,
+        await bulk_exporter.load_snapshots(snapshot_id),
+        job.payload["formats"],
+        on_progress=on_progress
+    )
+    await bulk_exporter.discard_snapshots(snapshot_id)
+    result["download_url"] = f"/export/bulk/{job.job_id}/download"
+    return result
+
+
+job_queue.register("bulk_export", run_bulk_export_job)
+
+
+@app.get("/export/bulk/{job_id}/download")
+async def download_bulk_export(job_id: str):
+    """Download the archive of a finished bulk export job"""
+    job = await job_queue.get(job_id)
+    if not job or job.kind != "bulk_export":
+        raise HTTPException(status_code=404, detail=f"Bulk export '{job_id}' not found")
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Bulk export is {job.status}")
+    path = bulk_exporter.archive_path(job_id)
+    if not await file_io.run(path.exists):
+        raise HTTPException(status_code=410, detail=f"Bulk export '{job_id}' has expired")
+
+    return FileResponse(
+        path,
+        media_type="application/zip",
+        filename=f"lab_reports_{job_id}.zip"
+    )
+
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Get the status (and result, once finished) of a background job"""
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job.to_dict()
+
+
+@app.post("/simulate/curve")
+async def simulate_curve(request: CurveRequest):
+    """
+    Incremental curve data: the full x/y arrays on the first call (or when
+    the parameters change), then only the points revealed since the cursor.
+    """
+    if request.curve not in CURVES:
+        raise HTTPException(status_code=404, detail=f"Curve '{request.curve}' not found")
+    try:
+        delta = curve_delta(wolfram_engine, request.curve, request.params,
+                            upto=request.upto, cursor=request.cursor)
+    except CurveError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(delta)
+
+
+@app.get("/graphs/{graph_id}.svg")
+async def get_graph(graph_id: str, if_none_match: Optional[str] = Header(None)):
+    """Serve a rendered graph by content hash (immutable, cacheable forever)"""
+    etag = f'"{graph_id}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if if_none_match and etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    svg = await file_io.run(graph_store.get, graph_id)
+    if svg is None:
+        raise HTTPException(status_code=404, detail="Graph not found")
+    return Response(content=svg, media_type="image/svg+xml", headers=headers)
+
+
+@app.get("/sessions/{session_id}/report")
+async def stream_session_report(session_id: str):
+    """Stream the lab report of an active session as markdown, section by section"""
+    session = active_sessions.get(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    scenario = get_scenario(session["experiment_id"])
+    if not scenario:
+        raise HTTPException(status_code=404, detail="Experiment not found")
+
+    chunks = iter_comprehensive_report(
+        session_id,
+        scenario.title,
+        scenario_report_data(scenario),
+        session["conversation"].iter_dicts(),
+        session["observations"],
+        session["wolfram_results"],
+        {},
+        template=report_templates.get(session["experiment_id"], scenario)
+    )
+    return StreamingResponse(
+        chunks,
+        media_type="text/markdown; charset=utf-8",
+        headers={"Content-Disposition": f'inline; filename="lab_report_{session_id}.md"'}
+    )
+
+
+# Streamed export formats: (media type, file extension)
+STREAMED_EXPORT_FORMATS = {
+    "markdown": ("text/markdown; charset=utf-8", "md"),
+    "html": ("text/html; charset=utf-8", "html"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "json": ("application/json", "json")
+}
+
+
+@app.get("/sessions/{session_id}/history")
+async def get_session_history(session_id: str,
+                              cursor: Optional[str] = None,
+                              limit: int = settings.default_page_size,
+                              fields: Optional[str] = None):
+    """
+    Page through a session's conversation, oldest turn first.
+
+    Turns carry a sequence number that stays stable when old turns are
+    trimmed; next_cursor is null on the last page.
+    """
+    session = active_sessions.get(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    try:
+        check_limit(limit, settings.page_max_limit)
+        tree = parse_fields(fields, SESSION_TURN_FIELDS)
+        next_seq = decode_cursor(cursor).get("seq", 0)
+        if not isinstance(next_seq, int):
+            raise PaginationError("Invalid cursor")
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    conversation = session["conversation"]
+    start = max(next_seq, conversation.first_seq)
+    turns = []
+    end = start
+    for seq, turn in conversation.iter_items(start, start + limit):
+        turns.append(project({"seq": seq, **turn}, tree))
+        end = seq + 1
+
+    return FastJSONResponse({
+        "session_id": session_id,
+        "total": len(conversation),
+        "turns": turns,
+        "next_cursor": encode_cursor({"seq": end}) if end < conversation.end_seq else None
+    })
+
+
+@app.get("/sessions/{session_id}/export")
+async def download_session_export(session_id: str, format: str = "markdown"):
+    """
+    Download a session export, generated incrementally from session data.
+
+    Formats: markdown, html, csv, json, all (zip bundle of every format)
+    """
+    from src.utils.export import iter_csv_export, iter_html_export, iter_json_export, iter_zip_export
+
+    if format != "all" and format not in STREAMED_EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+
+    session = active_sessions.get(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    experiment_id = session["experiment_id"]
+    scenario = get_scenario(experiment_id)
+    if not scenario:
+        raise HTTPException(status_code=404, detail="Experiment not found")
+
+    template = report_templates.get(experiment_id, scenario)
+    scenario_data = scenario_report_data(scenario)
+    conversation = session["conversation"]
+    observations = session["observations"]
+
+    def markdown_chunks():
+        return iter_comprehensive_report(
+            session_id,
+            scenario.title,
+            scenario_data,
+            conversation.iter_dicts(),
+            observations,
+            session["wolfram_results"],
+            {},
+            template=template
+        )
+
+    exporters = {
+        "markdown": markdown_chunks,
+        "html": lambda: iter_html_export(markdown_chunks()),
+        "csv": lambda: iter_csv_export(conversation.iter_dicts(), observations),
+        "json": lambda: iter_json_export(
+            {
+                "session_id": session_id,
+                "experiment": {"experiment_id": scenario.experiment_id, "title": scenario.title, **scenario_data},
+                "observations": observations,
+                "timestamp": session.get("timestamp", "")
+            },
+            conversation.iter_dicts()
+        )
+    }
+
+    base_filename = f"{scenario.title.replace(' ', '_')}_{session_id}"
+    if format == "all":
+        body = iter_zip_export(
+            (f"{base_filename}.{STREAMED_EXPORT_FORMATS[f][1]}", exporters[f])
+            for f in STREAMED_EXPORT_FORMATS
+        )
+        media_type, filename = "application/zip", f"{base_filename}.zip"
+    else:
+        body = exporters[format]()
+        media_type = STREAMED_EXPORT_FORMATS[format][0]
+        filename = f"{base_filename}.{STREAMED_EXPORT_FORMATS[format][1]}"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -340,18 +1041,101 @@ async def health_check():
     }
 
 
+@app.get("/admin/profile")
+async def profile_status(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Get slow-request and on-demand profiling status"""
+    require_admin(request, x_admin_token)
+    return request_profiler.status()
+
+
+@app.post("/admin/profile/start")
+async def start_profile(request: Request, duration_seconds: int = 60, x_admin_token: Optional[str] = Header(None)):
+    """Start a time-boxed profile of the running server"""
+    require_admin(request, x_admin_token)
+    try:
+        return request_profiler.start_session(duration_seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.post("/admin/profile/stop")
+async def stop_profile(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Stop the running profile and write it to disk"""
+    require_admin(request, x_admin_token)
+    try:
+        return await request_profiler.stop_session()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.get("/admin/memory")
+async def memory_report(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Get RSS and per-subsystem memory estimates"""
+    require_admin(request, x_admin_token)
+    report = await file_io.run(memory_monitor.report)
+    report["high_water_marks"] = {
+        "max_sessions": settings.max_sessions,
+        "max_session_turns": settings.max_session_turns,
+        "max_agent_history": settings.max_agent_history,
+        "max_experiment_memory": settings.max_experiment_memory
+    }
+    return report
+
+
+@app.post("/admin/memory/snapshot")
+async def memory_snapshot(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Take a tracemalloc snapshot and diff it against the previous one"""
+    require_admin(request, x_admin_token)
+    return await file_io.run(memory_monitor.take_snapshot)
+
+
+@app.post("/admin/memory/tracemalloc/stop")
+async def stop_memory_tracing(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Stop tracemalloc tracing"""
+    require_admin(request, x_admin_token)
+    memory_monitor.stop_tracing()
+    return {"tracing": False}
+
+
+@app.post("/admin/memory/evict")
+async def evict_memory(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Enforce every high-water mark now"""
+    require_admin(request, x_admin_token)
+    return {"evicted": memory_monitor.enforce_limits()}
+
+
+@app.post("/admin/analytics/flush")
+async def flush_analytics(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Write buffered analytics rows to the dataset now"""
+    require_admin(request, x_admin_token)
+    return {"rows_written": await analytics.flush(), "dataset": settings.analytics_dir}
+
+
+EXPORT_FORMATS = ("pdf", "markdown", "html", "csv", "json", "all")
+
+
 @app.post("/export/report")
 async def export_report(
     session_id: str,
     experiment_id: str,
-    format: str = "pdf"
+    format: str = "pdf",
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Export lab report in requested format.
 
     Formats: pdf, markdown, html, csv, json, all
+
+    Exports are cached per session version: repeated exports of an
+    unchanged session reuse the artifacts. The ETag covers the session
+    version and the scenario revision; a request whose If-None-Match
+    matches it gets 412 Precondition Failed (nothing to export), as this
+    is an unsafe method.
     """
-    from src.utils.export import ReportExporter, quick_export_pdf, quick_export_all
+    from src.utils.export import ReportExporter
+
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
 
     # Get session data
     if session_id not in active_sessions:
@@ -359,122 +1143,128 @@ async def export_report(
 
     session = active_sessions[session_id]
 
+    # Cached artifacts are keyed by session, so they must render the session's own experiment
+    if experiment_id != session["experiment_id"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Session '{session_id}' belongs to experiment '{session['experiment_id']}'"
+        )
+
     # Get experiment details
-    experiment = await load_experiment(experiment_id)
+    experiment = get_scenario(experiment_id)
     if not experiment:
         raise HTTPException(status_code=404, detail="Experiment not found")
 
-    # Prepare report data
-    from src.integrations.gitbook import GitBookIntegration
-    gitbook = GitBookIntegration()
+    version = session["version"]
+    etag = export_cache.etag(session_id, version, format, get_compiled_scenario(experiment_id).revision)
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=412, headers={"ETag": etag})
+
+    cached = export_cache.get(session_id, version, format)
+    if cached is not None:
+        return JSONResponse({**cached, "cached": True}, headers={"ETag": etag})
+
+    conversation = session["conversation"].to_dicts()
 
     # Generate markdown content
-    markdown_content = gitbook._generate_markdown_report(
-        session["conversation"],
+    markdown_content = "".join(iter_comprehensive_report(
+        session_id,
+        experiment.title,
+        scenario_report_data(experiment),
+        conversation,
         session.get("observations", {}),
-        experiment,
-        session_id
-    )
+        session.get("wolfram_results", []),
+        {},
+        template=report_templates.get(experiment_id, experiment)
+    ))
 
     # Prepare full data
     full_data = {
         "session_id": session_id,
-        "experiment": experiment.dict(),
-        "conversation": session["conversation"],
+        "experiment": {"experiment_id": experiment.experiment_id, "title": experiment.title,
+                       **scenario_report_data(experiment)},
+        "conversation": conversation,
         "observations": session.get("observations", {}),
         "timestamp": session.get("timestamp", "")
     }
 
     exporter = ReportExporter()
+    exporter.exports_dir = export_cache.artifact_dir(session_id, version, format)
+    base_filename = f"{experiment.title.replace(' ', '_')}_{session_id}"
 
     try:
         if format == "all":
             # Export all formats
-            exports = exporter.export_all_formats(
+            result = await exporter.run_pipeline(
                 markdown_content,
-                session["conversation"],
+                conversation,
                 session.get("observations", {}),
                 full_data,
-                f"{experiment.title.replace(' ', '_')}_{session_id}"
+                base_filename
             )
-            return {
+            response = {
                 "success": True,
                 "message": "Exported in all formats",
-                "files": exports
+                "files": result.files,
+                "timings_ms": result.timings_ms
             }
 
         elif format == "pdf":
-            pdf_path = exporter.export_to_pdf(
-                markdown_content,
-                f"{experiment.title.replace(' ', '_')}_{session_id}"
-            )
-            return {
+            pdf_path = await exporter.export_to_pdf(markdown_content, base_filename)
+            response = {
                 "success": True,
                 "format": "pdf",
                 "file_path": pdf_path
             }
 
         elif format == "markdown":
-            md_path = exporter.export_to_markdown(
-                markdown_content,
-                f"{experiment.title.replace(' ', '_')}_{session_id}"
-            )
-            return {
+            md_path = await exporter.export_to_markdown(markdown_content, base_filename)
+            response = {
                 "success": True,
                 "format": "markdown",
                 "file_path": md_path
             }
 
         elif format == "html":
-            html_path = exporter.export_to_html(
-                markdown_content,
-                f"{experiment.title.replace(' ', '_')}_{session_id}"
-            )
-            return {
+            html_path = await exporter.export_to_html(markdown_content, base_filename)
+            response = {
                 "success": True,
                 "format": "html",
                 "file_path": html_path
             }
 
         elif format == "csv":
-            csv_path = exporter.export_to_csv(
-                session["conversation"],
+            csv_path = await exporter.export_to_csv(
+                conversation,
                 session.get("observations", {}),
-                f"{experiment.title.replace(' ', '_')}_{session_id}"
+                base_filename
             )
-            return {
+            response = {
                 "success": True,
                 "format": "csv",
                 "file_path": csv_path
             }
 
-        elif format == "json":
-            json_path = exporter.export_to_json(
-                full_data,
-                f"{experiment.title.replace(' ', '_')}_{session_id}"
-            )
-            return {
+        else:
+            json_path = await exporter.export_to_json(full_data, base_filename)
+            response = {
                 "success": True,
                 "format": "json",
                 "file_path": json_path
             }
 
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
-
+    except PdfQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except PdfRenderTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Export error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
+    files = response["files"].values() if "files" in response else [response["file_path"]]
+    await file_io.run(export_cache.put, session_id, session["experiment_id"], version, format, response, files)
 
-# Error handlers
-@app.exception_handler(HTTPException)
-async def http_exception_handler(request, exc):
-    """Handle HTTP exceptions"""
-    return {
-        "error": exc.detail,
-        "status_code": exc.status_code
-    }
+    return JSONResponse({**response, "cached": False}, headers={"ETag": etag})
 
 
 if __name__ == "__main__":
@@ -497,6 +497,25 @@ def demo():
 
     run_command(f"{python_path} demo.py")
 
+@cli.command('compact-reports')
+@click.option('--root', default='lab_reports', help='Reports directory (default: lab_reports)')
+@click.option('--keep-links', default=1, help='Readable report files kept per session (default: 1)')
+def compact_reports(root, keep_links):
+    """
+    Compact the lab report store
+
+    Deduplicates identical reports, moves old versions out of the
+    reports directory and deletes unreferenced report objects.
+    """
+    print_header("Compacting Lab Reports")
+
+    from src.utils.report_store import ReportStore
+    stats = ReportStore(root).compact(keep_links=keep_links)
+
+    print_success(f"Adopted {stats['adopted']} report file(s) into the store")
+    print_success(f"Removed {stats['duplicates_removed']} duplicate(s) and {stats['links_removed']} old link(s)")
+    print_success(f"Deleted {stats['objects_removed']} unreferenced object(s), freed {stats['bytes_freed']} bytes")
+
 @cli.command()
 def health():
     """
@@ -107,7 +107,7 @@ function App() {
       if (res.data.wolfram_result) {
         setMessages(prev => [...prev, { 
           sender: 'Graph', 
-          image: res.data.wolfram_result.graph_svg, 
+          image: `${API_URL}${res.data.wolfram_result.graph_url}`, 
           role: 'graph' 
         }]);
       }
@@ -129,7 +129,16 @@ function App() {
         }
       });
 
-      const gitbookUrl = res.data?.gitbook_response?.gitbook_url;
+      // The lab report is generated in the background - poll its job
+      let job = null;
+      for (let attempt = 0; attempt < 30 && res.data.job_id; attempt++) {
+        const jobRes = await axios.get(`${API_URL}/jobs/${res.data.job_id}`);
+        job = jobRes.data;
+        if (job.status === 'succeeded' || job.status === 'failed') break;
+        await new Promise(resolve => setTimeout(resolve, 1000));
+      }
+
+      const gitbookUrl = job?.result?.gitbook_response?.gitbook_url;
 
       if (gitbookUrl) {
         // If a GitBook URL is returned, confirm with the user to open it
@@ -138,7 +147,7 @@ function App() {
         }
       } else {
         // Fallback message if no URL is present
-        alert(res.data.message || "Experiment completed successfully!");
+        alert(job?.result?.message || res.data.message || "Experiment completed successfully!");
       }
 
       resetApp();
@@ -162,6 +171,12 @@ function App() {
   const exportReport = async (format) => {
     if (!sessionId || !selectedExp) return;
 
+    // Markdown, HTML, CSV and JSON are streamed straight to the browser
+    if (format !== 'pdf') {
+      window.location.href = `${API_URL}/sessions/${sessionId}/export?format=${format}`;
+      return;
+    }
+
     setLoading(true);
     try {
       const res = await axios.post(`${API_URL}/export/report`, null, {
@@ -339,7 +354,7 @@ function App() {
                   <div key={idx} className={`message ${msg.role}`}>
                     <strong><i className={`fas fa-${msg.role === 'user' ? 'user-astronaut' : 'robot'}`}></i> {msg.sender}:</strong>
                     {msg.image ? (
-                      <img src={`data:image/svg+xml;base64,${msg.image}`} alt="Graph" />
+                      <img src={msg.image} alt="Graph" />
                     ) : (
                       <p>{msg.text}</p>
                     )}
@@ -1,14 +1,21 @@
 """Multi-agent system for CSGirlies-AILAB"""
 
-from src.agents.base import BaseAgent, AgentMessage
+from src.agents.base import BaseAgent, AgentMessage, close_shared_ai_client, shared_ai_client
+from src.agents.history import TurnLog
 from src.agents.partner import PartnerAgent
 from src.agents.mentor import MentorAgent
 from src.agents.evaluator import EvaluatorAgent
+from src.agents.pool import AgentPool, SessionAgents
 
 __all__ = [
     "BaseAgent",
     "AgentMessage",
+    "shared_ai_client",
+    "close_shared_ai_client",
+    "TurnLog",
     "PartnerAgent",
     "MentorAgent",
-    "EvaluatorAgent"
+    "EvaluatorAgent",
+    "AgentPool",
+    "SessionAgents"
 ]
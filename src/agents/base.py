@@ -1,23 +1,43 @@
 """Base agent class for multi-agent system"""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from typing import Dict, Any, Optional, Sequence
+from src.agents.history import AgentMessage, TurnLog
+from src.config import settings
+import openai
 
+_shared_client: Optional[openai.AsyncOpenAI] = None
 
-@dataclass
-class AgentMessage:
-    """Message format for agent communication"""
-    sender: str
-    content: str
-    role: str
-    metadata: Optional[Dict[str, Any]] = None
+
+def shared_ai_client() -> openai.AsyncOpenAI:
+    """
+    AI client shared by every agent (OpenAI or Groq, per settings), so all
+    sessions reuse one connection pool. Created on first use.
+    """
+    global _shared_client
+    if _shared_client is None:
+        if settings.ai_provider == "groq":
+            _shared_client = openai.AsyncOpenAI(
+                api_key=settings.groq_api_key,
+                base_url="https://api.groq.com/openai/v1"
+            )
+        else:
+            _shared_client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
+    return _shared_client
+
+
+async def close_shared_ai_client() -> None:
+    """Close the shared AI client's connections (it is recreated on next use)"""
+    global _shared_client
+    client, _shared_client = _shared_client, None
+    if client is not None:
+        await client.close()
 
 
 class BaseAgent(ABC):
     """Abstract base class for all agents"""
     
-    def __init__(self, name: str, role: str, personality: str):
+    def __init__(self, name: str, role: str, personality: str, client: Optional[openai.AsyncOpenAI] = None):
         """
         Initialize base agent.
         
@@ -25,11 +45,14 @@ class BaseAgent(ABC):
             name: Agent name
             role: Agent role (partner, mentor, evaluator)
             personality: Agent personality description
+            client: AI client (default: the shared one, see shared_ai_client)
         """
         self.name = name
         self.role = role
         self.personality = personality
-        self.conversation_history = []
+        self.client = client or shared_ai_client()
+        self.conversation_history = TurnLog()
+        self.max_history = settings.max_agent_history
     
     @abstractmethod
     async def think(self, context: Dict[str, Any]) -> str:
@@ -61,8 +84,18 @@ class BaseAgent(ABC):
     def add_to_history(self, message: AgentMessage) -> None:
         """Add message to conversation history"""
         self.conversation_history.append(message)
+        self.trim_history(self.max_history)
+
+    def trim_history(self, max_messages: int) -> int:
+        """
+        Drop the oldest messages beyond max_messages (in batches, see TurnLog.trim).
+
+        Returns:
+            Number of messages dropped
+        """
+        return self.conversation_history.trim(max_messages)
     
-    def get_history(self, limit: Optional[int] = None) -> list:
+    def get_history(self, limit: Optional[int] = None) -> Sequence[AgentMessage]:
         """Get conversation history"""
         if limit:
             return self.conversation_history[-limit:]
@@ -70,4 +103,4 @@ class BaseAgent(ABC):
     
     def clear_history(self) -> None:
         """Clear conversation history"""
-        self.conversation_history = []
+        self.conversation_history = TurnLog()
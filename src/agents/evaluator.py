@@ -1,6 +1,6 @@
 """Evaluator Agent - Session evaluation and assessment"""
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from src.agents.base import BaseAgent, AgentMessage
 from src.config import settings
 import openai
@@ -17,21 +17,13 @@ class EvaluatorAgent(BaseAgent):
     - Generate learning report
     """
     
-    def __init__(self):
+    def __init__(self, client: Optional[openai.AsyncOpenAI] = None):
         super().__init__(
             name="Dr. Evaluator",
             role="evaluator",
-            personality="Fair assessor, provides constructive feedback"
+            personality="Fair assessor, provides constructive feedback",
+            client=client
         )
-
-        # Initialize AI client based on provider (OpenAI or Groq)
-        if settings.ai_provider == "groq":
-            self.client = openai.OpenAI(
-                api_key=settings.groq_api_key,
-                base_url="https://api.groq.com/openai/v1"
-            )
-        else:
-            self.client = openai.OpenAI(api_key=settings.openai_api_key)
     
     async def think(self, context: Dict[str, Any]) -> str:
         """
@@ -50,7 +42,7 @@ Include: What went well, areas for improvement, and next steps.
 Keep it concise (100 words)."""
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=settings.ai_model,  # Uses Groq or OpenAI model
                 messages=[
                     {"role": "system", "content": "You provide constructive, encouraging educational feedback."},
@@ -0,0 +1,242 @@
+"""Conversation messages and compact history storage"""
+
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
+import sys
+import threading
+import time
+
+
+@dataclass(slots=True)
+class AgentMessage:
+    """Message format for agent communication"""
+    sender: str
+    content: str
+    role: str
+    metadata: Optional[Dict[str, Any]] = None
+    timestamp: Optional[float] = None
+
+
+class SymbolTable:
+    """Interns repeated strings (senders, roles) as small integer ids"""
+
+    __slots__ = ("_symbols", "_ids")
+
+    def __init__(self):
+        self._symbols: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        """Get the id for a string, adding it on first use"""
+        symbol_id = self._ids.get(value)
+        if symbol_id is None:
+            symbol_id = len(self._symbols)
+            self._symbols.append(sys.intern(value))
+            self._ids[value] = symbol_id
+        return symbol_id
+
+    def lookup(self, symbol_id: int) -> str:
+        """Get the string for an id"""
+        return self._symbols[symbol_id]
+
+
+# Senders and roles are shared by every log in the process
+_symbols = SymbolTable()
+
+
+class TurnLog(Sequence):
+    """
+    Columnar, append-only log of conversation turns.
+
+    Stores one entry per column instead of one object per turn:
+    - sender/role as interned symbol ids (array of unsigned shorts)
+    - timestamps as an array of floats
+    - step numbers as an array of ints (0 = no step)
+    - content strings in a plain list
+    - metadata in a sparse dict, only for turns that carry any
+
+    Indexing and iteration return AgentMessage objects, so the log is a
+    drop-in replacement for a list of messages.
+
+    Every turn also has a sequence number (its position counting dropped
+    turns), which stays the same when older turns are dropped. Metadata is
+    keyed by sequence number, so dropping turns does not rebuild it.
+
+    Appends, drops and per-turn reads take a lock, so a report or export
+    iterating the log on a worker thread sees consistent turns while new
+    turns are recorded and old ones trimmed.
+    """
+
+    __slots__ = ("_senders", "_roles", "_contents", "_timestamps", "_steps", "_metadata", "_dropped", "_lock")
+
+    def __init__(self):
+        self._senders = array("H")
+        self._roles = array("H")
+        self._contents: List[str] = []
+        self._timestamps = array("d")
+        self._steps = array("i")
+        self._metadata: Dict[int, Dict[str, Any]] = {}  # seq -> metadata
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest kept turn"""
+        return self._dropped
+
+    @property
+    def end_seq(self) -> int:
+        """Sequence number the next appended turn gets"""
+        return self._dropped + len(self._contents)
+
+    def append(self, message: AgentMessage, step: Optional[int] = None) -> None:
+        """
+        Append a turn.
+
+        Args:
+            message: Message to store
+            step: Experiment step the turn belongs to (optional)
+        """
+        with self._lock:
+            if message.metadata:
+                self._metadata[self._dropped + len(self._contents)] = message.metadata
+            self._senders.append(_symbols.intern(message.sender))
+            self._roles.append(_symbols.intern(message.role))
+            self._contents.append(message.content)
+            self._timestamps.append(message.timestamp if message.timestamp is not None else time.time())
+            self._steps.append(step or 0)
+
+    def drop_oldest(self, count: int) -> int:
+        """
+        Drop the oldest turns.
+
+        Returns:
+            Number of turns dropped
+        """
+        with self._lock:
+            count = min(max(count, 0), len(self._contents))
+            if count == 0:
+                return 0
+
+            del self._senders[:count]
+            del self._roles[:count]
+            del self._contents[:count]
+            del self._timestamps[:count]
+            del self._steps[:count]
+            self._dropped += count
+            for seq in [seq for seq in self._metadata if seq < self._dropped]:
+                del self._metadata[seq]
+            return count
+
+    def trim(self, max_turns: int) -> int:
+        """
+        Keep at most max_turns turns.
+
+        Once the log grows past max_turns, a tenth of max_turns extra is
+        dropped with the overflow, so the front deletes happen once per
+        batch of appends instead of on every append.
+
+        Returns:
+            Number of turns dropped
+        """
+        overflow = len(self._contents) - max_turns
+        if overflow <= 0:
+            return 0
+        return self.drop_oldest(overflow + max_turns // 10)
+
+    def step(self, index: int) -> Optional[int]:
+        """Get the step number of a turn"""
+        return self._steps[index] or None
+
+    def iter_items(self, start: Optional[int] = None, stop: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Lazily export turns as (sequence number, plain dict) pairs.
+
+        Positions are re-resolved from sequence numbers on every step, so
+        turns dropped during the iteration are skipped (never repeated)
+        and turns appended after it started are not included.
+
+        Args:
+            start: Sequence number of the first turn to export (default: oldest kept)
+            stop: Sequence number after the last turn to export (default: all current turns)
+        """
+        seq = self.first_seq if start is None else start
+        stop = self.end_seq if stop is None else min(stop, self.end_seq)
+        while seq < stop:
+            with self._lock:
+                seq = max(seq, self._dropped)
+                index = seq - self._dropped
+                if seq >= stop or index >= len(self._contents):
+                    return
+                turn = {
+                    "role": _symbols.lookup(self._roles[index]),
+                    "sender": _symbols.lookup(self._senders[index]),
+                    "content": self._contents[index],
+                    "step": self._steps[index] or None,
+                    "timestamp": datetime.fromtimestamp(self._timestamps[index]).isoformat()
+                }
+                if seq in self._metadata:
+                    turn["metadata"] = self._metadata[seq]
+            yield seq, turn
+            seq += 1
+
+    def iter_dicts(self, start: Optional[int] = None, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily export turns as plain dicts (for reports, exports and JSON).
+
+        Args:
+            start: Sequence number of the first turn to export (see iter_items)
+            stop: Sequence number after the last turn to export
+        """
+        for _, turn in self.iter_items(start, stop):
+            yield turn
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Export turns as a list of plain dicts"""
+        return list(self.iter_dicts())
+
+    def _message(self, index: int) -> AgentMessage:
+        """Materialize one turn as an AgentMessage (caller holds the lock)"""
+        return AgentMessage(
+            sender=_symbols.lookup(self._senders[index]),
+            content=self._contents[index],
+            role=_symbols.lookup(self._roles[index]),
+            metadata=self._metadata.get(self._dropped + index),
+            timestamp=self._timestamps[index]
+        )
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[AgentMessage, List[AgentMessage]]:
+        with self._lock:
+            if isinstance(index, slice):
+                return [self._message(i) for i in range(*index.indices(len(self._contents)))]
+            if index < 0:
+                index += len(self._contents)
+            if not 0 <= index < len(self._contents):
+                raise IndexError("turn index out of range")
+            return self._message(index)
+
+    def __iter__(self) -> Iterator[AgentMessage]:
+        seq, stop = self.first_seq, self.end_seq
+        while seq < stop:
+            with self._lock:
+                seq = max(seq, self._dropped)
+                index = seq - self._dropped
+                if seq >= stop or index >= len(self._contents):
+                    return
+                message = self._message(index)
+            yield message
+            seq += 1
+
+    def __len__(self) -> int:
+        return len(self._contents)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (TurnLog, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"TurnLog({len(self)} turns)"
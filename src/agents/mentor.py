@@ -1,6 +1,6 @@
 """Mentor Agent - Learning oversight and guidance"""
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from src.agents.base import BaseAgent, AgentMessage
 from src.config import settings
 import openai
@@ -17,22 +17,14 @@ class MentorAgent(BaseAgent):
     - Guides student without spoiling
     """
     
-    def __init__(self):
+    def __init__(self, client: Optional[openai.AsyncOpenAI] = None):
         super().__init__(
             name="Dr. Silva",
             role="mentor",
-            personality="Wise mentor, patient, provides guidance through Socratic method"
+            personality="Wise mentor, patient, provides guidance through Socratic method",
+            client=client
         )
 
-        # Initialize AI client based on provider (OpenAI or Groq)
-        if settings.ai_provider == "groq":
-            self.client = openai.OpenAI(
-                api_key=settings.groq_api_key,
-                base_url="https://api.groq.com/openai/v1"
-            )
-        else:
-            self.client = openai.OpenAI(api_key=settings.openai_api_key)
-
         self.base_prompt = """You are Dr. Silva, a mentor observing a lab session.
 - Monitor student understanding
 - Detect misconceptions gently
@@ -72,7 +64,7 @@ Provide a brief mentor observation or hint (max 100 words). Focus on:
 Mentor's Observation:"""
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=settings.ai_model,  # Uses Groq or OpenAI model
                 messages=[
                     {"role": "system", "content": self.base_prompt},
@@ -125,7 +117,7 @@ Identify:
 Be concise."""
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=settings.ai_model,  # Uses Groq or OpenAI model
                 messages=[
                     {"role": "system", "content": "You are an expert science educator analyzing student understanding."},
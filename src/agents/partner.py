@@ -1,6 +1,6 @@
 """Partner Agent - Interactive lab companion"""
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from src.agents.base import BaseAgent, AgentMessage
 from src.config import settings
 import openai
@@ -18,22 +18,14 @@ class PartnerAgent(BaseAgent):
     Supports both OpenAI and Groq (free!) APIs
     """
 
-    def __init__(self):
+    def __init__(self, client: Optional[openai.AsyncOpenAI] = None):
         super().__init__(
             name="Alex",
             role="partner",
-            personality="Curious lab partner, slightly competitive, encourages discussion and collaboration"
+            personality="Curious lab partner, slightly competitive, encourages discussion and collaboration",
+            client=client
         )
 
-        # Initialize AI client based on provider
-        if settings.ai_provider == "groq":
-            self.client = openai.OpenAI(
-                api_key=settings.groq_api_key,
-                base_url="https://api.groq.com/openai/v1"
-            )
-        else:
-            self.client = openai.OpenAI(api_key=settings.openai_api_key)
-
         self.experiment_memory = {}  # Remember key observations across the session
         self.what_if_counter = 0  # Track "what if" questions asked
 
@@ -74,6 +66,7 @@ Keep responses natural, conversational, and under 150 words."""
             observation_key = f"step_{step}_observation"
             if observation_key not in self.experiment_memory:
                 self.experiment_memory[observation_key] = student_message[:100]
+                self.trim_memory(settings.max_experiment_memory)
 
         # Build conversation context with FULL history for memory
         conversation_context = "\n".join([
@@ -111,7 +104,7 @@ Student just said: {student_message}
 Alex (respond PROACTIVELY with questions and curiosity):"""
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=settings.ai_model,  # Uses Groq or OpenAI model based on config
                 messages=[
                     {"role": "system", "content": self.base_prompt},
@@ -152,6 +145,18 @@ Alex (respond PROACTIVELY with questions and curiosity):"""
             self.add_to_history(msg)
             return fallback
     
+    def trim_memory(self, max_entries: int) -> int:
+        """
+        Forget the oldest observations beyond max_entries.
+
+        Returns:
+            Number of observations forgotten
+        """
+        excess = max(len(self.experiment_memory) - max_entries, 0)
+        for key in list(self.experiment_memory)[:excess]:
+            del self.experiment_memory[key]
+        return excess
+
     async def evaluate(self, student_input: str, experiment_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Evaluate student's input for potential misconceptions.
@@ -0,0 +1,61 @@
+"""Partner and mentor agents per experiment session"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterator
+from src.agents.mentor import MentorAgent
+from src.agents.partner import PartnerAgent
+
+
+@dataclass
+class SessionAgents:
+    """The agents talking to the student in one session"""
+    partner: PartnerAgent = field(default_factory=PartnerAgent)
+    mentor: MentorAgent = field(default_factory=MentorAgent)
+
+
+class AgentPool:
+    """
+    Bounded map of session_id -> SessionAgents.
+
+    Agents keep per-conversation state (history, experiment memory, the
+    partner's "what if" count), so each session gets its own instances and
+    concurrent sessions (e.g. batch replays) never see each other's turns.
+    The agents share one AI client (see shared_ai_client), so a session's
+    agents hold no connections and can be dropped without closing anything.
+    Least recently used sessions are dropped past max_sessions.
+    """
+
+    def __init__(self, max_sessions: int):
+        self.max_sessions = max_sessions
+        self._agents: "OrderedDict[str, SessionAgents]" = OrderedDict()
+
+    def get(self, session_id: str) -> SessionAgents:
+        """Agents of a session (created on first use)"""
+        agents = self._agents.get(session_id)
+        if agents is None:
+            return self.reset(session_id)
+        self._agents.move_to_end(session_id)
+        return agents
+
+    def reset(self, session_id: str) -> SessionAgents:
+        """Give a session fresh agents"""
+        agents = self._agents[session_id] = SessionAgents()
+        self._agents.move_to_end(session_id)
+        while len(self._agents) > self.max_sessions:
+            self._agents.popitem(last=False)
+        return agents
+
+    def discard(self, session_id: str) -> None:
+        """Forget a session's agents"""
+        self._agents.pop(session_id, None)
+
+    def values(self) -> Iterator[SessionAgents]:
+        """Agents of every session"""
+        return iter(list(self._agents.values()))
+
+    def __contains__(self, session_id: object) -> bool:
+        return session_id in self._agents
+
+    def __len__(self) -> int:
+        return len(self._agents)
@@ -22,6 +22,12 @@ class Settings(BaseSettings):
     # GitBook
     gitbook_api_key: Optional[str] = None
     gitbook_space_id: Optional[str] = None
+    gitbook_base_url: str = "https://api.gitbook.com/v1"
+    gitbook_timeout_seconds: float = 10.0
+    gitbook_max_connections: int = 10
+    gitbook_max_concurrency: int = 4
+    gitbook_max_retries: int = 3
+    gitbook_retry_backoff_seconds: float = 0.5
 
     # Server
     host: str = "127.0.0.1"
@@ -29,6 +35,84 @@ class Settings(BaseSettings):
     debug: bool = True
     log_level: str = "INFO"
 
+    # Admin endpoints (X-Admin-Token header required when set, else loopback clients only)
+    admin_token: Optional[str] = None
+
+    # Profiling
+    profile_dir: str = "lab_reports/profiles"
+    slow_request_threshold_ms: float = 3000.0
+    slow_request_sample_rate: float = 0.1  # Fraction of requests profiled
+    max_profile_session_seconds: int = 300
+
+    # Memory high-water marks (oldest entries are evicted past these)
+    max_sessions: int = 1000
+    max_session_turns: int = 500
+    max_agent_history: int = 200
+    max_experiment_memory: int = 50
+
+    # Scenario definition files (YAML/JSON), compiled cache and hot reload
+    scenarios_dir: str = "scenarios"
+    scenario_cache_dir: str = "lab_reports/cache/scenarios"
+    scenario_reload_seconds: float = 5.0  # 0 disables hot reload
+
+    # Response compression (brotli when installed, else gzip)
+    compression_min_bytes: int = 1024  # Smaller responses are sent uncompressed
+    gzip_level: int = 6
+    brotli_quality: int = 5
+
+    # Experiment catalog responses (pre-serialized, served with ETags)
+    catalog_cache_control: str = "public, max-age=300"
+    catalog_compress_min_bytes: int = 512  # Smaller responses are sent uncompressed
+    catalog_cache_max_payloads: int = 1024  # Cached listing/detail views (pages, field selections)
+
+    # Paginated endpoints (experiment catalog and search, session history)
+    default_page_size: int = 20
+    page_max_limit: int = 100
+
+    # Batch interactions (transcript replays, automated graders)
+    batch_max_turns: int = 10000  # Turns accepted per request
+    batch_concurrency: int = 16  # Sessions replayed at once (and the most a request may ask for)
+
+    # Rendered graphs served by content hash (kept on disk; least recently used dropped
+    # from memory past max bytes)
+    graph_dir: str = "lab_reports/graphs"
+    graph_store_max_bytes: int = 32 * 1024 * 1024
+    graph_max_points: int = 300  # Series are downsampled (LTTB) to this many vertices, ~1 per pixel
+
+    # Lab reports (content-addressed store, see src/utils/report_store.py)
+    reports_dir: str = "lab_reports"
+
+    # Report/export file I/O thread pool
+    file_io_workers: int = 4
+    file_io_max_concurrency: int = 32
+    render_workers: int = 2  # Separate pool for markdown/HTML rendering (CPU-bound)
+
+    # PDF rendering worker processes
+    pdf_workers: int = 2
+    pdf_max_queue: int = 16  # Jobs waiting for a worker before new ones are rejected
+    pdf_timeout_seconds: float = 60.0
+
+    # Export artifact cache (least recently used artifacts deleted past max bytes)
+    export_cache_dir: str = "lab_reports/exports/cache"
+    export_cache_max_bytes: int = 256 * 1024 * 1024
+
+    # Analytics dataset (turns, observations, Wolfram results of all sessions)
+    analytics_dir: str = "lab_reports/analytics"
+    analytics_format: str = "ndjson"  # ndjson or csv (closed days compact to Parquet)
+    analytics_flush_rows: int = 500
+
+    # Bulk (class-wide) exports
+    bulk_export_dir: str = "lab_reports/exports/bulk"
+    bulk_export_workers: int = 4
+    bulk_export_retention_hours: float = 72.0  # Archives are deleted after this
+
+    # Background jobs
+    jobs_dir: str = "lab_reports/jobs"
+    job_workers: int = 2
+    job_max_attempts: int = 3
+    job_retry_backoff_seconds: float = 2.0
+    job_retention_hours: float = 72.0  # Finished job files are deleted after this
+
     class Config:
         env_file = ".env"
         case_sensitive = False
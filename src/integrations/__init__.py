@@ -1,5 +1,6 @@
 """Integrations module"""
 
 from src.integrations.gitbook import GitBookIntegration, gitbook_integration
+from src.integrations.gitbook_client import GitBookClient, GitBookAPIError
 
-__all__ = ["GitBookIntegration", "gitbook_integration"]
+__all__ = ["GitBookIntegration", "gitbook_integration", "GitBookClient", "GitBookAPIError"]
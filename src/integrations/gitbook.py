@@ -1,24 +1,35 @@
 """GitBook integration for automatic documentation"""
 
 from typing import Dict, Any, Optional
+from datetime import datetime
 from src.config import settings
-import requests
+from src.integrations.gitbook_client import GitBookClient, GitBookAPIError
+from src.integrations.report import (
+    ReportTemplate,
+    iter_comprehensive_report,
+    iter_experiment_markdown
+)
+from src.utils.report_store import ReportStore
+from src.utils.file_io import file_io
 import json
 
+# Pooled HTTP client shared by every GitBookIntegration instance
+gitbook_client = GitBookClient.from_settings()
+
+# Content-addressed store for generated reports
+report_store = ReportStore(settings.reports_dir)
+
 
 class GitBookIntegration:
     """
     Integrates with GitBook API to automatically create and update experiment documentation.
     """
     
-    def __init__(self):
+    def __init__(self, client: Optional[GitBookClient] = None, store: Optional[ReportStore] = None):
         self.api_key = settings.gitbook_api_key
         self.space_id = settings.gitbook_space_id
-        self.base_url = "https://api.gitbook.com/v1"
-        self.headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        self.client = client or gitbook_client
+        self.store = store or report_store
     
     async def create_experiment_report(self,
                                       session_id: str,
@@ -27,7 +38,9 @@ class GitBookIntegration:
                                       conversation_history: list,
                                       observations: Dict[str, Any],
                                       wolfram_results: list,
-                                      evaluation: Dict[str, Any]) -> Dict[str, Any]:
+                                      evaluation: Dict[str, Any],
+                                      template: Optional[ReportTemplate] = None,
+                                      report_date: Optional[datetime] = None) -> Dict[str, Any]:
         """
         Create COMPREHENSIVE automated lab report with full session details.
 
@@ -39,36 +52,33 @@ class GitBookIntegration:
             observations: Student observations throughout the experiment
             wolfram_results: All Wolfram computation results
             evaluation: Final evaluation from evaluator agent
+            template: Precompiled scenario sections (see report_templates)
+            report_date: Date printed in the report (defaults to now); pass a
+                fixed date so retries produce identical, deduplicated reports
 
         Returns:
             GitBook page creation response with full report
         """
 
-        # Build comprehensive markdown content
-        content = self._build_comprehensive_report(
+        # Stream the comprehensive markdown straight into the report store
+        # on the file I/O pool (kept as backup even if GitBook API not configured)
+        report_date = report_date or datetime.now()
+        timestamp = report_date.strftime("%Y%m%d_%H%M%S")
+        report_filename = f"{experiment_name.replace(' ', '_')}_{session_id}_{timestamp}.md"
+
+        stored = await file_io.run(self.store.write, session_id, report_filename, iter_comprehensive_report(
             session_id,
             experiment_name,
             scenario_data,
             conversation_history,
             observations,
             wolfram_results,
-            evaluation
-        )
-
-        # Save to local file as backup (even if GitBook API not configured)
-        import os
-        from datetime import datetime
-        from pathlib import Path
-
-        reports_dir = Path("lab_reports")
-        reports_dir.mkdir(exist_ok=True)
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        report_filename = f"{experiment_name.replace(' ', '_')}_{session_id}_{timestamp}.md"
-        report_path = reports_dir / report_filename
-
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+            evaluation,
+            timestamp=report_date.strftime("%Y-%m-%d %H:%M:%S"),
+            template=template
+        ))
+        report_path = stored.path
+        preview = stored.preview
 
         # If API key is not set, return mock response with file location
         if not self.api_key or self.api_key == "xxxxxxxxxxxx":
@@ -76,13 +86,18 @@ class GitBookIntegration:
                 "success": True,
                 "message": f"Lab report for '{experiment_name}' created",
                 "local_file": str(report_path),
-                "content_preview": content[:300] + "...",
+                "report_hash": stored.digest,
+                "deduplicated": stored.deduplicated,
+                "content_preview": preview + "...",
                 "gitbook_status": "API not configured (using local storage)"
             }
 
         try:
+            # The GitBook API takes the whole document in one JSON body
+            content = await file_io.read_text(report_path)
+
             # API endpoint to create a new page in the root of the space
-            api_url = f"{self.base_url}/spaces/{self.space_id}/content"
+            api_path = f"/spaces/{self.space_id}/content"
 
             # Create page in GitBook
             page_data = {
@@ -94,10 +109,7 @@ class GitBookIntegration:
                 }
             }
 
-            response = requests.post(api_url, headers=self.headers, json=page_data)
-            response.raise_for_status()  # Raise an exception for bad status codes
-
-            response_data = response.json()
+            response_data = await self.client.post(api_path, page_data)
             
             # Construct the public URL for the newly created page
             gitbook_url = f"https://app.gitbook.com/{response_data['spaceId']}/{response_data['path']}"
@@ -108,10 +120,11 @@ class GitBookIntegration:
                 "message": f"Lab report for '{experiment_name}' created and published to GitBook.",
                 "page_id": response_data.get('uid'),
                 "local_file": str(report_path),
+                "report_hash": stored.digest,
                 "gitbook_url": gitbook_url,
             }
 
-        except requests.exceptions.RequestException as e:
+        except GitBookAPIError as e:
             return {
                 "success": False,
                 "error": f"GitBook API Error: {str(e)}",
@@ -183,157 +196,18 @@ class GitBookIntegration:
                                    evaluation: Dict[str, Any]) -> str:
         """
         Build COMPREHENSIVE lab report with all session details.
-        """
-        from datetime import datetime
-
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        markdown = f"""# Laboratory Report: {experiment_name}
-
-**Session ID:** `{session_id}`
-**Date:** {timestamp}
-**Generated by:** CSGirlies-AILAB AI Partner System
-
----
-
-## 1. Experiment Overview
-
-**Subject:** {scenario_data.get('subject', 'Science')}
-**Level:** {scenario_data.get('level', 'Beginner')}
-**Duration:** {scenario_data.get('duration', 'N/A')} minutes
-
-### Learning Objectives
-"""
-
-        if isinstance(scenario_data.get('learning_objectives'), list):
-            for obj in scenario_data['learning_objectives']:
-                markdown += f"- {obj}\n"
-
-        markdown += f"""
-### Materials Used
-"""
-
-        if isinstance(scenario_data.get('materials'), list):
-            for material in scenario_data['materials']:
-                markdown += f"- {material}\n"
-
-        markdown += f"""
----
-
-## 2. Experimental Procedure
-
-"""
-
-        if isinstance(scenario_data.get('steps'), list):
-            for i, step in enumerate(scenario_data['steps'], 1):
-                title = step.get('title', f'Step {i}')
-                description = step.get('description', '')
-                markdown += f"### Step {i}: {title}\n{description}\n\n"
-
-        markdown += f"""
----
-
-## 3. Conversation Log & Observations
-
-This section contains the complete dialogue between the student and AI lab partners.
-
-"""
-
-        if conversation_history:
-            markdown += "### Dialogue Transcript\n\n"
-            for msg in conversation_history:
-                sender = msg.get('sender', 'Unknown')
-                content = msg.get('content', '')
-                role = msg.get('role', '')
-                markdown += f"**{sender}** ({role}):\n> {content}\n\n"
-        else:
-            markdown += "*No conversation recorded*\n\n"
-
-        markdown += f"""
-### Student Observations
-"""
-
-        if observations:
-            for step_key, observation in observations.items():
-                markdown += f"- **{step_key}**: {observation}\n"
-        else:
-            markdown += "*No observations recorded*\n"
-
-        markdown += f"""
----
-
-## 4. Wolfram Computational Results
-
-"""
-
-        if wolfram_results:
-            for i, result in enumerate(wolfram_results, 1):
-                query = result.get('query', 'N/A')
-                result_text = result.get('result', 'N/A')
-                numeric = result.get('numeric_result', 'N/A')
-
-                markdown += f"""
-### Computation {i}
-
-**Query:**
-```
-{query}
-```
 
-**Result:** {result_text}
-**Numeric Value:** {numeric}
-
-"""
-                if result.get('graph_svg'):
-                    markdown += f"**Graph:** SVG visualization generated (base64 encoded)\n\n"
-        else:
-            markdown += "*No computations performed*\n"
-
-        markdown += f"""
----
-
-## 5. Evaluation & Learning Assessment
-
-"""
-
-        if evaluation:
-            markdown += f"""
-**Overall Performance:** {evaluation.get('overall_performance', 'N/A')}
-**Understanding Level:** {evaluation.get('understanding_level', 'N/A')}
-**Areas of Strength:** {evaluation.get('strengths', 'N/A')}
-**Areas for Improvement:** {evaluation.get('improvements', 'N/A')}
-
-### Detailed Feedback
-{evaluation.get('detailed_feedback', 'No evaluation available')}
-"""
-        else:
-            markdown += "*Evaluation not completed*\n"
-
-        markdown += f"""
----
-
-## 6. Conclusions
-
-{evaluation.get('conclusions', 'Experiment completed successfully. All objectives were addressed through interactive AI-guided learning.')}
-
----
-
-## 7. References & Additional Resources
-
-- **Wolfram Language Documentation:** https://www.wolfram.com/language/
-- **Experiment Methodology:** AI-driven collaborative learning
-- **Technology Stack:** OpenAI GPT-4, Wolfram Cloud, GitBook API
-
----
-
-**Report automatically generated by CSGirlies-AILAB**
-*Making science education accessible, engaging, and fun through AI*
-
-Session ID: `{session_id}`
-Generated: {timestamp}
-"""
-
-        return markdown
+        Prefer iter_comprehensive_report to stream large sessions.
+        """
+        return "".join(iter_comprehensive_report(
+            session_id,
+            experiment_name,
+            scenario_data,
+            conversation_history,
+            observations,
+            wolfram_results,
+            evaluation
+        ))
 
     def _build_experiment_markdown(self,
                                    experiment_name: str,
@@ -350,61 +224,7 @@ Generated: {timestamp}
         Returns:
             Markdown formatted content
         """
-        
-        markdown = f"""# {experiment_name}
-
-## Overview
-{scenario_data.get('description', 'Experiment in progress')}
-
-### Learning Objectives
-"""
-        
-        if isinstance(scenario_data.get('learning_objectives'), list):
-            for obj in scenario_data['learning_objectives']:
-                markdown += f"- {obj}\n"
-        
-        markdown += f"""
-## Materials
-"""
-        
-        if isinstance(scenario_data.get('materials'), list):
-            for material in scenario_data['materials']:
-                markdown += f"- {material}\n"
-        
-        markdown += f"""
-## Procedure
-
-"""
-        
-        if isinstance(scenario_data.get('steps'), list):
-            for step in scenario_data['steps']:
-                step_num = step.get('step_number', '?')
-                title = step.get('title', 'Step')
-                instructions = step.get('instructions', '')
-                markdown += f"### Step {step_num}: {title}\n{instructions}\n\n"
-        
-        markdown += f"""## Results & Analysis
-
-### Key Findings
-{results.get('summary', 'Results processing...')}
-
-### Graphs and Visualizations
-{results.get('graph_description', 'Graphs generated')}
-
-### Data Summary
-- Partner Observations: {results.get('partner_message', 'N/A')}
-- Mentor Guidance: {results.get('mentor_message', 'N/A')}
-- Wolfram Computation: {results.get('wolfram_result', 'Computed')}
-
-## Conclusions
-
-{results.get('conclusions', 'Experiment complete. Further analysis needed.')}
-
----
-*Experiment generated by CSGirlies-AILAB on {results.get('timestamp', 'today')}*
-"""
-        
-        return markdown
+        return "".join(iter_experiment_markdown(experiment_name, scenario_data, results))
     
     async def update_learning_portal(self, 
                                      student_id: str,
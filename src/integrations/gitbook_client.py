@@ -0,0 +1,158 @@
+"""Shared async HTTP client for the GitBook API"""
+
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+from src.config import settings
+import asyncio
+import httpx
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class GitBookAPIError(Exception):
+    """GitBook API call failed (after retries)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class GitBookClient:
+    """
+    Pooled async HTTP client for GitBook.
+
+    Features:
+    - One httpx.AsyncClient (keep-alive connection pool) shared by all calls
+    - Connect/read timeouts
+    - Retries on 429/5xx and transport errors, honoring Retry-After
+    - Bounded number of concurrent requests (retry back-off sleeps do not
+      hold a slot)
+
+    The underlying client is bound to the event loop it was created on and
+    is recreated if the loop changes.
+    """
+
+    def __init__(self,
+                 base_url: str,
+                 api_key: Optional[str],
+                 timeout_seconds: float = 10.0,
+                 max_connections: int = 10,
+                 max_concurrency: int = 4,
+                 max_retries: int = 3,
+                 retry_backoff_seconds: float = 0.5,
+                 max_retry_delay_seconds: float = 30.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout_seconds = timeout_seconds
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.max_retry_delay_seconds = max_retry_delay_seconds
+        self.transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_settings(cls) -> "GitBookClient":
+        """Build a client from application settings"""
+        return cls(
+            base_url=settings.gitbook_base_url,
+            api_key=settings.gitbook_api_key,
+            timeout_seconds=settings.gitbook_timeout_seconds,
+            max_connections=settings.gitbook_max_connections,
+            max_concurrency=settings.gitbook_max_concurrency,
+            max_retries=settings.gitbook_max_retries,
+            retry_backoff_seconds=settings.gitbook_retry_backoff_seconds
+        )
+
+    async def post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST JSON to the GitBook API.
+
+        Args:
+            path: API path relative to the base URL
+            payload: JSON body
+
+        Returns:
+            Decoded JSON response
+
+        Raises:
+            GitBookAPIError: Non-retryable error, or retries exhausted
+        """
+        client = self._get_client()
+        semaphore = self._semaphore
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with semaphore:
+                    response = await client.post(path, json=payload)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise GitBookAPIError(f"GitBook request failed: {str(e)}")
+            else:
+                if response.status_code < 400:
+                    return response.json()
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    raise GitBookAPIError(
+                        f"GitBook API returned {response.status_code}: {response.text[:200]}",
+                        status_code=response.status_code
+                    )
+                retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+
+            # Back off without holding a concurrency slot
+            delay = retry_after if retry_after is not None else self.retry_backoff_seconds * (2 ** attempt)
+            await asyncio.sleep(min(delay, self.max_retry_delay_seconds))
+
+        raise GitBookAPIError("GitBook request failed")
+
+    async def aclose(self) -> None:
+        """Close the pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                timeout=httpx.Timeout(self.timeout_seconds),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                transport=self.transport
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header (seconds or HTTP date)"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,382 @@
+"""Streaming lab report rendering with precompiled scenario templates"""
+
+from typing import Dict, Any, Iterable, Iterator, Optional
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from src.scenarios import ExperimentScenario, on_scenario_change
+
+REPORT_REFERENCES_SECTION = """
+---
+
+## 7. References & Additional Resources
+
+- **Wolfram Language Documentation:** https://www.wolfram.com/language/
+- **Experiment Methodology:** AI-driven collaborative learning
+- **Technology Stack:** OpenAI GPT-4, Wolfram Cloud, GitBook API
+
+---
+
+**Report automatically generated by CSGirlies-AILAB**
+*Making science education accessible, engaging, and fun through AI*
+
+"""
+
+
+@dataclass(frozen=True)
+class ReportTemplate:
+    """Pre-rendered, scenario-invariant sections of the lab report and experiment page"""
+    report_sections: str  # Overview, objectives, materials, procedure, transcript intro
+    page_sections: str  # Overview, objectives, materials, procedure
+
+
+def scenario_report_data(scenario: ExperimentScenario) -> Dict[str, Any]:
+    """Scenario details used by lab reports"""
+    return {
+        "description": scenario.description,
+        "learning_objectives": scenario.learning_objectives,
+        "materials": scenario.materials,
+        "steps": [
+            {
+                "step_number": s.step_number,
+                "title": s.title,
+                "instructions": s.instructions
+            }
+            for s in scenario.steps
+        ]
+    }
+
+
+def compile_report_template(scenario_data: Dict[str, Any]) -> ReportTemplate:
+    """Render the static sections of a scenario once"""
+    return ReportTemplate(
+        report_sections=_render_report_sections(scenario_data),
+        page_sections=_render_page_sections(scenario_data)
+    )
+
+
+def iter_comprehensive_report(session_id: str,
+                              experiment_name: str,
+                              scenario_data: Dict[str, Any],
+                              conversation_history: Iterable[Dict[str, Any]],
+                              observations: Dict[str, Any],
+                              wolfram_results: Iterable[Dict[str, Any]],
+                              evaluation: Dict[str, Any],
+                              timestamp: Optional[str] = None,
+                              template: Optional[ReportTemplate] = None) -> Iterator[str]:
+    """
+    Render the comprehensive lab report as a stream of markdown chunks.
+
+    Each section (and each transcript turn) is yielded as soon as it is
+    rendered, so callers can write to a file or HTTP response in linear
+    time without holding the whole document. conversation_history may be
+    any iterable, including a generator over a long session.
+
+    Args:
+        session_id: Unique session identifier
+        experiment_name: Name of the experiment
+        scenario_data: Experiment scenario details
+        conversation_history: Dialogue turns (dicts with sender, content, role)
+        observations: Student observations throughout the experiment
+        wolfram_results: Wolfram computation results
+        evaluation: Final evaluation from evaluator agent
+        timestamp: Report date (defaults to now)
+        template: Precompiled scenario sections (rendered from scenario_data if None)
+
+    Yields:
+        Markdown chunks
+    """
+    timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    yield f"""# Laboratory Report: {experiment_name}
+
+**Session ID:** `{session_id}`
+**Date:** {timestamp}
+**Generated by:** CSGirlies-AILAB AI Partner System
+
+---
+
+"""
+
+    if template is not None:
+        yield template.report_sections
+    else:
+        yield _render_report_sections(scenario_data)
+
+    has_conversation = False
+    for msg in conversation_history:
+        if not has_conversation:
+            yield "### Dialogue Transcript\n\n"
+            has_conversation = True
+        sender = msg.get('sender', 'Unknown')
+        content = msg.get('content', '')
+        role = msg.get('role', '')
+        yield f"**{sender}** ({role}):\n> {content}\n\n"
+
+    if not has_conversation:
+        yield "*No conversation recorded*\n\n"
+
+    yield """
+### Student Observations
+"""
+
+    if observations:
+        yield "".join(
+            f"- **{step_key}**: {observation}\n"
+            for step_key, observation in observations.items()
+        )
+    else:
+        yield "*No observations recorded*\n"
+
+    yield """
+---
+
+## 4. Wolfram Computational Results
+
+"""
+
+    has_results = False
+    for i, result in enumerate(wolfram_results, 1):
+        has_results = True
+        query = result.get('query', 'N/A')
+        result_text = result.get('result', 'N/A')
+        numeric = result.get('numeric_result', 'N/A')
+
+        yield f"""
+### Computation {i}
+
+**Query:**
+```
+{query}
+```
+
+**Result:** {result_text}
+**Numeric Value:** {numeric}
+
+"""
+        if result.get('graph_id'):
+            yield f"**Graph:** `/graphs/{result['graph_id']}.svg`\n\n"
+
+    if not has_results:
+        yield "*No computations performed*\n"
+
+    yield """
+---
+
+## 5. Evaluation & Learning Assessment
+
+"""
+
+    if evaluation:
+        yield f"""
+**Overall Performance:** {evaluation.get('overall_performance', 'N/A')}
+**Understanding Level:** {evaluation.get('understanding_level', 'N/A')}
+**Areas of Strength:** {evaluation.get('strengths', 'N/A')}
+**Areas for Improvement:** {evaluation.get('improvements', 'N/A')}
+
+### Detailed Feedback
+{evaluation.get('detailed_feedback', 'No evaluation available')}
+"""
+    else:
+        yield "*Evaluation not completed*\n"
+
+    yield f"""
+---
+
+## 6. Conclusions
+
+{(evaluation or {}).get('conclusions', 'Experiment completed successfully. All objectives were addressed through interactive AI-guided learning.')}
+"""
+
+    yield REPORT_REFERENCES_SECTION
+
+    yield f"""Session ID: `{session_id}`
+Generated: {timestamp}
+"""
+
+
+def iter_experiment_markdown(experiment_name: str,
+                             scenario_data: Dict[str, Any],
+                             results: Dict[str, Any],
+                             template: Optional[ReportTemplate] = None) -> Iterator[str]:
+    """
+    Render the experiment documentation page as a stream of markdown chunks.
+
+    Args:
+        experiment_name: Experiment name
+        scenario_data: Scenario details
+        results: Experiment results
+        template: Precompiled scenario sections (rendered from scenario_data if None)
+
+    Yields:
+        Markdown chunks
+    """
+    yield f"""# {experiment_name}
+
+"""
+
+    if template is not None:
+        yield template.page_sections
+    else:
+        yield _render_page_sections(scenario_data)
+
+    yield f"""## Results & Analysis
+
+### Key Findings
+{results.get('summary', 'Results processing...')}
+
+### Graphs and Visualizations
+{results.get('graph_description', 'Graphs generated')}
+
+### Data Summary
+- Partner Observations: {results.get('partner_message', 'N/A')}
+- Mentor Guidance: {results.get('mentor_message', 'N/A')}
+- Wolfram Computation: {results.get('wolfram_result', 'Computed')}
+
+## Conclusions
+
+{results.get('conclusions', 'Experiment complete. Further analysis needed.')}
+
+---
+*Experiment generated by CSGirlies-AILAB on {results.get('timestamp', 'today')}*
+"""
+
+
+def _render_report_sections(scenario_data: Dict[str, Any]) -> str:
+    """Render report sections 1-2 and the section 3 intro"""
+    parts = [f"""## 1. Experiment Overview
+
+**Subject:** {scenario_data.get('subject', 'Science')}
+**Level:** {scenario_data.get('level', 'Beginner')}
+**Duration:** {scenario_data.get('duration', 'N/A')} minutes
+
+### Learning Objectives
+"""]
+
+    if isinstance(scenario_data.get('learning_objectives'), list):
+        parts.extend(f"- {obj}\n" for obj in scenario_data['learning_objectives'])
+
+    parts.append("""
+### Materials Used
+""")
+
+    if isinstance(scenario_data.get('materials'), list):
+        parts.extend(f"- {material}\n" for material in scenario_data['materials'])
+
+    parts.append("""
+---
+
+## 2. Experimental Procedure
+
+""")
+
+    if isinstance(scenario_data.get('steps'), list):
+        for i, step in enumerate(scenario_data['steps'], 1):
+            title = step.get('title', f'Step {i}')
+            description = step.get('description', '')
+            parts.append(f"### Step {i}: {title}\n{description}\n\n")
+
+    parts.append("""
+---
+
+## 3. Conversation Log & Observations
+
+This section contains the complete dialogue between the student and AI lab partners.
+
+""")
+    return "".join(parts)
+
+
+def _render_page_sections(scenario_data: Dict[str, Any]) -> str:
+    """Render the overview, objectives, materials and procedure of the experiment page"""
+    parts = [f"""## Overview
+{scenario_data.get('description', 'Experiment in progress')}
+
+### Learning Objectives
+"""]
+
+    if isinstance(scenario_data.get('learning_objectives'), list):
+        parts.extend(f"- {obj}\n" for obj in scenario_data['learning_objectives'])
+
+    parts.append("""
+## Materials
+""")
+
+    if isinstance(scenario_data.get('materials'), list):
+        parts.extend(f"- {material}\n" for material in scenario_data['materials'])
+
+    parts.append("""
+## Procedure
+
+""")
+
+    if isinstance(scenario_data.get('steps'), list):
+        for step in scenario_data['steps']:
+            step_num = step.get('step_number', '?')
+            title = step.get('title', 'Step')
+            instructions = step.get('instructions', '')
+            parts.append(f"### Step {step_num}: {title}\n{instructions}\n\n")
+
+    return "".join(parts)
+
+
+def write_chunks(path: Path, chunks: Iterable[str], preview_chars: int = 300) -> str:
+    """
+    Stream markdown chunks to a file.
+
+    Args:
+        path: Output file
+        chunks: Rendered chunks
+        preview_chars: Number of leading characters to keep as a preview
+
+    Returns:
+        The first preview_chars characters of the document
+    """
+    preview = []
+    preview_len = 0
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(chunk)
+            if preview_len < preview_chars:
+                preview.append(chunk[:preview_chars - preview_len])
+                preview_len += len(preview[-1])
+
+    return "".join(preview)
+
+
+class ReportTemplateCache:
+    """
+    Compiled report templates per experiment.
+
+    Templates are compiled on first use and dropped whenever the scenario
+    registry reports a change to that experiment.
+    """
+
+    def __init__(self):
+        self._templates: Dict[str, ReportTemplate] = {}
+        self.compilations = 0
+
+    def get(self, experiment_id: str, scenario: ExperimentScenario) -> ReportTemplate:
+        """Get the compiled template for an experiment, compiling it if needed"""
+        template = self._templates.get(experiment_id)
+        if template is None:
+            template = compile_report_template(scenario_report_data(scenario))
+            self._templates[experiment_id] = template
+            self.compilations += 1
+        return template
+
+    def invalidate(self, experiment_id: Optional[str] = None, scenario: Optional[ExperimentScenario] = None) -> None:
+        """Drop one compiled template (or all of them)"""
+        if experiment_id is None:
+            self._templates.clear()
+        else:
+            self._templates.pop(experiment_id, None)
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+
+# Global report template cache, kept in sync with the scenario registry
+report_templates = ReportTemplateCache()
+on_scenario_change(report_templates.invalidate)
@@ -0,0 +1,5 @@
+"""Background jobs module"""
+
+from src.jobs.queue import Job, JobQueue, PermanentJobError
+
+__all__ = ["Job", "JobQueue", "PermanentJobError"]
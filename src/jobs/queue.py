@@ -0,0 +1,343 @@
+"""In-process async job queue with persisted job state"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Awaitable, Callable, List, Optional
+from uuid import uuid4
+from src.utils.file_io import atomic_writer, file_io
+import asyncio
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler to fail its job without further attempts"""
+
+
+@dataclass
+class Job:
+    """Background job and its persisted state"""
+    job_id: str
+    kind: str
+    payload: Dict[str, Any]
+    status: str = JOB_QUEUED
+    attempts: int = 0
+    max_attempts: int = 3
+    progress: float = 0.0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_SUCCEEDED, JOB_FAILED)
+
+    def to_dict(self, include_payload: bool = False) -> Dict[str, Any]:
+        """Job state for the status endpoint"""
+        data = asdict(self)
+        if not include_payload:
+            data.pop("payload")
+        return data
+
+
+JobHandler = Callable[[Job], Awaitable[Dict[str, Any]]]
+
+
+class JobQueue:
+    """
+    In-process async job queue with a worker pool.
+
+    - Jobs are dispatched by kind to registered async handlers
+    - Every state change is persisted as JSON (on the file I/O pool), so
+      unfinished jobs are re-queued when the workers (re)start; the payload
+      is kept in a side file written on submit and checkpoint only, so
+      progress updates do not rewrite it
+    - Finished jobs move to state_dir/finished (without their payload);
+      recovery only reads unfinished ones, and finished job files are
+      deleted once older than retention_seconds
+    - Failed jobs are retried with exponential backoff up to max_attempts,
+      unless the handler raises PermanentJobError (e.g. when the call
+      that failed already did its own retrying)
+
+    Workers are bound to the running event loop and are started lazily,
+    so the queue also works when no startup event is fired.
+    """
+
+    def __init__(self,
+                 state_dir: str,
+                 workers: int = 2,
+                 max_attempts: int = 3,
+                 retry_backoff_seconds: float = 2.0,
+                 max_jobs_in_memory: int = 1000,
+                 retention_seconds: float = 3 * 24 * 3600):
+        self.state_dir = Path(state_dir)
+        self.finished_dir = self.state_dir / "finished"
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.max_jobs_in_memory = max_jobs_in_memory
+        self.retention_seconds = retention_seconds
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._recovery_task: Optional[asyncio.Task] = None
+        self._persist_locks: Dict[str, asyncio.Lock] = {}
+        self._last_prune = 0.0
+
+    @property
+    def jobs(self) -> Dict[str, Job]:
+        """Jobs currently held in memory"""
+        return self._jobs
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """Register the async handler for a job kind"""
+        self._handlers[kind] = handler
+
+    async def submit(self, kind: str, payload: Dict[str, Any]) -> Job:
+        """
+        Queue a new job.
+
+        Args:
+            kind: Registered job kind
+            payload: JSON-serializable job input
+
+        Returns:
+            The queued job
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        self.ensure_started()
+
+        job = Job(job_id=str(uuid4()), kind=kind, payload=payload, max_attempts=self.max_attempts)
+        self._remember(job)
+        await self._persist(job)
+        self._queue.put_nowait(job.job_id)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Get a job from memory, falling back to its persisted state"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        return await file_io.run(self._load, job_id)
+
+    async def update_progress(self, job: Job, progress: float) -> None:
+        """Record handler progress (0.0 - 1.0)"""
+        job.progress = round(min(max(progress, 0.0), 1.0), 4)
+        await self._persist(job, with_payload=False)
+
+    async def checkpoint(self, job: Job) -> None:
+        """Persist payload changes so retries can resume from them"""
+        await self._persist(job)
+
+    def ensure_started(self) -> None:
+        """
+        Start workers on the running event loop; unfinished jobs are
+        recovered (and expired job files pruned) in the background.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker_tasks:
+            return
+
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [
+            loop.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        # Jobs in memory were left by workers on a previous loop
+        for job in self._jobs.values():
+            if not job.finished:
+                job.status = JOB_QUEUED
+                self._queue.put_nowait(job.job_id)
+        self._recovery_task = loop.create_task(self._recover())
+
+    async def shutdown(self) -> None:
+        """Stop the workers (unfinished jobs stay persisted)"""
+        tasks = self._worker_tasks + ([self._recovery_task] if self._recovery_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._recovery_task = None
+        self._loop = None
+
+    async def _worker(self, worker_id: int) -> None:
+        """Process queued jobs until cancelled"""
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = await self.get(job_id)
+                if job is not None and job.status == JOB_QUEUED:
+                    await self._run(job)
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} failed on {job_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        """Run one attempt of a job and schedule a retry on failure"""
+        job.status = JOB_RUNNING
+        job.attempts += 1
+        await self._persist(job, with_payload=False)
+
+        try:
+            job.result = await self._handlers[job.kind](job)
+            job.status = JOB_SUCCEEDED
+            job.progress = 1.0
+            job.error = None
+            job.payload = {}  # Not persisted for finished jobs either
+            await self._persist(job)
+            await self._prune_if_due()
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.error = str(e)
+            logger.warning(f"Job {job.job_id} ({job.kind}) attempt {job.attempts} failed: {str(e)}")
+            retryable = not isinstance(e, PermanentJobError)
+
+        if not retryable or job.attempts >= job.max_attempts:
+            job.status = JOB_FAILED
+            job.payload = {}
+            await self._persist(job)
+            await self._prune_if_due()
+            return
+
+        job.status = JOB_QUEUED
+        await self._persist(job, with_payload=False)
+
+        delay = self.retry_backoff_seconds * (2 ** (job.attempts - 1))
+        self._loop.call_later(delay, self._queue.put_nowait, job.job_id)
+
+    async def _recover(self) -> None:
+        """Re-queue persisted unfinished jobs not in memory and prune expired job files"""
+        self._last_prune = time.monotonic()
+        for data in await file_io.run(self._scan):
+            if data["job_id"] in self._jobs:
+                continue
+            try:
+                job = Job(**data)
+            except TypeError:
+                continue
+            if not job.finished and job.kind in self._handlers:
+                job.status = JOB_QUEUED
+                self._remember(job)
+                self._queue.put_nowait(job.job_id)
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        """Read persisted unfinished jobs and delete expired finished ones"""
+        self._prune_finished()
+        found = []
+        if self.state_dir.exists():
+            for path in self.state_dir.glob("*.json"):
+                data = self._read_json(path)
+                if isinstance(data, dict) and "job_id" in data:
+                    data.setdefault("payload", self._read_json(self._payload_path(data["job_id"])) or {})
+                    found.append(data)
+        return found
+
+    def _prune_finished(self) -> int:
+        """Delete finished job files older than the retention period (by mtime, without reading them)"""
+        if not self.finished_dir.exists():
+            return 0
+        cutoff = time.time() - self.retention_seconds
+        removed = 0
+        for path in self.finished_dir.glob("*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    async def _prune_if_due(self) -> None:
+        """Prune expired finished job files at most once per hour"""
+        if time.monotonic() - self._last_prune >= 3600:
+            self._last_prune = time.monotonic()
+            await file_io.run(self._prune_finished)
+
+    def _remember(self, job: Job) -> None:
+        """Keep a job in memory, forgetting the oldest finished ones"""
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.max_jobs_in_memory:
+            oldest_id = next(
+                (job_id for job_id, j in self._jobs.items() if j.finished),
+                None
+            )
+            if oldest_id is None:
+                break
+            del self._jobs[oldest_id]
+
+    async def _persist(self, job: Job, with_payload: bool = True) -> None:
+        """
+        Atomically write job state to disk on the file I/O pool (in order
+        per job), and the payload side file unless with_payload is False.
+        """
+        job.updated_at = datetime.now().isoformat()
+        finished = job.finished
+        data = job.to_dict()
+        payload = job.payload if with_payload and not finished else None
+
+        lock = self._persist_locks.setdefault(job.job_id, asyncio.Lock())
+        async with lock:
+            await file_io.run(self._write_state, job.job_id, data, payload, finished)
+        if finished:
+            self._persist_locks.pop(job.job_id, None)
+
+    def _payload_path(self, job_id: str) -> Path:
+        return self.state_dir / f"{job_id}.payload"
+
+    def _write_state(self,
+                     job_id: str,
+                     data: Dict[str, Any],
+                     payload: Optional[Dict[str, Any]],
+                     finished: bool) -> None:
+        """Write job state (and payload); finished jobs move to finished_dir"""
+        if payload is not None:
+            with atomic_writer(self._payload_path(job_id)) as f:
+                json.dump(payload, f, ensure_ascii=False)
+        path = (self.finished_dir if finished else self.state_dir) / f"{job_id}.json"
+        with atomic_writer(path) as f:
+            json.dump(data, f, ensure_ascii=False)
+        if finished:
+            (self.state_dir / f"{job_id}.json").unlink(missing_ok=True)
+            self._payload_path(job_id).unlink(missing_ok=True)
+
+    @staticmethod
+    def _read_json(path: Path) -> Any:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        """Read a persisted job (unfinished or finished)"""
+        data = self._read_json(self.state_dir / f"{job_id}.json")
+        if isinstance(data, dict):
+            data.setdefault("payload", self._read_json(self._payload_path(job_id)) or {})
+        else:
+            data = self._read_json(self.finished_dir / f"{job_id}.json")
+            if not isinstance(data, dict):
+                return None
+            data.setdefault("payload", {})
+        try:
+            return Job(**data)
+        except TypeError:
+            return None
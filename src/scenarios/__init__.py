@@ -7,10 +7,24 @@ from src.scenarios.scenarios import (
     TITRATION_SCENARIO,
     HOOKES_LAW_SCENARIO,
     OSMOSIS_SCENARIO,
+    BUILTIN_SCENARIOS,
     SCENARIOS,
+    ScenarioRegistry,
     get_scenario,
-    list_scenarios
+    list_scenarios,
+    register_scenario,
+    register_scenario_loader,
+    unregister_scenario,
+    on_scenario_change
 )
+from src.scenarios.compiled import (
+    CompiledScenario,
+    CompiledStep,
+    compile_scenario,
+    get_compiled_scenario
+)
+from src.scenarios.loader import ScenarioCatalog, ScenarioLoadError, parse_scenario
+from src.scenarios.search import ScenarioSearchIndex
 
 __all__ = [
     "ExperimentScenario",
@@ -19,7 +33,21 @@ __all__ = [
     "TITRATION_SCENARIO",
     "HOOKES_LAW_SCENARIO",
     "OSMOSIS_SCENARIO",
+    "BUILTIN_SCENARIOS",
     "SCENARIOS",
+    "ScenarioRegistry",
     "get_scenario",
-    "list_scenarios"
+    "list_scenarios",
+    "register_scenario",
+    "register_scenario_loader",
+    "unregister_scenario",
+    "on_scenario_change",
+    "CompiledScenario",
+    "CompiledStep",
+    "compile_scenario",
+    "get_compiled_scenario",
+    "ScenarioCatalog",
+    "ScenarioLoadError",
+    "parse_scenario",
+    "ScenarioSearchIndex"
 ]
@@ -0,0 +1,120 @@
+"""Immutable, pre-indexed form of experiment scenarios used on the request path"""
+
+from dataclasses import asdict, dataclass
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+import hashlib
+import json
+from src.scenarios.scenarios import ExperimentScenario, ExperimentStep, SCENARIOS, on_scenario_change
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledStep:
+    """A step plus everything a turn at that step needs, computed once"""
+    step: ExperimentStep
+    step_number: int
+    progress: float  # Fraction of the experiment reached at this step
+    next_step: int  # Step the student moves on to after this turn
+    next_progress: float  # Percent complete after this turn
+    is_final: bool
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledScenario:
+    """
+    Read-only view of a scenario for per-turn work.
+
+    Steps are indexed by step number and carry their progress values, so
+    looking up a turn does no scanning and allocates nothing.
+    """
+    experiment_id: str  # Registry key
+    scenario: ExperimentScenario
+    title: str
+    step_count: int
+    steps: Tuple[CompiledStep, ...]
+    step_index: Mapping[int, CompiledStep]
+    first_step: CompiledStep
+    start_message: str  # Student's opening line for the partner
+    revision: str  # Hash of the scenario content (changes when its definition changes)
+
+    def turn(self, step_number: int) -> CompiledStep:
+        """
+        Compiled step for a turn at step_number.
+
+        Unknown step numbers fall back to the first step's content, with
+        progress computed from the requested number as before.
+        """
+        compiled = self.step_index.get(step_number)
+        if compiled is None:
+            compiled = _compile_step(self.first_step.step, step_number, self.step_count)
+        return compiled
+
+
+def _compile_step(step: ExperimentStep, step_number: int, step_count: int) -> CompiledStep:
+    next_step = min(step_number + 1, step_count)
+    return CompiledStep(
+        step=step,
+        step_number=step_number,
+        progress=step_number / step_count,
+        next_step=next_step,
+        next_progress=(next_step / step_count) * 100,
+        is_final=step_number == step_count
+    )
+
+
+def scenario_revision(scenario: ExperimentScenario) -> str:
+    """Hash of a scenario's content"""
+    raw = json.dumps(asdict(scenario), sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def compile_scenario(experiment_id: str, scenario: ExperimentScenario) -> CompiledScenario:
+    """
+    Build the compiled form of a scenario.
+
+    Args:
+        experiment_id: Registry key of the scenario
+        scenario: Scenario definition (must have at least one step)
+
+    Returns:
+        The compiled scenario
+    """
+    step_count = len(scenario.steps)
+    steps = tuple(_compile_step(step, step.step_number, step_count) for step in scenario.steps)
+    index = {}
+    for compiled in steps:
+        index.setdefault(compiled.step_number, compiled)  # First definition wins, as get_step()
+
+    return CompiledScenario(
+        experiment_id=experiment_id,
+        scenario=scenario,
+        title=scenario.title,
+        step_count=step_count,
+        steps=steps,
+        step_index=MappingProxyType(index),
+        first_step=steps[0],
+        start_message=f"I want to start the {scenario.title} experiment",
+        revision=scenario_revision(scenario)
+    )
+
+
+# Compiled scenarios by registry key, rebuilt when the registered scenario changes
+_compiled: Dict[str, CompiledScenario] = {}
+
+
+def get_compiled_scenario(experiment_id: str) -> Optional[CompiledScenario]:
+    """Get the compiled form of a registered scenario (compiled on first use)"""
+    scenario = SCENARIOS.get(experiment_id)
+    if scenario is None:
+        return None
+    compiled = _compiled.get(experiment_id)
+    if compiled is None or compiled.scenario is not scenario:
+        compiled = _compiled[experiment_id] = compile_scenario(experiment_id, scenario)
+    return compiled
+
+
+def _drop_compiled(experiment_id: str, scenario: Optional[ExperimentScenario]) -> None:
+    _compiled.pop(experiment_id, None)
+
+
+on_scenario_change(_drop_compiled)
@@ -0,0 +1,383 @@
+"""File-based scenario definitions (YAML/JSON) with a compiled cache and hot reload"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from src.scenarios.scenarios import (
+    BUILTIN_SCENARIOS,
+    ExperimentLevel,
+    ExperimentScenario,
+    ExperimentStep,
+    register_scenario,
+    register_scenario_loader,
+    unregister_scenario
+)
+from src.scenarios.search import search_document
+from src.utils.file_io import atomic_write
+import asyncio
+import hashlib
+import json
+import logging
+import pickle
+import threading
+
+logger = logging.getLogger(__name__)
+
+SCENARIO_FILE_SUFFIXES = (".yaml", ".yml", ".json")
+
+# Bump when ExperimentScenario/ExperimentStep or the manifest entries change
+# shape; old cache entries are then ignored
+CACHE_VERSION = 2
+
+
+class ScenarioLoadError(ValueError):
+    """A scenario definition is missing, malformed or invalid"""
+
+
+def _require_text(data: Dict[str, Any], key: str, where: str) -> str:
+    value = data.get(key)
+    if not isinstance(value, str) or not value.strip():
+        raise ScenarioLoadError(f"{where}: '{key}' must be a non-empty string")
+    return value
+
+
+def _optional_text(data: Dict[str, Any], key: str, where: str, default: str = "") -> str:
+    value = data.get(key, default)
+    if not isinstance(value, str):
+        raise ScenarioLoadError(f"{where}: '{key}' must be a string")
+    return value
+
+
+def _text_list(data: Dict[str, Any], key: str, where: str, required: bool = True) -> List[str]:
+    value = data.get(key)
+    if value is None and not required:
+        return []
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ScenarioLoadError(f"{where}: '{key}' must be a list of strings")
+    return list(value)
+
+
+def parse_scenario(data: Any, default_id: str) -> ExperimentScenario:
+    """
+    Validate a scenario definition and build the scenario.
+
+    Args:
+        data: Parsed YAML/JSON document
+        default_id: Registry key used when the document has no "id"
+
+    Returns:
+        The scenario
+
+    Raises:
+        ScenarioLoadError: The definition is invalid
+    """
+    if not isinstance(data, dict):
+        raise ScenarioLoadError(f"{default_id}: definition must be a mapping")
+    where = str(data.get("id") or default_id)
+
+    level = data.get("level", ExperimentLevel.BEGINNER.value)
+    try:
+        level = ExperimentLevel(level)
+    except ValueError:
+        choices = ", ".join(choice.value for choice in ExperimentLevel)
+        raise ScenarioLoadError(f"{where}: 'level' must be one of {choices}")
+
+    duration = data.get("duration_minutes")
+    if not isinstance(duration, int) or isinstance(duration, bool) or duration <= 0:
+        raise ScenarioLoadError(f"{where}: 'duration_minutes' must be a positive integer")
+
+    computations = data.get("wolfram_computations") or {}
+    if not isinstance(computations, dict) or not all(
+        isinstance(k, str) and isinstance(v, str) for k, v in computations.items()
+    ):
+        raise ScenarioLoadError(f"{where}: 'wolfram_computations' must map names to queries")
+
+    raw_steps = data.get("steps")
+    if not isinstance(raw_steps, list) or not raw_steps:
+        raise ScenarioLoadError(f"{where}: 'steps' must be a non-empty list")
+
+    steps = []
+    for position, raw in enumerate(raw_steps, 1):
+        step_where = f"{where} step {position}"
+        if not isinstance(raw, dict):
+            raise ScenarioLoadError(f"{step_where}: must be a mapping")
+        step_number = raw.get("step_number", position)
+        if not isinstance(step_number, int) or isinstance(step_number, bool):
+            raise ScenarioLoadError(f"{step_where}: 'step_number' must be an integer")
+        steps.append(ExperimentStep(
+            step_number=step_number,
+            title=_require_text(raw, "title", step_where),
+            description=_optional_text(raw, "description", step_where),
+            instructions=_require_text(raw, "instructions", step_where),
+            expected_observation=_optional_text(raw, "expected_observation", step_where),
+            learning_objectives=_text_list(raw, "learning_objectives", step_where, required=False),
+            tips=_text_list(raw, "tips", step_where, required=False)
+        ))
+
+    numbers = [step.step_number for step in steps]
+    if len(set(numbers)) != len(numbers):
+        raise ScenarioLoadError(f"{where}: step numbers must be unique")
+
+    return ExperimentScenario(
+        experiment_id=_optional_text(data, "experiment_id", where, default=where) or where,
+        title=_require_text(data, "title", where),
+        description=_require_text(data, "description", where),
+        subject=_require_text(data, "subject", where),
+        level=level,
+        duration_minutes=duration,
+        learning_objectives=_text_list(data, "learning_objectives", where),
+        materials=_text_list(data, "materials", where),
+        steps=steps,
+        safety_notes=_text_list(data, "safety_notes", where, required=False),
+        wolfram_computations=computations
+    )
+
+
+def read_definition(path: Path) -> Any:
+    """Parse a YAML or JSON scenario file"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            if path.suffix == ".json":
+                return json.load(f)
+            import yaml
+            loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+            return yaml.load(f, Loader=loader)
+    except Exception as e:  # OSError, json.JSONDecodeError, yaml.YAMLError
+        raise ScenarioLoadError(f"{path.name}: {str(e)}")
+
+
+@dataclass
+class _SourceFile:
+    """A definition file the catalog has registered"""
+    experiment_id: str
+    mtime_ns: int
+    size: int
+    cache_file: str
+
+
+class ScenarioCatalog:
+    """
+    Scenarios defined as YAML/JSON files in a directory.
+
+    - One scenario per file; its registry key is the file's "id" (default:
+      the file name without suffix)
+    - Each valid definition is compiled once into a pickle under cache_dir;
+      a manifest records the source file's mtime and size, so a restart
+      only stats unchanged files instead of parsing them, and the
+      scenario's search_document(), so searching does not load the body
+    - Scenarios are registered with register_scenario_loader(): the body is
+      read from the cache the first time the scenario is used
+    - refresh() (polled by watch()) re-registers changed files and removes
+      scenarios whose file was deleted; an invalid edit keeps the previous
+      definition and is reported in errors
+    - A file may override a built-in scenario, which is restored when the
+      file is deleted; a file declaring an id another file already
+      defines is rejected (reported in errors) until that file goes away
+
+    Methods other than watch() block on disk I/O.
+    """
+
+    def __init__(self, scenarios_dir: str, cache_dir: str):
+        self.scenarios_dir = Path(scenarios_dir)
+        self.cache_dir = Path(cache_dir)
+        self.manifest_path = self.cache_dir / "manifest.json"
+        self.errors: Dict[str, str] = {}  # File name -> validation error
+        self.compilations = 0
+
+        self._sources: Dict[str, _SourceFile] = {}  # File name -> registered definition
+        self._owners: Dict[str, str] = {}  # Registry key -> file name defining it
+        self._duplicates: Dict[str, str] = {}  # File name -> registry key another file owns
+        self._rejected: Dict[str, tuple] = {}  # File name -> (mtime_ns, size) of an invalid version
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """
+        Synchronize the registry with the definition files.
+
+        Returns:
+            Registry keys that were added, updated and removed
+        """
+        with self._lock:
+            return self._refresh_locked()
+
+    async def watch(self, interval_seconds: float) -> None:
+        """Poll the directory for changes until cancelled (hot reload)"""
+        from src.utils.file_io import file_io
+
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                changes = await file_io.run(self.refresh)
+                if any(changes.values()):
+                    logger.info(f"Reloaded scenarios: {changes}")
+            except Exception as e:
+                logger.error(f"Scenario reload failed: {str(e)}")
+
+    def load(self, name: str) -> ExperimentScenario:
+        """
+        Body of a registered file's scenario, from the compiled cache (or the source).
+
+        Raises:
+            ScenarioLoadError: Neither is readable and valid any more (also recorded in errors)
+        """
+        source = self._sources.get(name)
+        if source is not None:
+            try:
+                with open(self.cache_dir / source.cache_file, "rb") as f:
+                    cached = pickle.load(f)
+                if cached.get("version") == CACHE_VERSION:
+                    return cached["scenario"]
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+                pass
+        try:
+            return parse_scenario(read_definition(self.scenarios_dir / name), Path(name).stem)
+        except ScenarioLoadError as e:
+            self.errors[name] = str(e)
+            raise
+
+    def search_document(self, experiment_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Search index entry recorded when a registered file's scenario was
+        compiled (None for scenarios not defined by a file). Reads without
+        the lock, so searches do not wait for a refresh in progress.
+        """
+        name = self._owners.get(experiment_id)
+        if name is None:
+            return None
+        entry = self._load_manifest()["files"].get(name)
+        return entry.get("search") if entry is not None else None
+
+    def _refresh_locked(self) -> Dict[str, List[str]]:
+        changes: Dict[str, List[str]] = {"added": [], "updated": [], "removed": []}
+        manifest = self._load_manifest()
+        files = manifest["files"]
+
+        present = {}
+        if self.scenarios_dir.is_dir():
+            for path in sorted(self.scenarios_dir.iterdir()):
+                if path.suffix in SCENARIO_FILE_SUFFIXES and path.is_file():
+                    present[path.name] = path.stat()
+
+        for name in [n for n in self._sources if n not in present]:
+            source = self._sources.pop(name)
+            self.errors.pop(name, None)
+            self._rejected.pop(name, None)
+            files.pop(name, None)
+            self._discard_cache(source.cache_file)
+            self._release(source.experiment_id, changes)
+        for name in [n for n in self.errors if n not in present]:
+            self.errors.pop(name)
+            self._rejected.pop(name, None)
+            self._duplicates.pop(name, None)
+
+        for name, stat in present.items():
+            registered = self._sources.get(name)
+            version = (stat.st_mtime_ns, stat.st_size)
+            if registered is not None and (registered.mtime_ns, registered.size) == version:
+                continue
+            if self._rejected.get(name) == version:
+                continue
+
+            entry = files.get(name)
+            cached = (
+                entry is not None
+                and entry.get("version") == CACHE_VERSION
+                and (entry["mtime_ns"], entry["size"]) == version
+                and (self.cache_dir / entry["cache_file"]).exists()
+            )
+            if cached:
+                experiment_id = entry["experiment_id"]
+                cache_file = entry["cache_file"]
+            else:
+                try:
+                    experiment_id, cache_file, document = self._compile(self.scenarios_dir / name)
+                except ScenarioLoadError as e:
+                    logger.error(f"Invalid scenario definition {name}: {str(e)}")
+                    self.errors[name] = str(e)
+                    self._rejected[name] = version
+                    continue
+                previous = files.get(name)
+                files[name] = {
+                    "version": CACHE_VERSION,
+                    "experiment_id": experiment_id,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "cache_file": cache_file,
+                    "search": document
+                }
+                if previous is not None and previous.get("cache_file") != cache_file:
+                    self._discard_cache(previous["cache_file"])
+
+            owner = self._owners.get(experiment_id, name)
+            if owner != name:
+                message = f"{name}: duplicate id '{experiment_id}' (already defined by {owner})"
+                logger.error(f"Invalid scenario definition {message}")
+                self.errors[name] = message
+                self._rejected[name] = version
+                self._duplicates[name] = experiment_id
+                continue
+
+            self.errors.pop(name, None)
+            self._rejected.pop(name, None)
+            self._duplicates.pop(name, None)
+            if registered is not None and registered.experiment_id != experiment_id:
+                self._release(registered.experiment_id, changes)
+            self._owners[experiment_id] = name
+            self._sources[name] = _SourceFile(experiment_id, stat.st_mtime_ns, stat.st_size, cache_file)
+            register_scenario_loader(experiment_id, lambda name=name: self.load(name))
+            changes["updated" if registered is not None else "added"].append(experiment_id)
+
+        if any(changes.values()) or not self.manifest_path.exists():
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            atomic_write(self.manifest_path, json.dumps(manifest, indent=2))
+        return changes
+
+    def _release(self, experiment_id: str, changes: Dict[str, List[str]]) -> None:
+        """
+        Drop a file's registry key: restore the built-in scenario it
+        overrode (or unregister it), and let files rejected as duplicates
+        of it register on the next refresh.
+        """
+        self._owners.pop(experiment_id, None)
+        builtin = BUILTIN_SCENARIOS.get(experiment_id)
+        if builtin is not None:
+            register_scenario(experiment_id, builtin)
+            changes["updated"].append(experiment_id)
+        else:
+            unregister_scenario(experiment_id)
+            changes["removed"].append(experiment_id)
+        for name in [n for n, key in self._duplicates.items() if key == experiment_id]:
+            del self._duplicates[name]
+            self._rejected.pop(name, None)
+
+    def _compile(self, path: Path) -> tuple:
+        """Parse and validate a definition, write its compiled form and build its search document"""
+        data = read_definition(path)
+        scenario = parse_scenario(data, path.stem)
+        experiment_id = str(data.get("id") or path.stem)
+
+        payload = pickle.dumps({"version": CACHE_VERSION, "scenario": scenario}, protocol=pickle.HIGHEST_PROTOCOL)
+        cache_file = f"{hashlib.sha256(payload).hexdigest()[:32]}.pickle"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        atomic_write(self.cache_dir / cache_file, payload)
+        self.compilations += 1
+        return experiment_id, cache_file, search_document(scenario)
+
+    def _discard_cache(self, cache_file: str) -> None:
+        """Delete a compiled file no manifest entry references any more"""
+        files = self._load_manifest()["files"]
+        if not any(entry.get("cache_file") == cache_file for entry in files.values()):
+            (self.cache_dir / cache_file).unlink(missing_ok=True)
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Load the manifest of compiled files (once)"""
+        if self._manifest is None:
+            self._manifest = {"files": {}}
+            if self.manifest_path.exists():
+                try:
+                    with open(self.manifest_path, encoding="utf-8") as f:
+                        self._manifest = json.load(f)
+                except (OSError, ValueError):
+                    pass
+        return self._manifest
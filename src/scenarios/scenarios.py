@@ -1,8 +1,13 @@
 """Experiment scenario definitions"""
 
+from collections.abc import MutableMapping
 from dataclasses import dataclass, field
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Callable, Optional, Union
 from enum import Enum
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
 
 
 class ExperimentLevel(str, Enum):
@@ -266,19 +271,119 @@ OSMOSIS_SCENARIO = ExperimentScenario(
 )
 
 
-# Scenario registry
-SCENARIOS = {
+ScenarioLoader = Callable[[], ExperimentScenario]
+
+
+class ScenarioRegistry(MutableMapping):
+    """
+    Scenario registry whose entries may be loaded on first access.
+
+    Entries are either scenarios or loaders (see register_scenario_loader);
+    a loader runs the first time its entry is read and is then replaced by
+    the scenario it returned. Membership tests, len() and iterating keys
+    never load anything.
+
+    A loader that fails (e.g. its file was deleted or broken after it was
+    registered) is logged and the entry reads as missing (KeyError, so
+    get() returns None); it is retried on the next access.
+    """
+
+    def __init__(self, scenarios: Optional[Dict[str, ExperimentScenario]] = None):
+        self._entries: Dict[str, Union[ExperimentScenario, ScenarioLoader]] = dict(scenarios or {})
+        self._lock = threading.Lock()
+
+    def set_loader(self, experiment_id: str, loader: ScenarioLoader) -> None:
+        """Register a scenario to be loaded on first access"""
+        self._entries[experiment_id] = loader
+
+    def is_loaded(self, experiment_id: str) -> bool:
+        """Whether an entry's scenario is in memory"""
+        return isinstance(self._entries.get(experiment_id), ExperimentScenario)
+
+    def __getitem__(self, experiment_id: str) -> ExperimentScenario:
+        entry = self._entries[experiment_id]
+        if isinstance(entry, ExperimentScenario):
+            return entry
+        with self._lock:
+            current = self._entries[experiment_id]  # May have been replaced or removed meanwhile
+            if isinstance(current, ExperimentScenario):
+                return current
+            try:
+                scenario = current()
+            except Exception as e:
+                logger.error(f"Could not load scenario {experiment_id}: {str(e)}")
+                raise KeyError(experiment_id) from e
+            if self._entries.get(experiment_id) is current:  # Not replaced while loading
+                self._entries[experiment_id] = scenario
+            return scenario
+
+    def __setitem__(self, experiment_id: str, scenario: ExperimentScenario) -> None:
+        self._entries[experiment_id] = scenario
+
+    def __delitem__(self, experiment_id: str) -> None:
+        del self._entries[experiment_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, experiment_id: object) -> bool:
+        return experiment_id in self._entries
+
+    def pop(self, experiment_id: str, *default: Any) -> Any:
+        """Remove an entry without loading it (returns the scenario or loader)"""
+        return self._entries.pop(experiment_id, *default)
+
+
+# Scenarios shipped with the code (file-based definitions may override them)
+BUILTIN_SCENARIOS: Dict[str, ExperimentScenario] = {
     "acid_base_titration": TITRATION_SCENARIO,
     "hookes_law": HOOKES_LAW_SCENARIO,
     "osmosis": OSMOSIS_SCENARIO
 }
 
+# Scenario registry
+SCENARIOS = ScenarioRegistry(BUILTIN_SCENARIOS)
+
 
 def get_scenario(experiment_id: str) -> ExperimentScenario:
     """Get experiment scenario by ID"""
     return SCENARIOS.get(experiment_id)
 
 
-def list_scenarios() -> Dict[str, ExperimentScenario]:
-    """List all available scenarios"""
+def list_scenarios() -> ScenarioRegistry:
+    """List all available scenarios (reading an entry loads it)"""
     return SCENARIOS
+
+
+# Listeners called with (experiment_id, new scenario or None) on registry changes;
+# None also signals a replacement that has not been loaded yet
+_scenario_listeners: List[Callable[[str, Optional[ExperimentScenario]], None]] = []
+
+
+def on_scenario_change(listener: Callable[[str, Optional[ExperimentScenario]], None]) -> None:
+    """Subscribe to scenario additions, replacements and removals"""
+    _scenario_listeners.append(listener)
+
+
+def register_scenario(experiment_id: str, scenario: ExperimentScenario) -> None:
+    """Add or replace a scenario and notify listeners"""
+    SCENARIOS[experiment_id] = scenario
+    for listener in _scenario_listeners:
+        listener(experiment_id, scenario)
+
+
+def register_scenario_loader(experiment_id: str, loader: ScenarioLoader) -> None:
+    """Add or replace a scenario that is loaded on first access and notify listeners"""
+    SCENARIOS.set_loader(experiment_id, loader)
+    for listener in _scenario_listeners:
+        listener(experiment_id, None)
+
+
+def unregister_scenario(experiment_id: str) -> None:
+    """Remove a scenario and notify listeners"""
+    if SCENARIOS.pop(experiment_id, None) is not None:
+        for listener in _scenario_listeners:
+            listener(experiment_id, None)
@@ -0,0 +1,266 @@
+"""In-memory full-text search over the experiment catalog"""
+
+from bisect import bisect_left, insort
+from typing import Dict, Any, Callable, List, Mapping, Optional, Set, Tuple
+from src.scenarios.scenarios import ExperimentScenario
+import logging
+import math
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Relative weight of a term by the part of the scenario it appears in
+FIELD_WEIGHTS = {
+    "title": 5.0,
+    "learning_objectives": 2.0,
+    "materials": 2.0,
+    "description": 1.5,
+    "steps": 1.0
+}
+
+PREFIX_MATCH_FACTOR = 0.6  # Score of a prefix match relative to an exact term match
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a text"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _facet_value(value: Any) -> str:
+    return str(getattr(value, "value", value))
+
+
+def scenario_fields(scenario: ExperimentScenario) -> Dict[str, str]:
+    """Searchable text of a scenario by field"""
+    return {
+        "title": scenario.title,
+        "learning_objectives": " ".join(scenario.learning_objectives),
+        "materials": " ".join(scenario.materials),
+        "description": scenario.description,
+        "steps": " ".join(
+            " ".join((step.title, step.description, step.instructions, *step.learning_objectives))
+            for step in scenario.steps
+        )
+    }
+
+
+def search_document(scenario: ExperimentScenario) -> Dict[str, Any]:
+    """
+    Index entry of a scenario: weighted terms plus result fields and facets.
+
+    JSON-serializable, so the scenario catalog can store it with a compiled
+    definition and the index never has to load that scenario's body.
+    """
+    terms: Dict[str, float] = {}
+    for field, text in scenario_fields(scenario).items():
+        for term in tokenize(text):
+            terms[term] = terms.get(term, 0.0) + FIELD_WEIGHTS[field]
+    return {
+        "terms": terms,
+        "fields": {
+            "title": scenario.title,
+            "subject": _facet_value(scenario.subject),
+            "level": _facet_value(scenario.level),
+            "duration_minutes": scenario.duration_minutes
+        }
+    }
+
+
+class ScenarioSearchIndex:
+    """
+    Inverted index over scenario titles, descriptions, objectives,
+    materials and steps.
+
+    - Postings map each term to the weighted term frequency per scenario;
+      a sorted term list serves prefix lookups with bisect
+    - Every query word must match (exactly, or as a prefix of a term);
+      results are ranked by field weight x tf x idf
+    - Scenarios are indexed on the first search after they are added or
+      changed (see invalidate()), so only changed scenarios are re-indexed
+    - Lazily loaded scenarios are indexed from their precomputed
+      search_document() when the documents callable has one (the scenario
+      catalog records it when a file is compiled), so searching does not
+      load their bodies; other lazy scenarios load when first searched,
+      and one that fails to load is left out until it changes again
+
+    search() may load scenario files; async callers run it on the file
+    I/O pool.
+    """
+
+    def __init__(self,
+                 scenarios: Callable[[], Mapping[str, ExperimentScenario]],
+                 documents: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None):
+        """
+        Args:
+            scenarios: Callable returning the scenario registry (id -> scenario)
+            documents: Callable returning a scenario's precomputed
+                search_document(), or None to index the scenario itself
+        """
+        self.scenarios = scenarios
+        self.documents = documents
+        self.indexed = 0  # Scenarios (re)indexed so far
+
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._terms: List[str] = []  # Sorted keys of _postings
+        self._doc_terms: Dict[str, Set[str]] = {}
+        self._docs: Dict[str, Dict[str, Any]] = {}  # id -> result fields and facets
+        self._stale: Optional[Set[str]] = None  # None: everything needs a sync
+        self._lock = threading.RLock()
+
+    def invalidate(self, experiment_id: Optional[str] = None, scenario: Any = None) -> None:
+        """
+        Mark a scenario for re-indexing (all of them when experiment_id is
+        None). Matches the on_scenario_change listener signature.
+        """
+        with self._lock:
+            if experiment_id is None or self._stale is None:
+                self._stale = None
+            else:
+                self._stale.add(experiment_id)
+
+    def add(self, experiment_id: str, scenario: ExperimentScenario) -> None:
+        """Index (or re-index) one scenario"""
+        self.add_document(experiment_id, search_document(scenario))
+
+    def add_document(self, experiment_id: str, document: Dict[str, Any]) -> None:
+        """Index (or re-index) one scenario from its search_document()"""
+        terms = document["terms"]
+        with self._lock:
+            self._remove_locked(experiment_id)
+            for term, weight in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    insort(self._terms, term)
+                postings[experiment_id] = weight
+            self._doc_terms[experiment_id] = set(terms)
+            self._docs[experiment_id] = {"id": experiment_id, **document["fields"]}
+            self.indexed += 1
+
+    def remove(self, experiment_id: str) -> None:
+        """Drop a scenario from the index"""
+        with self._lock:
+            self._remove_locked(experiment_id)
+
+    def search(self,
+               query: str = "",
+               subject: Optional[str] = None,
+               level: Optional[str] = None,
+               offset: int = 0,
+               limit: int = 20) -> Dict[str, Any]:
+        """
+        Search the catalog.
+
+        Args:
+            query: Words to match (all must match; each may be a prefix)
+            subject: Only scenarios of this subject
+            level: Only scenarios of this level
+            offset: Number of ranked results to skip
+            limit: Page size
+
+        Returns:
+            Total match count, one page of ranked results and facet counts
+            (of the query matches, before the subject/level filters)
+        """
+        self.sync()
+        with self._lock:
+            scores = self._score(tokenize(query)) if query.strip() else {doc_id: 0.0 for doc_id in self._docs}
+
+            facets: Dict[str, Dict[str, int]] = {"subject": {}, "level": {}}
+            matches: List[Tuple[float, str, str]] = []
+            for doc_id, score in scores.items():
+                doc = self._docs[doc_id]
+                for facet in facets:
+                    facets[facet][doc[facet]] = facets[facet].get(doc[facet], 0) + 1
+                if subject is not None and doc["subject"] != subject:
+                    continue
+                if level is not None and doc["level"] != level:
+                    continue
+                matches.append((-score, doc["title"].lower(), doc_id))
+
+            matches.sort()
+            page = [
+                {**self._docs[doc_id], "score": round(-neg_score, 4)}
+                for neg_score, _, doc_id in matches[offset:offset + limit]
+            ]
+
+        return {
+            "query": query,
+            "total": len(matches),
+            "offset": offset,
+            "limit": limit,
+            "results": page,
+            "facets": facets
+        }
+
+    def sync(self) -> int:
+        """
+        Index added or changed scenarios and drop removed ones.
+
+        Returns:
+            Number of scenarios (re)indexed
+        """
+        registry = self.scenarios()
+        with self._lock:
+            stale, self._stale = self._stale, set()
+            if stale is None:
+                stale = set(registry) | set(self._docs)
+
+        indexed = 0
+        for experiment_id in stale:
+            document = None
+            if experiment_id in registry and self.documents is not None:
+                document = self.documents(experiment_id)
+            if document is None:
+                try:
+                    scenario = registry.get(experiment_id)
+                except Exception as e:  # Loader errors (e.g. a deleted or corrupt definition file)
+                    logger.error(f"Could not index scenario {experiment_id}: {str(e)}")
+                    scenario = None
+                if scenario is None:
+                    self.remove(experiment_id)
+                    continue
+                document = search_document(scenario)
+            self.add_document(experiment_id, document)
+            indexed += 1
+        return indexed
+
+    def _score(self, query_terms: List[str]) -> Dict[str, float]:
+        """Scores of the scenarios matching every query term"""
+        doc_count = max(len(self._docs), 1)
+        scores: Optional[Dict[str, float]] = None
+
+        for query_term in dict.fromkeys(query_terms):
+            term_scores: Dict[str, float] = {}
+            start = bisect_left(self._terms, query_term)
+            for term in self._terms[start:]:
+                if not term.startswith(query_term):
+                    break
+                postings = self._postings[term]
+                idf = math.log(1 + doc_count / len(postings))
+                factor = 1.0 if term == query_term else PREFIX_MATCH_FACTOR
+                for doc_id, weight in postings.items():
+                    term_scores[doc_id] = max(term_scores.get(doc_id, 0.0), weight * idf * factor)
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc_id: s + term_scores[doc_id] for doc_id, s in scores.items() if doc_id in term_scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def _remove_locked(self, experiment_id: str) -> None:
+        for term in self._doc_terms.pop(experiment_id, ()):
+            postings = self._postings[term]
+            postings.pop(experiment_id, None)
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+        self._docs.pop(experiment_id, None)
+
+    def __len__(self) -> int:
+        return len(self._docs)
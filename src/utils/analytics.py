@@ -0,0 +1,294 @@
+"""Append-only, date-partitioned analytics dataset of session activity"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Optional: no cross-process locking (e.g. Windows)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Column order of each table (also the CSV header)
+ANALYTICS_TABLES: Dict[str, List[str]] = {
+    "turns": [
+        "session_id", "experiment_id", "student_name", "role", "sender", "step",
+        "timestamp", "latency_ms", "content_chars", "content"
+    ],
+    "observations": [
+        "session_id", "experiment_id", "student_name", "key", "value", "timestamp"
+    ],
+    "wolfram_results": [
+        "session_id", "experiment_id", "student_name", "query", "result",
+        "numeric_result", "timestamp", "latency_ms"
+    ]
+}
+
+# Types of the non-string columns (CSV reads every value back as a string)
+ANALYTICS_COLUMN_TYPES: Dict[str, type] = {
+    "step": int,
+    "latency_ms": float,
+    "content_chars": int,
+    "numeric_result": float
+}
+
+ANALYTICS_FORMATS = ("ndjson", "csv")
+
+COMPACTED_NAME = "part-compacted.parquet"
+
+
+def coerce_row(table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Row with the table's columns converted to their types (empty CSV
+    cells and unparsable numbers become None, other values strings).
+    """
+    coerced = {}
+    for column in ANALYTICS_TABLES[table]:
+        value = row.get(column)
+        if value is None or value == "":
+            coerced[column] = None
+            continue
+        kind = ANALYTICS_COLUMN_TYPES.get(column, str)
+        try:
+            coerced[column] = int(float(value)) if kind is int else kind(value)
+        except (TypeError, ValueError):
+            coerced[column] = None
+    return coerced
+
+
+class AnalyticsSink:
+    """
+    Collects turns, observations and Wolfram results from all sessions into
+    a dataset laid out for analysis tools:
+
+        <root>/<table>/date=YYYY-MM-DD/part-<pid>.ndjson (or .csv)
+
+    - Rows are buffered in memory and appended to the partition of the day
+      they happened in; files are only ever appended to
+    - Each process writes its own part file, so several server workers can
+      share one dataset
+    - Closed partitions (earlier days) can be compacted to Parquet when
+      pyarrow is installed (see compact())
+
+    Appends lock the part file (flock) and reopen it if a compactor moved
+    it away meanwhile, so no row is written to a file already compacted.
+    """
+
+    def __init__(self, root: str, file_format: str = "ndjson", flush_rows: int = 500):
+        if file_format not in ANALYTICS_FORMATS:
+            raise ValueError(f"Unsupported analytics format: {file_format}")
+        self.root = Path(root)
+        self.file_format = file_format
+        self.flush_rows = flush_rows
+        self.rows_written = 0
+
+        self._buffer: List[tuple] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def append(self, table: str, row: Dict[str, Any]) -> None:
+        """
+        Buffer a row (timestamp must be an ISO datetime string).
+
+        A flush is scheduled on the running event loop once flush_rows rows
+        are buffered (or done inline when there is no loop).
+        """
+        with self._lock:
+            self._buffer.append((table, row))
+            full = len(self._buffer) >= self.flush_rows
+
+        if not full:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_sync()
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self.flush())
+
+    async def flush(self) -> int:
+        """Append buffered rows to their partitions on the file I/O pool"""
+        from src.utils.file_io import file_io
+        return await file_io.run(self.flush_sync)
+
+    def flush_sync(self) -> int:
+        """
+        Append buffered rows to their partitions (blocking).
+
+        Returns:
+            Number of rows written
+        """
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+
+        batches: Dict[tuple, List[Dict[str, Any]]] = {}
+        for table, row in rows:
+            batches.setdefault((table, self._part_path(table, row["timestamp"])), []).append(row)
+
+        with self._write_lock:
+            for (table, path), batch in batches.items():
+                self._append_batch(path, table, batch)
+
+        self.rows_written += len(rows)
+        return len(rows)
+
+    def compact(self, before: Optional[str] = None) -> Dict[str, int]:
+        """
+        Convert closed partitions to one Parquet file each (needs pyarrow).
+
+        Part files are first renamed aside (late appends then go to a new
+        part file, which the next run picks up) and folded together with
+        the partition's existing Parquet file, which is replaced
+        atomically. Compactors exclude each other with a lock on
+        root/.compact.lock.
+
+        Args:
+            before: Only partitions dated before this day (YYYY-MM-DD, default today)
+
+        Returns:
+            Counters of converted partitions and rows
+        """
+        stats = {"partitions": 0, "rows": 0, "skipped": 0}
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            logger.info("pyarrow not installed; analytics partitions stay as %s", self.file_format)
+            stats["skipped"] = len(list(self.root.glob("*/date=*")))
+            return stats
+
+        before = before or datetime.now().strftime("%Y-%m-%d")
+        arrow_types = {int: pa.int64(), float: pa.float64()}
+        with self._compact_lock():
+            for table, columns in ANALYTICS_TABLES.items():
+                schema = pa.schema([
+                    (column, arrow_types.get(ANALYTICS_COLUMN_TYPES.get(column), pa.string()))
+                    for column in columns
+                ])
+                for partition in sorted((self.root / table).glob("date=*")):
+                    if partition.name[len("date="):] >= before:
+                        continue
+                    parts = [self._rotate(p) for p in sorted(partition.iterdir()) if p.suffix in (".ndjson", ".csv")]
+                    if not parts:
+                        continue
+
+                    rows = [coerce_row(table, row) for part in parts for row in self._read_part(part)]
+                    data = pa.table({column: [row[column] for row in rows] for column in columns}, schema=schema)
+                    target = partition / COMPACTED_NAME
+                    if target.exists():
+                        data = pa.concat_tables([pq.read_table(target).cast(schema), data])
+                    tmp_path = partition / f".{target.name}.tmp"
+                    pq.write_table(data, tmp_path)
+                    os.replace(tmp_path, target)
+                    for part in parts:
+                        part.unlink()
+
+                    stats["partitions"] += 1
+                    stats["rows"] += len(rows)
+        return stats
+
+    def pending(self) -> int:
+        """Rows buffered but not yet written"""
+        return len(self._buffer)
+
+    def _part_path(self, table: str, timestamp: str) -> Path:
+        date = timestamp[:10]
+        return self.root / table / f"date={date}" / f"part-{os.getpid()}.{self.file_format}"
+
+    def _append_batch(self, path: Path, table: str, batch: List[Dict[str, Any]]) -> None:
+        """Append rows to a part file with a single write"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        columns = ANALYTICS_TABLES[table]
+
+        header = None
+        if self.file_format == "ndjson":
+            data = "".join(
+                json.dumps({c: row.get(c) for c in columns}, ensure_ascii=False) + "\n"
+                for row in batch
+            )
+        else:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(columns)
+            header = buffer.getvalue()
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows([row.get(c) for c in columns] for row in batch)
+            data = buffer.getvalue()
+
+        while True:
+            with open(path, "a", encoding="utf-8", newline="") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    try:
+                        moved = os.stat(path).st_ino != os.fstat(f.fileno()).st_ino
+                    except FileNotFoundError:
+                        moved = True
+                    if moved:  # Rotated by a compactor: append to a new file
+                        continue
+                if header is not None and os.fstat(f.fileno()).st_size == 0:
+                    f.write(header)
+                f.write(data)
+                return
+
+    @staticmethod
+    def _rotate(path: Path) -> Path:
+        """
+        Move a part file aside for compaction and wait for an append in
+        progress on it (part-1.ndjson -> part-1.compacting.ndjson).
+        """
+        if path.stem.endswith(".compacting"):  # Left by an interrupted run
+            return path
+        rotated = path.with_name(f"{path.stem}.compacting{path.suffix}")
+        os.replace(path, rotated)
+        if fcntl is not None:
+            with open(rotated, "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+        return rotated
+
+    @contextmanager
+    def _compact_lock(self) -> Iterator[None]:
+        """Exclude other compactors (other processes too, where flock is available)"""
+        with self._write_lock:
+            if fcntl is None:
+                yield
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.root / ".compact.lock", "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                yield
+
+    def _read_part(self, path: Path) -> List[Dict[str, Any]]:
+        """Read a part file back as rows"""
+        with open(path, encoding="utf-8", newline="") as f:
+            if path.suffix == ".ndjson":
+                return [json.loads(line) for line in f if line.strip()]
+            return list(csv.DictReader(f))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point: python -m src.utils.analytics compact"""
+    parser = argparse.ArgumentParser(description="Manage the analytics dataset")
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--root", default="lab_reports/analytics", help="Dataset directory")
+    parser.add_argument("--before", help="Only partitions dated before YYYY-MM-DD (default: today)")
+    args = parser.parse_args(argv)
+
+    print(json.dumps(AnalyticsSink(args.root).compact(before=args.before), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Class-wide export of many sessions into one archive"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple
+from uuid import uuid4
+import asyncio
+import csv
+import io
+import json
+import multiprocessing
+import os
+import time
+import zipfile
+
+BULK_EXPORT_FORMATS = ("markdown", "html", "csv", "json")
+
+ExportedFile = Tuple[str, bytes]  # (archive member name, content)
+
+
+def snapshot_session(session: Dict[str, Any], scenario: Any) -> Dict[str, Any]:
+    """JSON-serializable copy of a session for a bulk export job"""
+    from src.integrations.report import scenario_report_data
+
+    return {
+        "session_id": session["session_id"],
+        "experiment_id": scenario.experiment_id,
+        "experiment_title": scenario.title,
+        "scenario_data": scenario_report_data(scenario),
+        "conversation": session["conversation"].to_dicts(),
+        "observations": dict(session["observations"]),
+        "wolfram_results": list(session["wolfram_results"]),
+        "timestamp": session["timestamp"]
+    }
+
+
+def render_session_export(session: Dict[str, Any], formats: List[str]) -> List[ExportedFile]:
+    """
+    Render one session in the requested formats (runs in a worker process).
+
+    Args:
+        session: Session snapshot (see snapshot_session)
+        formats: Formats to render
+
+    Returns:
+        Archive members for the session
+    """
+    from src.integrations.gitbook import GitBookIntegration
+    from src.utils.export import csv_rows, render_export_document
+
+    base = f"{session['experiment_title'].replace(' ', '_')}_{session['session_id']}"
+    folder = session["session_id"]
+    files: List[ExportedFile] = []
+
+    markdown_content = None
+    if "markdown" in formats or "html" in formats:
+        markdown_content = GitBookIntegration()._build_comprehensive_report(
+            session["session_id"],
+            session["experiment_title"],
+            session["scenario_data"],
+            session["conversation"],
+            session["observations"],
+            session["wolfram_results"],
+            {}
+        )
+
+    if "markdown" in formats:
+        files.append((f"{folder}/{base}.md", markdown_content.encode("utf-8")))
+
+    if "html" in formats:
+        document = render_export_document(markdown_content)
+        if document.html is not None:
+            files.append((f"{folder}/{base}.html", document.html.encode("utf-8")))
+
+    if "csv" in formats:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(csv_rows(session["conversation"], session["observations"]))
+        files.append((f"{folder}/{base}.csv", buffer.getvalue().encode("utf-8")))
+
+    if "json" in formats:
+        full_data = {
+            "session_id": session["session_id"],
+            "experiment": {
+                "experiment_id": session["experiment_id"],
+                "title": session["experiment_title"],
+                **session["scenario_data"]
+            },
+            "conversation": session["conversation"],
+            "observations": session["observations"],
+            "timestamp": session["timestamp"]
+        }
+        files.append((
+            f"{folder}/{base}.json",
+            json.dumps(full_data, indent=2, ensure_ascii=False).encode("utf-8")
+        ))
+
+    return files
+
+
+class BulkExporter:
+    """
+    Renders many sessions in parallel worker processes and streams the
+    results into one zip archive as they complete.
+
+    The archive is written to a temp file and moved into place when every
+    session has been added, so a partial archive is never served. Session
+    snapshots are kept in a side file until the export succeeds (jobs only
+    carry its id), and archives and leftover snapshots are deleted once
+    older than retention_seconds.
+    """
+
+    def __init__(self, archive_dir: str, workers: int = 4, retention_seconds: float = 3 * 24 * 3600):
+        self.archive_dir = Path(archive_dir)
+        self.snapshot_dir = self.archive_dir / "snapshots"
+        self.workers = workers
+        self.retention_seconds = retention_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._last_prune: Optional[float] = None
+
+    def archive_path(self, job_id: str) -> Path:
+        """Final location of a job's archive"""
+        return self.archive_dir / f"{job_id}.zip"
+
+    async def save_snapshots(self, sessions: List[Dict[str, Any]]) -> str:
+        """Write session snapshots to a side file and return its id"""
+        from src.utils.file_io import file_io
+
+        snapshot_id = uuid4().hex
+        await file_io.write_json(self.snapshot_dir / f"{snapshot_id}.json", sessions, ensure_ascii=False)
+        return snapshot_id
+
+    async def load_snapshots(self, snapshot_id: str) -> List[Dict[str, Any]]:
+        """Read session snapshots written by save_snapshots"""
+        from src.utils.file_io import file_io
+
+        return json.loads(await file_io.read_text(self.snapshot_dir / f"{Path(snapshot_id).name}.json"))
+
+    async def discard_snapshots(self, snapshot_id: str) -> None:
+        """Delete session snapshots once they are exported"""
+        from src.utils.file_io import file_io
+
+        await file_io.run((self.snapshot_dir / f"{Path(snapshot_id).name}.json").unlink, missing_ok=True)
+
+    def prune(self) -> int:
+        """Delete archives, snapshots and temp files older than the retention period (by mtime)"""
+        cutoff = time.time() - self.retention_seconds
+        removed = 0
+        for directory in (self.archive_dir, self.snapshot_dir):
+            if not directory.exists():
+                continue
+            for path in directory.iterdir():
+                try:
+                    if path.is_file() and path.stat().st_mtime < cutoff:
+                        path.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+        return removed
+
+    async def export(self,
+                     job_id: str,
+                     sessions: List[Dict[str, Any]],
+                     formats: List[str],
+                     on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """
+        Export sessions into the job's archive.
+
+        Args:
+            job_id: Owning job (names the archive)
+            sessions: Session snapshots
+            formats: Formats to render per session
+            on_progress: Awaited with (sessions done, total) after each session
+
+        Returns:
+            Archive path and counts
+        """
+        from src.utils.file_io import file_io
+
+        executor = self._get_executor()
+        path = self.archive_path(job_id)
+        tmp_path = path.with_name(f".{path.name}.{uuid4().hex}.tmp")
+
+        await file_io.mkdir(self.archive_dir)
+        if self._last_prune is None or time.monotonic() - self._last_prune >= 3600:
+            self._last_prune = time.monotonic()
+            await file_io.run(self.prune)
+        archive = await file_io.run(zipfile.ZipFile, tmp_path, "w", zipfile.ZIP_DEFLATED)
+        file_count = 0
+        pending: List[asyncio.Future] = []
+        try:
+            pending = [
+                asyncio.wrap_future(executor.submit(render_session_export, session, formats))
+                for session in sessions
+            ]
+            for done, future in enumerate(asyncio.as_completed(pending), 1):
+                files = await future
+                await file_io.run(self._write_members, archive, files)
+                file_count += len(files)
+                if on_progress:
+                    await on_progress(done, len(sessions))
+
+            await file_io.run(archive.close)
+            await file_io.run(os.replace, tmp_path, path)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            await file_io.run(archive.close)
+            await file_io.run(tmp_path.unlink, missing_ok=True)
+            raise
+
+        return {
+            "archive": str(path),
+            "sessions": len(sessions),
+            "files": file_count,
+            "formats": formats
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker processes (they are restarted on next use)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    @staticmethod
+    def _write_members(archive: zipfile.ZipFile, files: List[ExportedFile]) -> None:
+        for name, content in files:
+            archive.writestr(name, content)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
@@ -0,0 +1,276 @@
+"""Pre-serialized, pre-compressed experiment catalog responses"""
+
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+from src.utils.compression import brotli, negotiate_encoding
+from src.utils.pagination import (
+    EXPERIMENT_DETAIL_FIELDS,
+    EXPERIMENT_SUMMARY_FIELDS,
+    PaginationError,
+    decode_cursor,
+    encode_cursor,
+    fields_key,
+    parse_fields,
+    project
+)
+from src.utils.responses import dumps
+import gzip
+import hashlib
+import threading
+
+CatalogKey = Tuple[Optional[str], str, Optional[int], str]  # (experiment id or None for the listing, page start, limit, fields)
+
+
+@dataclass(frozen=True)
+class CatalogPayload:
+    """One catalog response: JSON bytes, strong ETag and compressed variants"""
+    body: bytes
+    etag: str
+    encoded: Dict[str, bytes]  # Content-Encoding -> compressed body
+
+    def variant(self, accept_encoding: Optional[str]) -> Tuple[bytes, str, Optional[str]]:
+        """
+        Pick the representation for a request.
+
+        Returns:
+            (body, ETag, Content-Encoding or None)
+        """
+        encoding = negotiate_encoding(accept_encoding, self.encoded)
+        if encoding is None:
+            return self.body, self.etag, None
+        return self.encoded[encoding], variant_etag(self.etag, encoding), encoding
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header names any representation of this payload"""
+        if not if_none_match:
+            return False
+        tags = [t.strip() for t in if_none_match.split(",")]
+        if "*" in tags:
+            return True
+        valid = {self.etag, *(variant_etag(self.etag, e) for e in self.encoded)}
+        # Weak comparison (RFC 9110): W/ prefixes are ignored
+        return any((t[2:] if t.startswith("W/") else t) in valid for t in tags)
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """Strong ETag of a compressed representation ("<hash>-gzip")"""
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def experiment_summary(experiment_id: str, scenario: Any) -> Dict[str, Any]:
+    """Catalog entry of a scenario (GET /experiments)"""
+    return {
+        "id": experiment_id,
+        "title": scenario.title,
+        "subject": scenario.subject,
+        "level": scenario.level,
+        "duration_minutes": scenario.duration_minutes,
+        "description": scenario.description
+    }
+
+
+def experiment_details(experiment_id: str, scenario: Any) -> Dict[str, Any]:
+    """Full description of a scenario (GET /experiments/{experiment_id})"""
+    return {
+        "experiment_id": experiment_id,
+        "title": scenario.title,
+        "description": scenario.description,
+        "subject": scenario.subject,
+        "level": scenario.level,
+        "duration_minutes": scenario.duration_minutes,
+        "learning_objectives": scenario.learning_objectives,
+        "materials": scenario.materials,
+        "safety_notes": scenario.safety_notes,
+        "steps": [
+            {
+                "step_number": step.step_number,
+                "title": step.title,
+                "description": step.description,
+                "instructions": step.instructions,
+                "expected_observation": step.expected_observation,
+                "learning_objectives": step.learning_objectives,
+                "tips": step.tips
+            }
+            for step in scenario.steps
+        ]
+    }
+
+
+class CatalogResponseCache:
+    """
+    Experiment catalog responses serialized once and served as raw bytes.
+
+    - The listing and each experiment's details (and any paged or
+      fields-projected view of them) are encoded to JSON when first
+      needed, together with a strong ETag and gzip (and brotli, when
+      installed) variants; warm() builds the default views at startup
+    - The default views (full listing, full details) are compressed at
+      maximum level once; paged and projected views, built on demand
+      while a request waits, use the regular gzip_level/brotli_quality
+    - Pages are keyed by the decoded cursor position, so equivalent
+      cursor strings share one view
+    - At most max_payloads views are kept, least recently used dropped first
+    - A scenario change drops every listing view and that experiment's
+      detail views; they are rebuilt by the next request
+    """
+
+    def __init__(self,
+                 scenarios: Any,
+                 min_compress_bytes: int = 512,
+                 max_payloads: int = 1024,
+                 gzip_level: int = 6,
+                 brotli_quality: int = 5):
+        """
+        Args:
+            scenarios: Callable returning the scenario registry (id -> scenario)
+            min_compress_bytes: Smaller bodies are not compressed
+            max_payloads: Most views kept
+            gzip_level: gzip level of on-demand views
+            brotli_quality: brotli quality of on-demand views
+        """
+        self.scenarios = scenarios
+        self.min_compress_bytes = min_compress_bytes
+        self.max_payloads = max_payloads
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.builds = 0
+
+        self._payloads: "OrderedDict[CatalogKey, CatalogPayload]" = OrderedDict()
+        self._generation = 0  # Bumped by invalidate() so builds racing a change are not cached
+        self._lock = threading.Lock()
+
+    def warm(self) -> int:
+        """Build the listing and every experiment's details; returns the number of payloads"""
+        self.listing()
+        for experiment_id in list(self.scenarios()):
+            self.details(experiment_id)
+        return len(self._payloads)
+
+    def listing(self,
+                cursor: Optional[str] = None,
+                limit: Optional[int] = None,
+                fields: Optional[str] = None) -> CatalogPayload:
+        """
+        Payload of GET /experiments.
+
+        Without a limit, every experiment in registry order. With a limit,
+        one page in id order plus the next page's cursor (keyset cursors
+        stay valid when experiments are added or removed).
+
+        Args:
+            cursor: next_cursor of the previous page
+            limit: Page size
+            fields: Comma-separated experiment fields to include
+
+        Raises:
+            PaginationError: Invalid cursor or fields
+        """
+        tree = parse_fields(fields, EXPERIMENT_SUMMARY_FIELDS)
+        after = None
+        if limit is not None:
+            after = decode_cursor(cursor).get("after")
+            if after is not None and not isinstance(after, str):
+                raise PaginationError("Invalid cursor")
+        key = (None, after or "", limit, fields_key(tree))
+        payload = self._get(key)
+        if payload is not None:
+            return payload
+
+        generation = self._generation
+        registry = self.scenarios()
+        data: Dict[str, Any] = {}
+        if limit is None:
+            ids = list(registry)
+        else:
+            ordered = sorted(registry)
+            start = bisect_right(ordered, after) if after is not None else 0
+            ids = ordered[start:start + limit]
+            more = start + limit < len(ordered)
+            data["next_cursor"] = encode_cursor({"after": ids[-1]}) if ids and more else None
+
+        experiments = []
+        for experiment_id in ids:
+            scenario = registry.get(experiment_id)
+            if scenario is not None:
+                experiments.append(project(experiment_summary(experiment_id, scenario), tree))
+        default_view = limit is None and fields is None
+        return self._store(key, {"experiments": experiments, **data}, generation, best=default_view)
+
+    def details(self, experiment_id: str, fields: Optional[str] = None) -> Optional[CatalogPayload]:
+        """
+        Payload of GET /experiments/{experiment_id}, or None if there is no such experiment.
+
+        Args:
+            experiment_id: Registry key
+            fields: Comma-separated fields to include ("title,steps.title")
+
+        Raises:
+            PaginationError: Invalid fields
+        """
+        tree = parse_fields(fields, EXPERIMENT_DETAIL_FIELDS)
+        key = (experiment_id, "", None, fields_key(tree))
+        payload = self._get(key)
+        if payload is None:
+            generation = self._generation
+            scenario = self.scenarios().get(experiment_id)
+            if scenario is None:
+                return None
+            data = project(experiment_details(experiment_id, scenario), tree)
+            payload = self._store(key, data, generation, best=fields is None)
+        return payload
+
+    def invalidate(self, experiment_id: Optional[str] = None, scenario: Any = None) -> None:
+        """
+        Drop the payloads affected by a scenario change (all when experiment_id
+        is None). Matches the on_scenario_change listener signature.
+        """
+        with self._lock:
+            self._generation += 1
+            if experiment_id is None:
+                self._payloads.clear()
+                return
+            for key in [k for k in self._payloads if k[0] is None or k[0] == experiment_id]:
+                del self._payloads[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters"""
+        return {
+            "payloads": len(self._payloads),
+            "bytes": sum(
+                len(p.body) + sum(len(b) for b in p.encoded.values())
+                for p in list(self._payloads.values())
+            ),
+            "builds": self.builds
+        }
+
+    def _get(self, key: CatalogKey) -> Optional[CatalogPayload]:
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+            return payload
+
+    def _store(self, key: CatalogKey, data: Dict[str, Any], generation: int, best: bool = False) -> CatalogPayload:
+        """Serialize, hash and compress a payload (at maximum level when best) and cache it"""
+        body = dumps(data)
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+        encoded = {}
+        if len(body) >= self.min_compress_bytes:
+            encoded["gzip"] = gzip.compress(body, compresslevel=9 if best else self.gzip_level, mtime=0)
+            if brotli is not None:
+                encoded["br"] = brotli.compress(body, quality=11 if best else self.brotli_quality)
+
+        payload = CatalogPayload(body, etag, encoded)
+        with self._lock:
+            self.builds += 1
+            if generation == self._generation:
+                self._payloads[key] = payload
+                while len(self._payloads) > self.max_payloads:
+                    self._payloads.popitem(last=False)
+        return payload
+
+    def __len__(self) -> int:
+        return len(self._payloads)
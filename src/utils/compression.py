@@ -0,0 +1,176 @@
+"""Response compression (brotli when installed, else gzip) as ASGI middleware"""
+
+from typing import Any, Iterable, Optional
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+# Content types that are already compressed (or binary) and not worth compressing again
+INCOMPRESSIBLE_TYPES = (
+    "image/png", "image/jpeg", "image/gif", "image/webp",
+    "application/pdf", "application/zip", "application/gzip", "application/octet-stream"
+)
+
+
+def available_encodings() -> tuple:
+    """Content codings this process can produce, preferred first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """
+    Choose a content coding from an Accept-Encoding header.
+
+    Prefers brotli over gzip; codings with q=0 are refused.
+    """
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class _Encoder:
+    """Incremental gzip or brotli compressor"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress a streamed chunk and flush it so the client can decode it right away"""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """Compress the last data and end the stream"""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.finish()
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def weak_etag(etag: bytes) -> bytes:
+    """Weak form of an ETag header value (unchanged if already weak)"""
+    return etag if etag.startswith(b"W/") else b"W/" + etag
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses the client accepts compressed.
+
+    - Bodies smaller than minimum_size are sent as is
+    - Responses that already set Content-Encoding (pre-compressed
+      catalog payloads), have an incompressible content type, or have no
+      body (204/304) are passed through
+    - Streamed responses are compressed chunk by chunk and flushed, so
+      streaming endpoints keep delivering incrementally
+    - A strong ETag of a compressed response is made weak: the encoded
+      bytes are not the representation it was computed for
+    """
+
+    def __init__(self,
+                 app: Any,
+                 minimum_size: int = 1024,
+                 gzip_level: int = 6,
+                 brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for name, value in scope.get("headers", ()):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding, available_encodings())
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_compressed(message: dict) -> None:
+            nonlocal start_message, encoder, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = dict(message.get("headers", ()))
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                passthrough = (
+                    b"content-encoding" in headers
+                    or message["status"] in (204, 304)
+                    or content_type.startswith(INCOMPRESSIBLE_TYPES)
+                )
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                start, start_message = start_message, None
+                if passthrough or (not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                encoder = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+                headers = [
+                    (name, weak_etag(value) if name == b"etag" else value)
+                    for name, value in start.get("headers", ())
+                    if name not in (b"content-length", b"vary")
+                ]
+                vary = [value for name, value in start.get("headers", ()) if name == b"vary"]
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+                if not more_body:
+                    body = encoder.finish(body)
+                    headers.append((b"content-length", str(len(body)).encode("latin-1")))
+                    await send({**start, "headers": headers})
+                    await send({**message, "body": body})
+                    return
+                await send({**start, "headers": headers})
+                await send({**message, "body": encoder.chunk(body)})
+                return
+
+            if passthrough or encoder is None:
+                await send(message)
+            elif more_body:
+                await send({**message, "body": encoder.chunk(body)})
+            else:
+                await send({**message, "body": encoder.finish(body)})
+
+        await self.app(scope, receive, send_compressed)
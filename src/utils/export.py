@@ -1,55 +1,23 @@
 """Export utilities for lab reports - PDF, Markdown, CSV"""
 
+from dataclasses import dataclass, field
+from html import escape
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+import asyncio
+import csv
+import io
 import json
+import time
+import zipfile
 from datetime import datetime
+from src.config import settings
+from src.utils.file_io import file_io, atomic_writer, render_pool
+from src.utils.pdf_renderer import pdf_renderer
 
+EXPORT_FORMATS = ("markdown", "html", "pdf", "csv", "json")
 
-class ReportExporter:
-    """
-    Export lab reports in multiple formats.
-
-    Supports:
-    - Markdown (default, already implemented)
-    - PDF (via markdown → HTML → PDF)
-    - CSV (for data analysis)
-    - JSON (for API integration)
-    """
-
-    def __init__(self):
-        self.exports_dir = Path("lab_reports/exports")
-        self.exports_dir.mkdir(parents=True, exist_ok=True)
-
-    def export_to_markdown(self, report_content: str, filename: str) -> str:
-        """
-        Export report to Markdown file.
-
-        Args:
-            report_content: Markdown content
-            filename: Output filename
-
-        Returns:
-            Path to exported file
-        """
-        filepath = self.exports_dir / f"{filename}.md"
-        filepath.write_text(report_content, encoding='utf-8')
-        return str(filepath)
-
-    def export_to_html(self, markdown_content: str, filename: str) -> str:
-        """
-        Convert Markdown to HTML for PDF generation.
-
-        Args:
-            markdown_content: Markdown content
-            filename: Output filename
-
-        Returns:
-            Path to HTML file
-        """
-        try:
-            import markdown
-            html_content = f"""
+HTML_PAGE_TEMPLATE = """
 <!DOCTYPE html>
 <html>
 <head>
@@ -115,60 +83,162 @@ class ReportExporter:
     </style>
 </head>
 <body>
-{markdown.markdown(markdown_content, extensions=['tables', 'fenced_code', 'codehilite'])}
+{body}
 <div class="footer">
     <p>Generated by CSGirlies-AILAB | CS Girlies Hackathon 2024</p>
-    <p>Exported on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+    <p>Exported on {exported_at}</p>
 </div>
 </body>
 </html>
 """
-            filepath = self.exports_dir / f"{filename}.html"
-            filepath.write_text(html_content, encoding='utf-8')
-            return str(filepath)
-        except ImportError:
-            # Fallback if markdown not installed
+
+
+@dataclass
+class ExportDocument:
+    """A report parsed and rendered once, shared by every export writer"""
+    markdown: str
+    html: Optional[str]  # None when the markdown package is not installed
+
+
+@dataclass
+class ExportResult:
+    """Files written by an export pipeline run"""
+    files: Dict[str, str]
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+
+def render_export_document(markdown_content: str) -> ExportDocument:
+    """Parse the markdown and render the HTML page (once per export)"""
+    try:
+        import markdown
+    except ImportError:
+        # Fallback if markdown not installed
+        return ExportDocument(markdown=markdown_content, html=None)
+
+    body = markdown.markdown(markdown_content, extensions=['tables', 'fenced_code', 'codehilite'])
+    return ExportDocument(
+        markdown=markdown_content,
+        html=HTML_PAGE_TEMPLATE.format(
+            body=body,
+            exported_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        )
+    )
+
+
+def csv_rows(conversation_data: Iterable[Dict[str, Any]],
+             observations: Dict[str, Any]) -> Iterator[List[Any]]:
+    """Rows of the CSV export"""
+    # Header
+    yield ['Type', 'Speaker', 'Content', 'Timestamp']
+
+    # Conversation data
+    for msg in conversation_data:
+        yield [
+            msg.get('role', 'unknown'),
+            msg.get('sender', ''),
+            msg.get('content', ''),
+            msg.get('timestamp', '')
+        ]
+
+    # Observations
+    yield []
+    yield ['Observations', '', '', '']
+    for key, value in observations.items():
+        yield ['observation', key, value, '']
+
+
+class ReportExporter:
+    """
+    Export lab reports in multiple formats.
+
+    Supports:
+    - Markdown (default, already implemented)
+    - PDF (via markdown → HTML → PDF)
+    - CSV (for data analysis)
+    - JSON (for API integration)
+
+    run_pipeline renders the report once and writes every format from
+    that shared document in parallel. Rendering runs on the render pool
+    and filesystem work on the file I/O pool; every file is written
+    atomically (write-then-rename), so exports never block the event
+    loop or leave half-written files behind.
+    """
+
+    def __init__(self):
+        self.exports_dir = Path(settings.reports_dir) / "exports"
+
+    async def export_to_markdown(self, report_content: str, filename: str) -> str:
+        """
+        Export report to Markdown file.
+
+        Args:
+            report_content: Markdown content
+            filename: Output filename
+
+        Returns:
+            Path to exported file
+        """
+        filepath = self.exports_dir / f"{filename}.md"
+        return await file_io.write_text(filepath, report_content)
+
+    async def export_to_html(self,
+                             markdown_content: str,
+                             filename: str,
+                             document: Optional[ExportDocument] = None) -> Optional[str]:
+        """
+        Convert Markdown to HTML for PDF generation.
+
+        Args:
+            markdown_content: Markdown content
+            filename: Output filename
+            document: Already rendered document (rendered here if None)
+
+        Returns:
+            Path to HTML file or None if markdown is not installed
+        """
+        if document is None:
+            document = await render_pool.run(render_export_document, markdown_content)
+        if document.html is None:
             return None
 
-    def export_to_pdf(self, markdown_content: str, filename: str) -> str:
+        filepath = self.exports_dir / f"{filename}.html"
+        return await file_io.write_text(filepath, document.html)
+
+    async def export_to_pdf(self,
+                            markdown_content: str,
+                            filename: str,
+                            document: Optional[ExportDocument] = None) -> Optional[str]:
         """
         Export report to PDF.
 
-        Requires: wkhtmltopdf or weasyprint
+        Requires: wkhtmltopdf or weasyprint. Rendering runs in the PDF
+        worker processes (see pdf_renderer).
 
         Args:
             markdown_content: Markdown content
             filename: Output filename
+            document: Already rendered document (rendered here if None)
 
         Returns:
-            Path to PDF file or None if failed
+            Path to PDF file (HTML file if no PDF backend works) or None if failed
+
+        Raises:
+            PdfRenderError: The render queue is full, timed out or failed
         """
-        html_file = self.export_to_html(markdown_content, filename)
-        if not html_file:
+        if document is None:
+            document = await render_pool.run(render_export_document, markdown_content)
+        if document.html is None:
             return None
 
         pdf_path = self.exports_dir / f"{filename}.pdf"
+        rendered = await pdf_renderer.render(document.html, str(pdf_path))
+        if rendered:
+            return rendered
+
+        # Fallback: return HTML file if no PDF backend is installed
+        return await file_io.write_text(self.exports_dir / f"{filename}.html", document.html)
 
-        # Try weasyprint first (pure Python)
-        try:
-            from weasyprint import HTML
-            HTML(html_file).write_pdf(str(pdf_path))
-            return str(pdf_path)
-        except ImportError:
-            pass
-
-        # Try pdfkit (requires wkhtmltopdf)
-        try:
-            import pdfkit
-            pdfkit.from_file(html_file, str(pdf_path))
-            return str(pdf_path)
-        except (ImportError, OSError):
-            pass
-
-        # Fallback: return HTML file if PDF conversion fails
-        return html_file
-
-    def export_to_csv(self, conversation_data: List[Dict[str, Any]],
+    async def export_to_csv(self, conversation_data: List[Dict[str, Any]],
                       observations: Dict[str, Any],
                       filename: str) -> str:
         """
@@ -182,34 +252,20 @@ class ReportExporter:
         Returns:
             Path to CSV file
         """
-        import csv
-
         filepath = self.exports_dir / f"{filename}.csv"
+        return await file_io.run(self._write_csv, filepath, conversation_data, observations)
 
-        with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-
-            # Header
-            writer.writerow(['Type', 'Speaker', 'Content', 'Timestamp'])
-
-            # Conversation data
-            for msg in conversation_data:
-                writer.writerow([
-                    msg.get('role', 'unknown'),
-                    msg.get('sender', ''),
-                    msg.get('content', ''),
-                    datetime.now().isoformat()
-                ])
-
-            # Observations
-            writer.writerow([])
-            writer.writerow(['Observations', '', '', ''])
-            for key, value in observations.items():
-                writer.writerow(['observation', key, value, ''])
+    @staticmethod
+    def _write_csv(filepath: Path,
+                   conversation_data: List[Dict[str, Any]],
+                   observations: Dict[str, Any]) -> str:
+        """Write the CSV export (blocking; runs on the file I/O pool)"""
+        with atomic_writer(filepath, 'w', newline='') as csvfile:
+            csv.writer(csvfile).writerows(csv_rows(conversation_data, observations))
 
         return str(filepath)
 
-    def export_to_json(self, full_report_data: Dict[str, Any], filename: str) -> str:
+    async def export_to_json(self, full_report_data: Dict[str, Any], filename: str) -> str:
         """
         Export complete report as JSON.
 
@@ -221,13 +277,9 @@ class ReportExporter:
             Path to JSON file
         """
         filepath = self.exports_dir / f"{filename}.json"
+        return await file_io.write_json(filepath, full_report_data, indent=2, ensure_ascii=False)
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(full_report_data, f, indent=2, ensure_ascii=False)
-
-        return str(filepath)
-
-    def export_all_formats(self,
+    async def export_all_formats(self,
                           markdown_content: str,
                           conversation_data: List[Dict[str, Any]],
                           observations: Dict[str, Any],
@@ -246,51 +298,202 @@ class ReportExporter:
         Returns:
             Dict with paths to all exported files
         """
-        exports = {}
+        result = await self.run_pipeline(
+            markdown_content,
+            conversation_data,
+            observations,
+            full_data,
+            base_filename
+        )
+        return result.files
+
+    async def run_pipeline(self,
+                           markdown_content: str,
+                           conversation_data: List[Dict[str, Any]],
+                           observations: Dict[str, Any],
+                           full_data: Dict[str, Any],
+                           base_filename: str,
+                           formats: Iterable[str] = EXPORT_FORMATS) -> ExportResult:
+        """
+        Export a report through a single-render pipeline.
+
+        The markdown is parsed and rendered to HTML once; the markdown,
+        HTML, PDF, CSV and JSON writers then run in parallel on the file I/O
+        pool, all reading the shared ExportDocument.
+
+        Args:
+            markdown_content: Markdown report
+            conversation_data: Conversation messages
+            observations: Student observations
+            full_data: Complete report data
+            base_filename: Base name for files
+            formats: Formats to write (default: all)
+
+        Returns:
+            Exported files and per-stage timings in milliseconds
+        """
+        formats = [f for f in EXPORT_FORMATS if f in set(formats)]
+        timings: Dict[str, float] = {}
+
+        start = time.perf_counter()
+        document = await render_pool.run(render_export_document, markdown_content)
+        timings["render"] = round((time.perf_counter() - start) * 1000, 2)
+
+        writers = {
+            "markdown": lambda: self.export_to_markdown(document.markdown, base_filename),
+            "html": lambda: self.export_to_html(markdown_content, base_filename, document),
+            "pdf": lambda: self.export_to_pdf(markdown_content, base_filename, document),
+            "csv": lambda: self.export_to_csv(conversation_data, observations, base_filename),
+            "json": lambda: self.export_to_json(full_data, base_filename)
+        }
+
+        async def timed(export_format: str) -> Optional[str]:
+            started = time.perf_counter()
+            try:
+                return await writers[export_format]()
+            finally:
+                timings[export_format] = round((time.perf_counter() - started) * 1000, 2)
+
+        paths = await asyncio.gather(*(timed(f) for f in formats))
+        timings["total"] = round((time.perf_counter() - start) * 1000, 2)
+
+        return ExportResult(
+            files={f: path for f, path in zip(formats, paths) if path},
+            timings_ms=timings
+        )
+
+
+# Streaming exports (generated incrementally, nothing written to disk)
+def iter_csv_export(conversation_data: Iterable[Dict[str, Any]],
+                    observations: Dict[str, Any]) -> Iterator[str]:
+    """Stream the CSV export row by row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in csv_rows(conversation_data, observations):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def iter_json_export(report_data: Dict[str, Any],
+                     conversation_data: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Stream the JSON export.
+
+    Produces the same document as export_to_json with
+    report_data["conversation"] = list(conversation_data), encoding one
+    turn at a time.
+    """
+    yield "{"
+    for key, value in report_data.items():
+        if key == "conversation":
+            continue
+        yield f"{json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}, "
 
-        # Markdown
-        exports['markdown'] = self.export_to_markdown(markdown_content, base_filename)
+    yield '"conversation": ['
+    for i, msg in enumerate(conversation_data):
+        yield ("" if i == 0 else ", ") + json.dumps(msg, ensure_ascii=False)
+    yield "]}"
 
-        # HTML
-        html_path = self.export_to_html(markdown_content, base_filename)
-        if html_path:
-            exports['html'] = html_path
 
-        # PDF (if possible)
-        pdf_path = self.export_to_pdf(markdown_content, base_filename)
-        if pdf_path:
-            exports['pdf'] = pdf_path
+def iter_html_export(markdown_chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Stream the HTML export from markdown chunks.
+
+    Chunks are converted block by block (a block ends at a blank line),
+    so the whole document is never held in memory. Without the markdown
+    package the text is emitted preformatted.
+    """
+    try:
+        import markdown
+
+        def convert(text: str) -> str:
+            return markdown.markdown(text, extensions=['tables', 'fenced_code', 'codehilite'])
+    except ImportError:
+        def convert(text: str) -> str:
+            return f"<pre>{escape(text)}</pre>"
+
+    head, tail = HTML_PAGE_TEMPLATE.format(
+        body="\0",
+        exported_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    ).split("\0")
+
+    yield head
+    pending = []
+    for chunk in markdown_chunks:
+        pending.append(chunk)
+        if chunk.endswith("\n\n"):
+            yield convert("".join(pending)) + "\n"
+            pending = []
+    if pending:
+        yield convert("".join(pending)) + "\n"
+    yield tail
+
+
+class _ZipOutput:
+    """Write-only sink that hands out the bytes a ZipFile has written so far"""
 
-        # CSV
-        exports['csv'] = self.export_to_csv(conversation_data, observations, base_filename)
+    def __init__(self):
+        self._parts: List[bytes] = []
 
-        # JSON
-        exports['json'] = self.export_to_json(full_data, base_filename)
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
 
-        return exports
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def iter_zip_export(members: Iterable[Tuple[str, Callable[[], Iterable[str]]]]) -> Iterator[bytes]:
+    """
+    Stream a zip archive whose members are themselves streamed.
+
+    Args:
+        members: (file name, factory returning the member's text chunks)
+
+    Yields:
+        Compressed archive bytes as they are produced
+    """
+    output = _ZipOutput()
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, chunks in members:
+            with archive.open(name, "w", force_zip64=True) as member:
+                for chunk in chunks():
+                    member.write(chunk.encode("utf-8"))
+                    data = output.drain()
+                    if data:
+                        yield data
+            yield output.drain()
+    yield output.drain()
 
 
 # Quick utility functions
-def quick_export_markdown(content: str, filename: str) -> str:
+async def quick_export_markdown(content: str, filename: str) -> str:
     """Quick markdown export"""
     exporter = ReportExporter()
-    return exporter.export_to_markdown(content, filename)
+    return await exporter.export_to_markdown(content, filename)
 
 
-def quick_export_pdf(markdown_content: str, filename: str) -> str:
+async def quick_export_pdf(markdown_content: str, filename: str) -> str:
     """Quick PDF export"""
     exporter = ReportExporter()
-    return exporter.export_to_pdf(markdown_content, filename)
+    return await exporter.export_to_pdf(markdown_content, filename)
 
 
-def quick_export_all(markdown_content: str,
+async def quick_export_all(markdown_content: str,
                      conversation: List[Dict],
                      observations: Dict,
                      full_data: Dict,
                      filename: str) -> Dict[str, str]:
     """Quick export in all formats"""
     exporter = ReportExporter()
-    return exporter.export_all_formats(
+    return await exporter.export_all_formats(
         markdown_content,
         conversation,
         observations,
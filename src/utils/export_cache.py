@@ -0,0 +1,189 @@
+"""On-disk cache of export artifacts keyed by session version"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+import hashlib
+import os
+import shutil
+import threading
+import time
+
+ExportKey = Tuple[str, int, str]  # (session_id, session version, format)
+
+
+@dataclass
+class CachedExport:
+    """Export response and the artifact files it points to"""
+    session_id: str
+    experiment_id: str
+    version: int
+    format: str
+    response: Dict[str, Any]
+    files: List[str]
+    size: int
+
+
+class ExportArtifactCache:
+    """
+    Export artifacts cached by (session_id, session version, format).
+
+    - Artifacts of each key live in their own directory, so entries never
+      share files
+    - Least recently used entries are deleted once the artifacts on disk
+      exceed max_bytes
+    - Entries of a session are dropped as soon as the session changes
+      (new version) and of an experiment when its scenario changes
+
+    put() stats and deletes files, so async callers run it on the file I/O
+    pool; lookups and invalidation only touch memory (dropped artifacts
+    are deleted by the next put() or collect()).
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries: "OrderedDict[ExportKey, CachedExport]" = OrderedDict()
+        self._by_session: Dict[str, Set[ExportKey]] = {}
+        self._garbage: List[Path] = []
+        self._swept = False
+        self._started_at = time.time()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag(session_id: str, version: int, export_format: str, scenario_revision: str = "") -> str:
+        """
+        Entity tag of an export (weak: regenerated files may differ in export
+        date). Includes the scenario revision, so a reloaded scenario
+        changes the tag even though the session did not change.
+        """
+        key = f"{session_id}:{version}:{export_format}:{scenario_revision}"
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return f'W/"{digest[:32]}"'
+
+    def artifact_dir(self, session_id: str, version: int, export_format: str) -> Path:
+        """Directory the artifacts of a key are written to"""
+        return self.cache_dir / session_id / f"v{version}" / export_format
+
+    def get(self, session_id: str, version: int, export_format: str) -> Optional[Dict[str, Any]]:
+        """Cached export response, or None"""
+        key = (session_id, version, export_format)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.response
+
+    def put(self,
+            session_id: str,
+            experiment_id: str,
+            version: int,
+            export_format: str,
+            response: Dict[str, Any],
+            files: Iterable[str]) -> CachedExport:
+        """
+        Cache an export written to artifact_dir() and enforce the size bound.
+
+        Blocking: stats the artifacts and deletes evicted ones.
+        """
+        files = [f for f in files if f]
+        size = sum(os.path.getsize(f) for f in files if os.path.exists(f))
+        entry = CachedExport(session_id, experiment_id, version, export_format, response, files, size)
+        key = (session_id, version, export_format)
+
+        with self._lock:
+            if not self._swept:
+                self._garbage.extend(self._orphans())
+                self._swept = True
+
+            self._drop(key, delete_files=False)  # Re-export of the same key overwrote the files
+            self._entries[key] = entry
+            self._by_session.setdefault(session_id, set()).add(key)
+            self.total_bytes += size
+
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+        self.collect()
+        return entry
+
+    def invalidate(self, session_id: Optional[str] = None, experiment_id: Optional[str] = None) -> None:
+        """Drop the entries of a session, of an experiment, or all of them"""
+        with self._lock:
+            if session_id is not None:
+                keys = list(self._by_session.get(session_id, ()))
+            elif experiment_id is not None:
+                keys = [k for k, e in self._entries.items() if e.experiment_id == experiment_id]
+            else:
+                keys = list(self._entries)
+            for key in keys:
+                self._drop(key)
+
+    def collect(self) -> int:
+        """
+        Delete dropped artifacts from disk (blocking).
+
+        Returns:
+            Number of artifact directories deleted
+        """
+        with self._lock:
+            garbage, self._garbage = self._garbage, []
+
+        for path in garbage:
+            shutil.rmtree(path, ignore_errors=True)
+            # Remove now-empty version/session directories
+            for parent in (path.parent, path.parent.parent):
+                try:
+                    parent.rmdir()
+                except OSError:
+                    break
+        return len(garbage)
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+    def _drop(self, key: ExportKey, delete_files: bool = True) -> None:
+        """Forget an entry and queue its artifacts for deletion (lock held)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.total_bytes -= entry.size
+        keys = self._by_session.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_session[key[0]]
+        if delete_files:
+            self._garbage.append(self.artifact_dir(*key))
+
+    def _orphans(self) -> List[Path]:
+        """Artifact directories left over from a previous process"""
+        if not self.cache_dir.exists():
+            return []
+        return [
+            format_dir
+            for format_dir in self.cache_dir.glob("*/v*/*")
+            if format_dir.is_dir() and format_dir.stat().st_mtime < self._started_at
+        ]
+
+    def __len__(self) -> int:
+        return len(self._entries)
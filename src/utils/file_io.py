@@ -0,0 +1,122 @@
+"""Async file I/O on a dedicated thread pool, with atomic writes"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar, Union
+from uuid import uuid4
+from src.config import settings
+import asyncio
+import json
+import os
+
+T = TypeVar("T")
+
+
+@contextmanager
+def atomic_writer(path: Union[str, Path],
+                  mode: str = "w",
+                  encoding: Optional[str] = "utf-8",
+                  newline: Optional[str] = None) -> Iterator[Any]:
+    """
+    Open a temp file next to path and move it into place on success.
+
+    Readers never see a partially written file; on error the temp file is
+    removed and the previous content (if any) is kept.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{uuid4().hex}.tmp")
+
+    if "b" in mode:
+        encoding = None
+    try:
+        with open(tmp_path, mode, encoding=encoding, newline=newline) as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def atomic_write(path: Union[str, Path], data: Union[str, bytes], encoding: str = "utf-8") -> str:
+    """Atomically write text or bytes to a file"""
+    mode = "wb" if isinstance(data, bytes) else "w"
+    with atomic_writer(path, mode, encoding=encoding) as f:
+        f.write(data)
+    return str(path)
+
+
+class AsyncFileIO:
+    """
+    Runs blocking filesystem work off the event loop.
+
+    - A dedicated thread pool (max_workers) so file I/O does not compete
+      with the default executor
+    - At most max_concurrency operations queued or running at once; further
+      callers wait on the event loop instead of piling up in the pool
+    - Writes go through atomic_writer (write-then-rename)
+
+    The concurrency limit is bound to the event loop it was created on and
+    is recreated if the loop changes.
+    """
+
+    def __init__(self, max_workers: int = 4, max_concurrency: int = 32, thread_name_prefix: str = "file-io"):
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.thread_name_prefix = thread_name_prefix
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking callable on the file I/O pool"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=self.thread_name_prefix
+            )
+
+        async with self._semaphore:
+            return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def write_text(self, path: Union[str, Path], text: str) -> str:
+        """Atomically write a text file"""
+        return await self.run(atomic_write, path, text)
+
+    async def write_bytes(self, path: Union[str, Path], data: bytes) -> str:
+        """Atomically write a binary file"""
+        return await self.run(atomic_write, path, data)
+
+    async def write_json(self, path: Union[str, Path], data: Any, **dump_kwargs: Any) -> str:
+        """Atomically write a JSON file"""
+        def write() -> str:
+            with atomic_writer(path) as f:
+                json.dump(data, f, **dump_kwargs)
+            return str(path)
+        return await self.run(write)
+
+    async def read_text(self, path: Union[str, Path]) -> str:
+        """Read a text file"""
+        return await self.run(Path(path).read_text, encoding="utf-8")
+
+    async def mkdir(self, path: Union[str, Path]) -> None:
+        """Create a directory (and parents)"""
+        await self.run(Path(path).mkdir, parents=True, exist_ok=True)
+
+    def shutdown(self) -> None:
+        """Stop the thread pool (it is recreated on next use)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._executor = None
+
+
+# Shared file I/O pool for reports and exports
+file_io = AsyncFileIO(settings.file_io_workers, settings.file_io_max_concurrency)
+
+# CPU-bound report rendering (markdown -> HTML), kept off the file I/O pool
+render_pool = AsyncFileIO(settings.render_workers, settings.render_workers * 4, thread_name_prefix="render")
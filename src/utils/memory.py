@@ -0,0 +1,178 @@
+"""Memory introspection - tracemalloc snapshots and per-subsystem size estimates"""
+
+from typing import Dict, Any, Callable, List, Optional
+from datetime import datetime
+import sys
+import tracemalloc
+
+
+def estimate_size(obj: Any) -> int:
+    """
+    Estimate the deep size of an object graph in bytes.
+
+    Follows containers, dataclass/instance attributes and slots. Shared
+    objects are only counted once. Safe to call from a worker thread: a
+    container resized mid-walk is counted without its contents.
+
+    Args:
+        obj: Root object
+
+    Returns:
+        Approximate size in bytes
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+
+        total += sys.getsizeof(current, 0)
+
+        if isinstance(current, (str, bytes, bytearray, int, float, bool, type(None))):
+            continue
+        try:
+            if isinstance(current, dict):
+                items = list(current.items())
+                stack.extend(key for key, _ in items)
+                stack.extend(value for _, value in items)
+                continue
+            if isinstance(current, (list, tuple, set, frozenset)):
+                stack.extend(list(current))
+                continue
+        except RuntimeError:  # Changed size during iteration
+            continue
+
+        if hasattr(current, "__dict__"):
+            stack.append(vars(current))
+        for slot in getattr(type(current), "__slots__", ()):
+            if hasattr(current, slot):
+                stack.append(getattr(current, slot))
+
+    return total
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Get the resident set size of this process (Linux), or None"""
+    try:
+        import os
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class MemoryMonitor:
+    """
+    Memory accounting for long-running servers.
+
+    Subsystems (sessions, caches, agent histories) register a provider
+    returning the objects they hold, plus an optional evict callback that
+    enforces the subsystem's high-water mark.
+    """
+
+    def __init__(self, top_n: int = 25):
+        self.top_n = top_n
+        self._providers: Dict[str, Callable[[], Any]] = {}
+        self._evictors: Dict[str, Callable[[], int]] = {}
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._last_snapshot_time: Optional[str] = None
+
+    def register(self,
+                 name: str,
+                 provider: Callable[[], Any],
+                 evict: Optional[Callable[[], int]] = None) -> None:
+        """
+        Register a subsystem for accounting.
+
+        Args:
+            name: Subsystem name (e.g. "sessions", "partner_history")
+            provider: Returns the container holding the subsystem's data
+            evict: Enforces the subsystem's high-water mark, returns items evicted
+        """
+        self._providers[name] = provider
+        if evict:
+            self._evictors[name] = evict
+
+    def subsystem_sizes(self) -> Dict[str, Dict[str, int]]:
+        """Estimate item counts and deep sizes of every registered subsystem"""
+        sizes = {}
+        for name, provider in self._providers.items():
+            data = provider()
+            sizes[name] = {
+                "items": len(data) if hasattr(data, "__len__") else 1,
+                "bytes": estimate_size(data)
+            }
+        return sizes
+
+    def enforce_limits(self) -> Dict[str, int]:
+        """Run every registered eviction callback"""
+        return {name: evict() for name, evict in self._evictors.items()}
+
+    def report(self) -> Dict[str, Any]:
+        """Full memory report for the admin endpoint"""
+        sizes = self.subsystem_sizes()
+        return {
+            "rss_bytes": current_rss_bytes(),
+            "subsystems": sizes,
+            "estimated_total_bytes": sum(s["bytes"] for s in sizes.values()),
+            "tracemalloc": {
+                "tracing": tracemalloc.is_tracing(),
+                "last_snapshot": self._last_snapshot_time
+            }
+        }
+
+    def take_snapshot(self) -> Dict[str, Any]:
+        """
+        Take a tracemalloc snapshot and diff it against the previous one.
+
+        Tracing starts on the first call, so the first snapshot is the baseline.
+
+        Returns:
+            Top allocation sites by growth since the last snapshot
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._last_snapshot = None
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+
+        result: Dict[str, Any] = {
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            "previous_snapshot": self._last_snapshot_time,
+            "top_growth": []
+        }
+
+        if self._last_snapshot is not None:
+            result["top_growth"] = self._format_diff(snapshot.compare_to(self._last_snapshot, "lineno"))
+
+        self._last_snapshot = snapshot
+        self._last_snapshot_time = datetime.now().isoformat()
+        return result
+
+    def stop_tracing(self) -> None:
+        """Stop tracemalloc and drop the stored snapshot"""
+        tracemalloc.stop()
+        self._last_snapshot = None
+        self._last_snapshot_time = None
+
+    def _format_diff(self, stats: List[tracemalloc.StatisticDiff]) -> List[Dict[str, Any]]:
+        """Convert a snapshot diff to JSON-friendly rows"""
+        return [
+            {
+                "location": str(stat.traceback[0]) if stat.traceback else "unknown",
+                "size_diff_bytes": stat.size_diff,
+                "size_bytes": stat.size,
+                "count_diff": stat.count_diff
+            }
+            for stat in stats[:self.top_n]
+        ]
@@ -0,0 +1,129 @@
+"""Cursor pagination and fields= projection for list and detail endpoints"""
+
+from typing import Dict, Any, Mapping, Optional
+import base64
+import binascii
+import json
+
+# Projection schema: field name -> None (leaf) or the schema of its nested object(s)
+FieldSchema = Mapping[str, Optional["FieldSchema"]]
+FieldTree = Dict[str, Optional["FieldTree"]]
+
+EXPERIMENT_SUMMARY_FIELDS: FieldSchema = dict.fromkeys(
+    ("id", "title", "subject", "level", "duration_minutes", "description")
+)
+
+EXPERIMENT_STEP_FIELDS: FieldSchema = dict.fromkeys(
+    ("step_number", "title", "description", "instructions", "expected_observation",
+     "learning_objectives", "tips")
+)
+
+EXPERIMENT_DETAIL_FIELDS: FieldSchema = {
+    **dict.fromkeys(
+        ("experiment_id", "title", "description", "subject", "level", "duration_minutes",
+         "learning_objectives", "materials", "safety_notes")
+    ),
+    "steps": EXPERIMENT_STEP_FIELDS
+}
+
+SEARCH_RESULT_FIELDS: FieldSchema = dict.fromkeys(
+    ("id", "title", "subject", "level", "duration_minutes", "score")
+)
+
+SESSION_TURN_FIELDS: FieldSchema = dict.fromkeys(
+    ("seq", "role", "sender", "content", "step", "timestamp", "metadata")
+)
+
+
+class PaginationError(ValueError):
+    """Invalid cursor, page size or fields parameter"""
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Opaque cursor for a position in a listing"""
+    raw = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Dict[str, Any]:
+    """
+    Position encoded in a cursor ({} for the first page).
+
+    Raises:
+        PaginationError: The cursor was not produced by encode_cursor
+    """
+    if not cursor:
+        return {}
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise PaginationError("Invalid cursor")
+    if not isinstance(position, dict):
+        raise PaginationError("Invalid cursor")
+    return position
+
+
+def check_limit(limit: int, max_limit: int) -> int:
+    """Validate a page size"""
+    if not 1 <= limit <= max_limit:
+        raise PaginationError(f"limit must be between 1 and {max_limit}")
+    return limit
+
+
+def parse_fields(fields: Optional[str], schema: FieldSchema) -> Optional[FieldTree]:
+    """
+    Parse a fields= parameter ("title,steps.title") against a schema.
+
+    Returns:
+        Tree of selected fields, or None to select everything
+
+    Raises:
+        PaginationError: A field is not in the schema
+    """
+    if not fields:
+        return None
+
+    tree: FieldTree = {}
+    for path in fields.split(","):
+        path = path.strip()
+        if not path:
+            continue
+        node, level = tree, schema
+        parts = path.split(".")
+        for depth, part in enumerate(parts):
+            if level is None or part not in level:
+                raise PaginationError(f"Unknown field: {path}")
+            if depth == len(parts) - 1:
+                node[part] = None  # Whole field
+            else:
+                child = node.get(part, {})
+                if child is None:  # Already selected whole
+                    break
+                node[part] = child
+                node, level = child, level[part]
+    return tree or None
+
+
+def fields_key(tree: Optional[FieldTree]) -> str:
+    """Canonical string of a field tree (for cache keys)"""
+    if tree is None:
+        return ""
+    return ",".join(
+        name if sub is None else f"{name}({fields_key(sub)})"
+        for name, sub in sorted(tree.items())
+    )
+
+
+def project(data: Any, tree: Optional[FieldTree]) -> Any:
+    """Keep only the selected fields of a dict (or of each dict in a list)"""
+    if tree is None:
+        return data
+    if isinstance(data, list):
+        return [project(item, tree) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {
+        name: project(data[name], sub)
+        for name, sub in tree.items()
+        if name in data
+    }
@@ -0,0 +1,288 @@
+"""PDF rendering in a pool of warm worker processes"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Set
+from src.config import settings
+import asyncio
+import logging
+import multiprocessing
+
+logger = logging.getLogger(__name__)
+
+PdfRenderer = Callable[[str, str], Optional[str]]
+
+
+class PdfRenderError(Exception):
+    """PDF rendering failed"""
+
+
+class PdfQueueFullError(PdfRenderError):
+    """Too many PDF jobs are already queued"""
+
+
+class PdfRenderTimeout(PdfRenderError):
+    """A PDF job exceeded its time limit and its worker was restarted"""
+
+
+def load_default_renderer() -> Optional[PdfRenderer]:
+    """
+    Import a PDF backend (weasyprint, then pdfkit).
+
+    Returns:
+        render(html, pdf_path) -> pdf_path, or None if no backend is installed
+    """
+    from src.utils.file_io import atomic_writer
+
+    try:
+        from weasyprint import HTML
+
+        def render_weasyprint(html: str, pdf_path: str) -> str:
+            with atomic_writer(pdf_path, 'wb') as f:
+                HTML(string=html).write_pdf(f)
+            return pdf_path
+
+        return render_weasyprint
+    except ImportError:
+        pass
+
+    try:
+        import pdfkit
+        configuration = pdfkit.configuration()  # Locates wkhtmltopdf once
+
+        def render_pdfkit(html: str, pdf_path: str) -> str:
+            pdf_bytes = pdfkit.from_string(html, False, configuration=configuration)
+            with atomic_writer(pdf_path, 'wb') as f:
+                f.write(pdf_bytes)
+            return pdf_path
+
+        return render_pdfkit
+    except (ImportError, OSError):
+        pass
+
+    return None
+
+
+def _worker_main(conn: Any, loader: Callable[[], Optional[PdfRenderer]]) -> None:
+    """Worker process: load the renderer once, then render jobs until told to stop"""
+    renderer = loader()
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+
+        html, pdf_path = job
+        try:
+            conn.send(("ok", renderer(html, pdf_path) if renderer else None))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+class _PdfWorker:
+    """One worker process and the parent end of its pipe"""
+
+    def __init__(self, context: Any, loader: Callable[[], Optional[PdfRenderer]]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, loader),
+            name="pdf-renderer",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def stop(self) -> None:
+        """Ask the worker to exit"""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1)
+        self.kill()
+
+    def kill(self) -> None:
+        """Terminate the worker (cancels the job it is running)"""
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1)
+        self.conn.close()
+
+
+class PdfRenderService:
+    """
+    Renders PDFs in separate, pre-started worker processes.
+
+    - Each worker imports its PDF backend once and keeps it loaded
+    - At most max_queue jobs wait for a free worker; further jobs are
+      rejected with PdfQueueFullError instead of piling up
+    - A job that exceeds timeout_seconds, or whose caller is cancelled,
+      has its worker terminated and replaced; the kill and the new
+      process's spawn run in a background task off the event loop, which
+      then puts the replacement on the idle queue
+    - Results are awaited on a small dedicated thread pool (two threads
+      per worker: a killed worker's thread is only released once its
+      process has exited), so PDF jobs never occupy the default executor
+
+    The idle-worker queue is bound to the event loop it was created on and
+    is rebuilt if the loop changes.
+    """
+
+    def __init__(self,
+                 workers: int = 2,
+                 max_queue: int = 16,
+                 timeout_seconds: float = 60.0,
+                 loader: Callable[[], Optional[PdfRenderer]] = load_default_renderer):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout_seconds = timeout_seconds
+        self.loader = loader
+
+        self.rendered = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.failed = 0
+
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: List[_PdfWorker] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending = 0
+        self._recv_executor: Optional[ThreadPoolExecutor] = None
+        self._restarts: Set[asyncio.Task] = set()
+
+    def warm(self) -> None:
+        """Start all worker processes so their backends load ahead of the first job"""
+        while len(self._workers) < self.workers:
+            self._workers.append(_PdfWorker(self._context, self.loader))
+
+    async def render(self, html: str, pdf_path: str, timeout_seconds: Optional[float] = None) -> Optional[str]:
+        """
+        Render HTML to a PDF file.
+
+        Args:
+            html: Complete HTML page
+            pdf_path: Output file (written atomically)
+            timeout_seconds: Time limit once a worker picks up the job
+
+        Returns:
+            pdf_path, or None if no PDF backend is installed
+
+        Raises:
+            PdfQueueFullError: The queue is full
+            PdfRenderTimeout: The job took too long
+            PdfRenderError: The backend failed
+        """
+        if self._pending >= self.workers + self.max_queue:
+            raise PdfQueueFullError(f"PDF queue is full ({self.max_queue} jobs waiting)")
+
+        idle = self._get_idle_queue()
+        loop = asyncio.get_running_loop()
+        timeout = timeout_seconds if timeout_seconds is not None else self.timeout_seconds
+
+        self._pending += 1
+        try:
+            worker = await idle.get()
+            try:
+                worker.conn.send((html, str(pdf_path)))
+                status, value = await asyncio.wait_for(
+                    loop.run_in_executor(self._get_recv_executor(), worker.conn.recv),
+                    timeout
+                )
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self._replace(worker, idle)
+                raise PdfRenderTimeout(f"PDF rendering exceeded {timeout:.0f}s")
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                self._replace(worker, idle)
+                raise
+            except (EOFError, OSError) as e:
+                self.failed += 1
+                self._replace(worker, idle)
+                raise PdfRenderError(f"PDF worker crashed: {str(e)}")
+            idle.put_nowait(worker)
+        finally:
+            self._pending -= 1
+
+        if status != "ok":
+            self.failed += 1
+            raise PdfRenderError(value)
+        self.rendered += 1
+        return value
+
+    def stats(self) -> dict:
+        """Pool and job counters"""
+        return {
+            "workers": len(self._workers),
+            "pending": self._pending,
+            "max_queue": self.max_queue,
+            "rendered": self.rendered,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "failed": self.failed
+        }
+
+    def shutdown(self) -> None:
+        """Stop all worker processes (they are restarted on next use)"""
+        for task in self._restarts:
+            task.cancel()
+        self._restarts.clear()
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+        self._idle = None
+        self._loop = None
+        if self._recv_executor is not None:
+            self._recv_executor.shutdown(wait=False)
+        self._recv_executor = None
+
+    def _get_idle_queue(self) -> asyncio.Queue:
+        """Get the idle-worker queue for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._idle is None or self._loop is not loop:
+            self.warm()
+            self._idle = asyncio.Queue()
+            for worker in self._workers:
+                self._idle.put_nowait(worker)
+            self._loop = loop
+        return self._idle
+
+    def _get_recv_executor(self) -> ThreadPoolExecutor:
+        if self._recv_executor is None:
+            self._recv_executor = ThreadPoolExecutor(
+                max_workers=self.workers * 2,
+                thread_name_prefix="pdf-recv"
+            )
+        return self._recv_executor
+
+    def _replace(self, worker: _PdfWorker, idle: asyncio.Queue) -> None:
+        """Terminate a worker and start a fresh one in its place, in the background"""
+        logger.warning("Restarting PDF worker")
+        task = asyncio.get_running_loop().create_task(self._restart(worker, idle))
+        self._restarts.add(task)
+        task.add_done_callback(self._restarts.discard)
+
+    async def _restart(self, worker: _PdfWorker, idle: asyncio.Queue) -> None:
+        """Kill a worker and spawn its replacement off the event loop, then make it available"""
+        def respawn() -> _PdfWorker:
+            worker.kill()
+            return _PdfWorker(self._context, self.loader)
+
+        replacement = await asyncio.get_running_loop().run_in_executor(None, respawn)
+        if worker in self._workers:
+            self._workers[self._workers.index(worker)] = replacement
+            if idle is self._idle:
+                idle.put_nowait(replacement)
+                return
+        replacement.stop()  # The pool was shut down or rebuilt meanwhile
+
+
+# Shared PDF rendering pool
+pdf_renderer = PdfRenderService(
+    workers=settings.pdf_workers,
+    max_queue=settings.pdf_max_queue,
+    timeout_seconds=settings.pdf_timeout_seconds
+)
@@ -0,0 +1,233 @@
+"""Request profiling - slow-request capture and on-demand server profiles"""
+
+from typing import Dict, Any, Optional
+from datetime import datetime
+from pathlib import Path
+from src.utils.file_io import file_io
+import asyncio
+import cProfile
+import io
+import json
+import pstats
+import random
+import time
+
+
+class RequestProfiler:
+    """
+    Captures cProfile data for slow requests and time-boxed server profiles.
+
+    Features:
+    - Sampled per-request profiles, kept only when a request exceeds its SLO
+    - A slow-request log (one JSON line per slow request, profiled or not)
+    - On-demand profiles of the whole server with an automatic time box
+
+    cProfile hooks the interpreter per thread, so only one collector can be
+    active at a time. Per-request profiles are skipped while another request
+    or an on-demand session is being profiled.
+
+    A request profile covers everything the event loop runs while it is
+    enabled, not just the sampled request: work done for other concurrent
+    requests in that window (and for background jobs) is attributed to it.
+    Read a request profile as "what the server was doing while this request
+    was slow", and confirm suspects with a quieter repro.
+
+    Profiles and the slow-request log are written on the file I/O pool. An
+    on-demand session is stopped by a timer on the event loop when its time
+    box elapses, even if no further requests arrive.
+    """
+
+    def __init__(self,
+                 profile_dir: str,
+                 slow_threshold_ms: float,
+                 sample_rate: float,
+                 max_session_seconds: int):
+        self.profile_dir = Path(profile_dir)
+        self.slow_threshold_ms = slow_threshold_ms
+        self.sample_rate = sample_rate
+        self.max_session_seconds = max_session_seconds
+
+        self._request_profile_active = False
+        self._session: Optional[cProfile.Profile] = None
+        self._session_started: Optional[float] = None
+        self._session_deadline: Optional[float] = None
+        self._session_timer: Optional[asyncio.TimerHandle] = None
+        self._expiry_task: Optional[asyncio.Task] = None
+        self._last_session_file: Optional[str] = None
+
+    # Per-request profiles
+
+    def start_request_profile(self) -> Optional[cProfile.Profile]:
+        """
+        Start a sampled profile for an incoming request.
+
+        Returns:
+            The running profile, or None if this request is not sampled
+        """
+        if self._request_profile_active or self._session is not None:
+            return None
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+
+        profile = cProfile.Profile()
+        profile.enable()
+        self._request_profile_active = True
+        return profile
+
+    async def finish_request_profile(self,
+                                     profile: Optional[cProfile.Profile],
+                                     duration_ms: float,
+                                     context: Dict[str, Any]) -> Optional[str]:
+        """
+        Stop a request profile and persist it if the request was slow.
+
+        Args:
+            profile: Profile returned by start_request_profile (may be None)
+            duration_ms: Wall-clock request duration in milliseconds
+            context: Request context (method, path, query, status code)
+
+        Returns:
+            Path to the written profile, or None if nothing was saved
+        """
+        if profile is not None:
+            profile.disable()
+            self._request_profile_active = False
+
+        if duration_ms < self.slow_threshold_ms:
+            return None
+
+        entry = {
+            **context,
+            "duration_ms": round(duration_ms, 2),
+            "threshold_ms": self.slow_threshold_ms,
+            "timestamp": datetime.now().isoformat(),
+            "profile_file": None
+        }
+        return await file_io.run(self._record_slow_request, profile, entry)
+
+    def _record_slow_request(self, profile: Optional[cProfile.Profile], entry: Dict[str, Any]) -> Optional[str]:
+        """Write the request profile (if sampled) and append to the slow-request log"""
+        if profile is not None:
+            entry["profile_file"] = self._write_profile(profile, "request", entry)
+
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.profile_dir / "slow_requests.log", "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+        return entry["profile_file"]
+
+    # On-demand server profiles
+
+    def start_session(self, duration_seconds: int) -> Dict[str, Any]:
+        """
+        Start a time-boxed profile of the running server.
+
+        Args:
+            duration_seconds: Seconds before the profile stops automatically
+
+        Returns:
+            Session status
+        """
+        if self._session is not None:
+            raise RuntimeError("A profiling session is already running")
+        if self._request_profile_active:
+            raise RuntimeError("A request profile is in progress, try again shortly")
+
+        duration_seconds = max(1, min(duration_seconds, self.max_session_seconds))
+
+        self._session = cProfile.Profile()
+        self._session.enable()
+        self._session_started = time.time()
+        self._session_deadline = self._session_started + duration_seconds
+        try:
+            loop = asyncio.get_running_loop()
+            self._session_timer = loop.call_later(duration_seconds, self._on_time_box, loop)
+        except RuntimeError:  # No event loop: stopped by stop_session() only
+            self._session_timer = None
+
+        return self.status()
+
+    async def stop_session(self) -> Dict[str, Any]:
+        """
+        Stop the running profile and write it to disk.
+
+        Returns:
+            Session summary including the profile file path
+        """
+        if self._session is None:
+            raise RuntimeError("No profiling session is running")
+
+        session, started = self._session, self._session_started
+        session.disable()
+        elapsed = time.time() - started
+        if self._session_timer is not None:
+            self._session_timer.cancel()
+
+        self._session = None
+        self._session_started = None
+        self._session_deadline = None
+        self._session_timer = None
+
+        self._last_session_file = await file_io.run(
+            self._write_profile,
+            session,
+            "session",
+            {
+                "started": datetime.fromtimestamp(started).isoformat(),
+                "duration_seconds": round(elapsed, 2)
+            }
+        )
+
+        return {
+            "running": False,
+            "duration_seconds": round(elapsed, 2),
+            "profile_file": self._last_session_file
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """Get current profiling status"""
+        if self._session is None:
+            return {
+                "running": False,
+                "last_profile_file": self._last_session_file,
+                "slow_threshold_ms": self.slow_threshold_ms,
+                "sample_rate": self.sample_rate
+            }
+
+        return {
+            "running": True,
+            "elapsed_seconds": round(time.time() - self._session_started, 2),
+            "remaining_seconds": round(max(0.0, self._session_deadline - time.time()), 2),
+            "slow_threshold_ms": self.slow_threshold_ms,
+            "sample_rate": self.sample_rate
+        }
+
+    def _on_time_box(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Timer callback: stop the on-demand session once its time box has elapsed"""
+        self._session_timer = None
+        if self._session is not None:
+            self._expiry_task = loop.create_task(self.stop_session())
+
+    def _write_profile(self, profile: cProfile.Profile, prefix: str, context: Dict[str, Any]) -> str:
+        """
+        Write raw pstats data plus a readable summary next to it.
+
+        Returns:
+            Path to the .prof file (loadable with pstats/snakeviz)
+        """
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        prof_path = self.profile_dir / f"{prefix}_{stamp}.prof"
+        profile.dump_stats(str(prof_path))
+
+        summary = io.StringIO()
+        stats = pstats.Stats(profile, stream=summary)
+        stats.sort_stats("cumulative").print_stats(30)
+
+        (self.profile_dir / f"{prefix}_{stamp}.txt").write_text(
+            json.dumps(context, indent=2) + "\n\n" + summary.getvalue(),
+            encoding="utf-8"
+        )
+
+        return str(prof_path)
@@ -0,0 +1,358 @@
+"""Content-addressed storage for generated lab reports"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from uuid import uuid4
+from src.utils.file_io import atomic_writer
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Optional: no cross-process locking (e.g. Windows)
+    fcntl = None
+
+# Legacy report names: <experiment>_<session uuid>_<YYYYmmdd_HHMMSS>.md
+LEGACY_REPORT_PATTERN = re.compile(
+    r"_(?P<session_id>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})_\d{8}_\d{6}\.md$"
+)
+
+# Temp files younger than this may still be written by another process
+TMP_GRACE_SECONDS = 3600
+
+
+@dataclass
+class StoredReport:
+    """Result of storing a report"""
+    digest: str  # sha256 of the report bytes
+    path: Path  # Human-readable file in the reports directory
+    object_path: Path  # Content-addressed object
+    size: int
+    deduplicated: bool  # True when identical content was already stored
+    preview: str = ""
+
+
+class ReportStore:
+    """
+    Content-addressed store for lab reports.
+
+    Layout under root:
+    - objects/ab/<sha256>.md  one file per distinct report content
+    - index.json              session_id -> list of report versions
+    - <name>.md               hard link (or copy, where links are not
+                              supported) to the object, for browsing
+
+    Storing content that is byte-identical to the latest version of the
+    session reuses that version and its file instead of writing a new one.
+
+    Methods block on disk I/O; async callers run them on the file I/O pool.
+    Index read-modify-writes and compaction hold a lock on root/.lock
+    (flock, so the server and the compact-reports CLI exclude each other)
+    and re-read index.json whenever another process changed it.
+    """
+
+    def __init__(self, root: str = "lab_reports"):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index.json"
+        self.lock_path = self.root / ".lock"
+        self.deduplicated = 0
+        self._index: Optional[Dict[str, Any]] = None
+        self._index_stamp: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_file = None
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the store lock (thread lock plus, outermost, the cross-process file lock)"""
+        with self._lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                self.root.mkdir(parents=True, exist_ok=True)
+                self._lock_file = open(self.lock_path, "a+b")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_file is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def write(self,
+              session_id: str,
+              name: str,
+              chunks: Iterable[str],
+              preview_chars: int = 300) -> StoredReport:
+        """
+        Stream a report into the store.
+
+        Args:
+            session_id: Session the report belongs to
+            name: File name of the human-readable copy (e.g. report_<ts>.md)
+            chunks: Rendered markdown chunks
+            preview_chars: Number of leading characters to keep as a preview
+
+        Returns:
+            The stored report
+        """
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.objects_dir / f"tmp-{uuid4().hex}"
+
+        digest = hashlib.sha256()
+        size = 0
+        preview = []
+        preview_len = 0
+
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    data = chunk.encode("utf-8")
+                    digest.update(data)
+                    f.write(data)
+                    size += len(data)
+                    if preview_len < preview_chars:
+                        preview.append(chunk[:preview_chars - preview_len])
+                        preview_len += len(preview[-1])
+
+            stored = self._add(session_id, name, tmp_path, digest.hexdigest(), size)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        stored.preview = "".join(preview)
+        return stored
+
+    def put_file(self, session_id: str, path: Path) -> StoredReport:
+        """
+        Move an existing report file into the store (the file is kept as the
+        human-readable link).
+        """
+        path = Path(path)
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.objects_dir / f"tmp-{uuid4().hex}"
+        os.replace(path, tmp_path)
+        try:
+            return self._add(session_id, path.name, tmp_path, digest.hexdigest(), tmp_path.stat().st_size)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def versions(self, session_id: str) -> List[Dict[str, Any]]:
+        """All stored versions of a session's report, oldest first"""
+        with self._lock:
+            return list(self._load()["sessions"].get(session_id, []))
+
+    def latest(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """The newest version of a session's report"""
+        with self._lock:
+            versions = self._load()["sessions"].get(session_id)
+            return versions[-1] if versions else None
+
+    def object_path(self, digest: str) -> Path:
+        """Path of the object holding some content"""
+        return self.objects_dir / digest[:2] / f"{digest}.md"
+
+    def path_for(self, version: Dict[str, Any]) -> Path:
+        """Readable file of a version, or its object if the link was compacted away"""
+        if version.get("linked"):
+            return self.root / version["file"]
+        return self.object_path(version["digest"])
+
+    def compact(self, keep_links: int = 1) -> Dict[str, int]:
+        """
+        Compact the reports directory.
+
+        - Adopts legacy flat report files into the object store
+        - Collapses consecutive identical versions of a session
+        - Keeps readable links only for the newest keep_links versions of
+          each session (older versions stay reachable via the index)
+        - Deletes objects no version references and temp files older than
+          TMP_GRACE_SECONDS (younger ones may be in-flight writes)
+
+        Returns:
+            Counters describing the work done
+        """
+        with self._locked():
+            return self._compact_locked(keep_links)
+
+    def _compact_locked(self, keep_links: int) -> Dict[str, int]:
+        index = self._load()
+        stats = {
+            "adopted": 0,
+            "duplicates_removed": 0,
+            "links_removed": 0,
+            "objects_removed": 0,
+            "bytes_freed": 0
+        }
+
+        if self.root.exists():
+            for path in sorted(self.root.glob("*.md")):
+                match = LEGACY_REPORT_PATTERN.search(path.name)
+                if match is None or not path.is_file() or self._is_indexed(path):
+                    continue
+                size = path.stat().st_size
+                stored = self.put_file(match.group("session_id"), path)
+                stats["adopted"] += 1
+                if stored.deduplicated:
+                    stats["duplicates_removed"] += 1
+                    stats["bytes_freed"] += size
+
+        for session_id, versions in index["sessions"].items():
+            collapsed = []
+            for version in versions:
+                if collapsed and collapsed[-1]["digest"] == version["digest"]:
+                    stats["duplicates_removed"] += 1
+                    stats["links_removed"] += self._unlink(version)
+                    continue
+                collapsed.append(version)
+
+            for version in collapsed[:max(len(collapsed) - keep_links, 0)]:
+                stats["links_removed"] += self._unlink(version)
+            index["sessions"][session_id] = collapsed
+
+        referenced = {
+            version["digest"]
+            for versions in index["sessions"].values()
+            for version in versions
+        }
+        if self.objects_dir.exists():
+            cutoff = time.time() - TMP_GRACE_SECONDS
+            for path in self.objects_dir.glob("tmp-*"):
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                except FileNotFoundError:
+                    continue
+            for path in self.objects_dir.glob("*/*.md"):
+                if path.stem not in referenced:
+                    stats["bytes_freed"] += path.stat().st_size
+                    path.unlink()
+                    stats["objects_removed"] += 1
+            for shard in self.objects_dir.iterdir():
+                if shard.is_dir() and not any(shard.iterdir()):
+                    shard.rmdir()
+
+        self._save()
+        return stats
+
+    def _add(self, session_id: str, name: str, tmp_path: Path, digest: str, size: int) -> StoredReport:
+        """Move a hashed temp file into place and record the version"""
+        with self._locked():
+            return self._add_locked(session_id, name, tmp_path, digest, size)
+
+    def _add_locked(self, session_id: str, name: str, tmp_path: Path, digest: str, size: int) -> StoredReport:
+        object_path = self.object_path(digest)
+        deduplicated = object_path.exists()
+        if not deduplicated:
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, object_path)
+
+        versions = self._load()["sessions"].setdefault(session_id, [])
+        latest = versions[-1] if versions else None
+        if latest is not None and latest["digest"] == digest and latest.get("linked"):
+            self.deduplicated += 1
+            return StoredReport(digest, self.root / latest["file"], object_path, size, True)
+
+        link_path = self.root / name
+        self._link(object_path, link_path)
+        versions.append({
+            "digest": digest,
+            "file": name,
+            "size": size,
+            "linked": True,
+            "created_at": datetime.now().isoformat()
+        })
+        self._save()
+
+        if deduplicated:
+            self.deduplicated += 1
+        return StoredReport(digest, link_path, object_path, size, deduplicated)
+
+    def _link(self, object_path: Path, link_path: Path) -> None:
+        """Expose an object under a readable name"""
+        if link_path.exists():
+            if os.path.samefile(object_path, link_path):
+                return
+            link_path.unlink()
+        try:
+            os.link(object_path, link_path)
+        except OSError:
+            shutil.copyfile(object_path, link_path)
+
+    def _unlink(self, version: Dict[str, Any]) -> int:
+        """Remove the readable link of a version"""
+        if not version.get("linked"):
+            return 0
+        version["linked"] = False
+        path = self.root / version["file"]
+        if path.exists():
+            path.unlink()
+            return 1
+        return 0
+
+    def _is_indexed(self, path: Path) -> bool:
+        """Whether a file in the reports directory is a link of a stored version"""
+        match = LEGACY_REPORT_PATTERN.search(path.name)
+        versions = self._load()["sessions"].get(match.group("session_id"), []) if match else []
+        return any(v["file"] == path.name and v.get("linked") for v in versions)
+
+    def _load(self) -> Dict[str, Any]:
+        """Load the index, re-reading it when another process has replaced it"""
+        stamp = self._stat_index()
+        if self._index is None or stamp != self._index_stamp:
+            self._index = {"sessions": {}}
+            if stamp is not None:
+                try:
+                    with open(self.index_path, encoding="utf-8") as f:
+                        self._index = json.load(f)
+                except (OSError, ValueError):
+                    pass
+            self._index_stamp = stamp
+        return self._index
+
+    def _save(self) -> None:
+        """Atomically write the index"""
+        index = self._load()
+        with atomic_writer(self.index_path) as f:
+            json.dump(index, f, ensure_ascii=False)
+        self._index_stamp = self._stat_index()
+
+    def _stat_index(self) -> Optional[Tuple[int, int, int]]:
+        """Identity of the current index file (changes whenever it is replaced)"""
+        try:
+            stat = self.index_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point: python -m src.utils.report_store compact"""
+    parser = argparse.ArgumentParser(description="Manage the lab report store")
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--root", default="lab_reports", help="Reports directory")
+    parser.add_argument("--keep-links", type=int, default=1,
+                        help="Readable files kept per session (default: 1)")
+    args = parser.parse_args(argv)
+
+    stats = ReportStore(args.root).compact(keep_links=args.keep_links)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
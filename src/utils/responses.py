@@ -0,0 +1,62 @@
+"""JSON responses encoded with orjson when it is installed"""
+
+from typing import Any
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+import json
+import math
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json fallback
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode content as compact UTF-8 JSON.
+
+    Uses orjson when available; types neither encoder supports natively
+    (pydantic models, sets, ...) go through FastAPI's jsonable_encoder.
+    NaN and Infinity are encoded as null either way, as orjson does.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+    try:
+        return _stdlib_dumps(content)
+    except ValueError:  # Non-finite float somewhere (rare): redo with nulls
+        return _stdlib_dumps(_null_non_finite(jsonable_encoder(content)))
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    return json.dumps(
+        content,
+        default=jsonable_encoder,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _null_non_finite(value: Any) -> Any:
+    """Replace NaN/Infinity floats in decoded JSON data with None"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _null_non_finite(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_null_non_finite(item) for item in value]
+    return value
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with dumps().
+
+    Handlers that build plain dicts return it directly, so FastAPI skips
+    jsonable_encoder and response_model validation for payloads we
+    produced ourselves.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
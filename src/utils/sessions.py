@@ -0,0 +1,202 @@
+"""In-memory experiment session store"""
+
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Dict, Any, Callable, Iterator, List, Optional
+from datetime import datetime
+import time
+from src.agents.history import AgentMessage, TurnLog
+from src.utils.analytics import AnalyticsSink
+
+
+class SessionStore(MutableMapping):
+    """
+    Bounded store of active experiment sessions.
+
+    Behaves like a dict of session_id -> session data, with conversations
+    kept in a columnar TurnLog. Two high-water marks keep it from growing
+    for the life of the process:
+    - max_sessions: least recently used sessions are evicted first
+    - max_turns: oldest turns of a session are dropped first
+
+    Every session carries a version that is bumped on each change, and
+    change listeners are told when a session changes or is removed.
+
+    Turns, observations and Wolfram results are also appended to the
+    analytics sink (if any), which outlives session eviction.
+    """
+
+    def __init__(self, max_sessions: int, max_turns: int, analytics: Optional[AnalyticsSink] = None):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.analytics = analytics
+        self.evicted_sessions = 0
+        self.evicted_turns = 0
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._listeners: List[Callable[[str], None]] = []
+
+    def on_change(self, listener: Callable[[str], None]) -> None:
+        """Call listener(session_id) whenever a session changes or is removed"""
+        self._listeners.append(listener)
+
+    def create(self, session_id: str, experiment_id: str, student_name: str = "Student") -> Dict[str, Any]:
+        """
+        Register a new session.
+
+        Args:
+            session_id: Unique session identifier
+            experiment_id: Experiment being run
+            student_name: Display name of the student
+
+        Returns:
+            The new session data
+        """
+        now = datetime.now().isoformat()
+        self[session_id] = {
+            "session_id": session_id,
+            "experiment_id": experiment_id,
+            "student_name": student_name,
+            "conversation": TurnLog(),
+            "observations": {},
+            "wolfram_results": [],
+            "timestamp": now,
+            "updated_at": now,
+            "version": 0
+        }
+        return self._sessions[session_id]
+
+    def record_turn(self,
+                    session_id: str,
+                    role: str,
+                    sender: str,
+                    content: str,
+                    step: Optional[int] = None,
+                    timestamp: Optional[float] = None,
+                    latency_ms: Optional[float] = None) -> None:
+        """
+        Append a conversation turn to a session (no-op for unknown sessions).
+
+        Args:
+            session_id: Session to record into
+            role: Speaker role
+            sender: Speaker name
+            content: Message text
+            step: Experiment step (optional)
+            timestamp: When the turn happened (epoch seconds, defaults to now)
+            latency_ms: Time taken to produce the turn (agent turns)
+        """
+        session = self.get(session_id)
+        if session is None:
+            return
+
+        timestamp = timestamp if timestamp is not None else time.time()
+        conversation = session["conversation"]
+        conversation.append(
+            AgentMessage(
+                sender=sender,
+                content=content,
+                role=role,
+                metadata={"latency_ms": latency_ms} if latency_ms is not None else None,
+                timestamp=timestamp
+            ),
+            step=step
+        )
+        self._touch(session)
+
+        if self.analytics is not None:
+            self.analytics.append("turns", {
+                **self._analytics_keys(session),
+                "role": role,
+                "sender": sender,
+                "step": step,
+                "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+                "latency_ms": latency_ms,
+                "content_chars": len(content),
+                "content": content
+            })
+
+        self.evicted_turns += conversation.trim(self.max_turns)
+
+    def record_observation(self, session_id: str, key: str, value: Any) -> None:
+        """Store a student observation for a session"""
+        session = self.get(session_id)
+        if session is not None and key not in session["observations"]:
+            session["observations"][key] = value
+            self._touch(session)
+
+            if self.analytics is not None:
+                self.analytics.append("observations", {
+                    **self._analytics_keys(session),
+                    "key": key,
+                    "value": value,
+                    "timestamp": session["updated_at"]
+                })
+
+    def record_wolfram_result(self, session_id: str, result: Dict[str, Any]) -> None:
+        """Store a Wolfram computation summary for a session"""
+        session = self.get(session_id)
+        if session is not None:
+            session["wolfram_results"].append(result)
+            self._touch(session)
+
+            if self.analytics is not None:
+                self.analytics.append("wolfram_results", {
+                    **self._analytics_keys(session),
+                    **result,
+                    "timestamp": session["updated_at"]
+                })
+
+    def evict_to(self, max_sessions: int) -> int:
+        """
+        Evict least recently used sessions down to max_sessions.
+
+        Returns:
+            Number of evicted sessions
+        """
+        evicted = 0
+        while len(self._sessions) > max_sessions:
+            session_id, _ = self._sessions.popitem(last=False)
+            self._notify(session_id)
+            evicted += 1
+        self.evicted_sessions += evicted
+        return evicted
+
+    def _touch(self, session: Dict[str, Any]) -> None:
+        """Mark a session as changed"""
+        session["updated_at"] = datetime.now().isoformat()
+        session["version"] += 1
+        self._notify(session["session_id"])
+
+    @staticmethod
+    def _analytics_keys(session: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "session_id": session["session_id"],
+            "experiment_id": session["experiment_id"],
+            "student_name": session["student_name"]
+        }
+
+    def _notify(self, session_id: str) -> None:
+        for listener in self._listeners:
+            listener(session_id)
+
+    def __getitem__(self, session_id: str) -> Dict[str, Any]:
+        session = self._sessions[session_id]
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def __setitem__(self, session_id: str, session: Dict[str, Any]) -> None:
+        if session_id in self._sessions:
+            self._notify(session_id)
+        self._sessions[session_id] = session
+        self._sessions.move_to_end(session_id)
+        self.evict_to(self.max_sessions)
+
+    def __delitem__(self, session_id: str) -> None:
+        del self._sessions[session_id]
+        self._notify(session_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._sessions))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -1,5 +1,11 @@
 """Wolfram engine module"""
 
 from src.wolfram_engine.engine import WolframEngine, ComputationResult, wolfram_engine
+from src.wolfram_engine.graphs import GraphStore, graph_store, graph_url
+from src.wolfram_engine.curves import CURVES, CurveError, curve_delta
 
-__all__ = ["WolframEngine", "ComputationResult", "wolfram_engine"]
+__all__ = [
+    "WolframEngine", "ComputationResult", "wolfram_engine",
+    "GraphStore", "graph_store", "graph_url",
+    "CURVES", "CurveError", "curve_delta"
+]
@@ -0,0 +1,137 @@
+"""Incremental curve data: full point arrays once, then only appended points"""
+
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, List, Mapping, Optional, Tuple
+from src.utils.pagination import PaginationError, decode_cursor, encode_cursor
+from src.wolfram_engine.engine import WolframEngine
+import hashlib
+import json
+
+Point = Tuple[float, float]
+
+CURVE_PRECISION = 4  # Decimal places of transmitted coordinates
+
+
+class CurveError(ValueError):
+    """Unknown curve, invalid parameters or a cursor from another curve"""
+
+
+@dataclass(frozen=True)
+class CurveSpec:
+    """A curve WolframEngine can sample, and the parameters it takes"""
+    params: Tuple[str, ...]
+    x_label: str
+    y_label: str
+    sample: Callable[[WolframEngine, Mapping[str, float]], List[Point]]
+
+
+CURVES: Dict[str, CurveSpec] = {
+    "titration": CurveSpec(
+        params=("acid_concentration", "acid_volume", "base_concentration"),
+        x_label="Volume of Base (mL)",
+        y_label="pH",
+        sample=lambda engine, p: engine.titration_curve(
+            p["acid_concentration"], p["acid_volume"], p["base_concentration"]
+        )
+    ),
+    "hookes_law": CurveSpec(
+        params=("spring_constant", "max_displacement"),
+        x_label="Displacement (m)",
+        y_label="Force (N)",
+        sample=lambda engine, p: engine.hookes_curve(p["spring_constant"], p["max_displacement"])
+    )
+}
+
+
+def params_fingerprint(curve: str, params: Mapping[str, float]) -> str:
+    """Short hash identifying a curve's shape"""
+    raw = json.dumps([curve, sorted(params.items())], separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def check_params(curve: str, params: Mapping[str, Any]) -> Dict[str, float]:
+    """
+    Validate the parameters of a curve.
+
+    Raises:
+        CurveError: Unknown curve, or a missing, unexpected or non-positive parameter
+    """
+    spec = CURVES.get(curve)
+    if spec is None:
+        raise CurveError(f"Unknown curve: {curve}")
+
+    unexpected = set(params) - set(spec.params)
+    if unexpected:
+        raise CurveError(f"Unexpected parameters: {', '.join(sorted(unexpected))}")
+
+    checked = {}
+    for name in spec.params:
+        value = params.get(name)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not value > 0:
+            raise CurveError(f"{name} must be a positive number")
+        checked[name] = float(value)
+    return checked
+
+
+def curve_delta(engine: WolframEngine,
+                curve: str,
+                params: Mapping[str, Any],
+                upto: Optional[float] = None,
+                cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Points of a curve the client does not have yet.
+
+    The first call (no cursor), or a call whose parameters change the
+    curve's shape, returns the labels, parameters and all points up to
+    `upto` ("full"). Later calls with the returned cursor only return
+    the points revealed since ("append"), e.g. as a student adds titrant
+    step by step. Coordinates are sent as two parallel JSON arrays.
+
+    Args:
+        engine: Engine that samples the curve
+        curve: Curve name (see CURVES)
+        params: Curve parameters
+        upto: Reveal points with x <= upto (None: the whole curve)
+        cursor: Cursor returned by the previous call
+
+    Returns:
+        Delta with x/y arrays, revealed/total counts and the next cursor
+
+    Raises:
+        CurveError: Invalid curve, parameters or cursor
+    """
+    checked = check_params(curve, params)
+    fingerprint = params_fingerprint(curve, checked)
+
+    try:
+        position = decode_cursor(cursor)
+    except PaginationError as e:
+        raise CurveError(str(e))
+
+    points = CURVES[curve].sample(engine, checked)
+    revealed = len(points) if upto is None else sum(1 for x, _ in points if x <= upto)
+
+    sent = position.get("n")
+    if position.get("f") == fingerprint and isinstance(sent, int) and 0 <= sent <= revealed:
+        delta: Dict[str, Any] = {"curve": curve, "mode": "append"}
+        start = sent
+    else:
+        spec = CURVES[curve]
+        delta = {
+            "curve": curve,
+            "mode": "full",
+            "params": checked,
+            "x_label": spec.x_label,
+            "y_label": spec.y_label
+        }
+        start = 0
+
+    new_points = points[start:revealed]
+    delta.update({
+        "x": [round(x, CURVE_PRECISION) for x, _ in new_points],
+        "y": [round(y, CURVE_PRECISION) for _, y in new_points],
+        "revealed": revealed,
+        "total": len(points),
+        "cursor": encode_cursor({"f": fingerprint, "n": revealed})
+    })
+    return delta
@@ -0,0 +1,60 @@
+"""Visual downsampling of plotted series (Largest-Triangle-Three-Buckets)"""
+
+from typing import List, Sequence, Tuple
+
+Point = Tuple[float, float]
+
+
+def lttb(points: Sequence[Point], threshold: int) -> List[Point]:
+    """
+    Reduce a series to at most `threshold` points while keeping its shape.
+
+    Keeps the first and last points and, from each of threshold - 2
+    equal buckets in between, the point forming the largest triangle
+    with the previously kept point and the average of the next bucket,
+    so peaks and dips survive. Runs in O(n).
+
+    Args:
+        points: (x, y) pairs sorted by x
+        threshold: Maximum number of points to keep (values < 3 keep everything)
+
+    Returns:
+        Downsampled points (the input as a list when already small enough)
+    """
+    count = len(points)
+    if threshold < 3 or count <= threshold:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (count - 2) / (threshold - 2)
+    kept = 0  # Index of the last kept point
+
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # Average of the next bucket (the last point for the final bucket)
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        if next_start >= next_end:
+            avg_x, avg_y = points[-1]
+        else:
+            span = next_end - next_start
+            avg_x = sum(p[0] for p in points[next_start:next_end]) / span
+            avg_y = sum(p[1] for p in points[next_start:next_end]) / span
+
+        kept_x, kept_y = points[kept]
+        best_area = -1.0
+        best = start
+        for i in range(start, end):
+            x, y = points[i]
+            area = abs((kept_x - avg_x) * (y - kept_y) - (kept_x - x) * (avg_y - kept_y))
+            if area > best_area:
+                best_area = area
+                best = i
+
+        sampled.append(points[best])
+        kept = best
+
+    sampled.append(points[-1])
+    return sampled
@@ -1,9 +1,9 @@
 """Wolfram computation engine for experiment simulations"""
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 from src.config import settings
-import base64
+from src.wolfram_engine.downsampling import lttb
 import json
 
 
@@ -12,7 +12,7 @@ class ComputationResult:
     """Result from Wolfram computation"""
     query: str
     result: str
-    graph_svg: Optional[str] = None
+    graph_svg: Optional[str] = None  # SVG markup (served by id, see src/wolfram_engine/graphs.py)
     numeric_result: Optional[float] = None
 
 
@@ -327,24 +327,60 @@ class WolframEngine:
             graph_svg=self._generate_sensor_graph(sensor_data, "Pressure", "atm")
         )
     
-    def _generate_dynamic_titration_graph(self, acid_conc: float, acid_vol: float, base_conc: float) -> str:
-        """Generate dynamic titration curve based on actual parameters"""
-        import math
+    def titration_curve(self,
+                        acid_conc: float,
+                        acid_vol: float,
+                        base_conc: float,
+                        points: int = 50) -> List[Tuple[float, float]]:
+        """
+        Sample a titration curve.
 
-        # Calculate points for titration curve
-        points = []
-        max_vol = (acid_conc * acid_vol / base_conc) * 2.5
+        Args:
+            acid_conc: Molarity of acid (M)
+            acid_vol: Volume of acid (mL)
+            base_conc: Molarity of base (M)
+            points: Number of samples from 0 to 2.5x the equivalence volume
+
+        Returns:
+            (volume of base in mL, pH) pairs
+        """
+        equiv_vol = acid_conc * acid_vol / base_conc
+        max_vol = equiv_vol * 2.5
 
-        for i in range(50):
-            vol = (i / 49.0) * max_vol
+        curve = []
+        for i in range(points):
+            vol = (i / max(points - 1, 1)) * max_vol
             # Simplified pH calculation
-            if vol < (acid_conc * acid_vol / base_conc) * 0.9:
+            if vol < equiv_vol * 0.9:
                 pH = 3 + (vol / max_vol) * 3
-            elif vol < (acid_conc * acid_vol / base_conc) * 1.1:
+            elif vol < equiv_vol * 1.1:
                 pH = 3 + (vol / max_vol) * 8
             else:
                 pH = 10 + (vol / max_vol) * 2
+            curve.append((vol, pH))
+        return curve
+
+    def hookes_curve(self, k: float, max_x: float, points: int = 20) -> List[Tuple[float, float]]:
+        """
+        Sample a force-displacement line F = kx.
 
+        Args:
+            k: Spring constant (N/m)
+            max_x: Maximum displacement (m)
+            points: Number of samples from 0 to max_x
+
+        Returns:
+            (displacement in m, force in N) pairs
+        """
+        return [(x, k * x) for x in ((i / max(points - 1, 1)) * max_x for i in range(points))]
+
+    def _generate_dynamic_titration_graph(self, acid_conc: float, acid_vol: float, base_conc: float) -> str:
+        """Generate dynamic titration curve based on actual parameters"""
+        # Calculate points for titration curve
+        points = []
+        max_vol = (acid_conc * acid_vol / base_conc) * 2.5
+
+        for vol, pH in self.titration_curve(acid_conc, acid_vol, base_conc):
             x = 50 + (vol / max_vol) * 300
             y = 250 - (pH / 14.0) * 200
             points.append(f"{x:.1f},{y:.1f}")
@@ -365,18 +401,15 @@ class WolframEngine:
             <text x="350" y="255" font-size="10">{max_vol:.1f}</text>
         </svg>"""
 
-        return base64.b64encode(svg.encode()).decode()
+        return svg
 
     def _generate_dynamic_hookes_graph(self, k: float, max_x: float) -> str:
         """Generate dynamic Hooke's Law graph based on actual parameters"""
         points = []
+        max_force = k * max_x
 
-        for i in range(20):
-            x = (i / 19.0) * max_x
-            force = k * x
-
+        for x, force in self.hookes_curve(k, max_x):
             px = 50 + (x / max_x) * 300
-            max_force = k * max_x
             py = 250 - (force / max_force) * 200 if max_force > 0 else 250
             points.append(f"{px:.1f},{py:.1f}")
 
@@ -396,7 +429,7 @@ class WolframEngine:
             <text x="30" y="55" font-size="10">{(k*max_x):.1f}</text>
         </svg>"""
 
-        return base64.b64encode(svg.encode()).decode()
+        return svg
 
     def _generate_dynamic_osmosis_graph(self, concentration: float, temp: float, pressure: float) -> str:
         """Generate dynamic osmosis visualization"""
@@ -427,7 +460,7 @@ class WolframEngine:
             <text x="130" y="{240-bar_height/2}" font-size="11" fill="red">π</text>
         </svg>"""
 
-        return base64.b64encode(svg.encode()).decode()
+        return svg
 
     def _generate_sample_graph(self, graph_type: str) -> str:
         """
@@ -438,18 +471,18 @@ class WolframEngine:
             graph_type: Type of graph
 
         Returns:
-            Base64 encoded SVG
+            SVG markup
         """
         svg_map = {
             "titration": self._generate_dynamic_titration_graph(0.1, 25.0, 0.1),
             "hookes_law": self._generate_dynamic_hookes_graph(50.0, 0.1),
             "osmosis": self._generate_dynamic_osmosis_graph(0.5, 298.0, 12.2),
-            "custom": base64.b64encode(b"""<svg width="400" height="300" xmlns="http://www.w3.org/2000/svg">
+            "custom": """<svg width="400" height="300" xmlns="http://www.w3.org/2000/svg">
                 <rect width="400" height="300" fill="white"/>
                 <text x="200" y="20" text-anchor="middle" font-size="16" font-weight="bold">Computation Result</text>
                 <circle cx="200" cy="150" r="50" fill="none" stroke="purple" stroke-width="2"/>
                 <text x="200" y="155" text-anchor="middle" font-size="14">Result</text>
-            </svg>""").decode()
+            </svg>"""
         }
 
         return svg_map.get(graph_type, svg_map["custom"])
@@ -488,7 +521,7 @@ class WolframEngine:
             <text x="{indicator_x}" y="165" text-anchor="middle" font-size="14" font-weight="bold">pH = {ph:.2f}</text>
         </svg>"""
 
-        return base64.b64encode(svg.encode()).decode()
+        return svg
 
     def _generate_concentration_graph(self, molarity: float, moles: float, volume: float) -> str:
         """Generate molarity visualization"""
@@ -507,7 +540,7 @@ class WolframEngine:
             <text x="200" y="240" text-anchor="middle" font-size="11">{moles} mol in {volume} L</text>
         </svg>"""
 
-        return base64.b64encode(svg.encode()).decode()
+        return svg
 
     def _generate_energy_graph(self, k: float, x: float, energy: float) -> str:
         """Generate spring energy visualization"""
@@ -527,7 +560,7 @@ class WolframEngine:
             <text x="280" y="{120+min(80, int(x*400))}" font-size="10">x={x}m</text>
         </svg>"""
 
-        return base64.b64encode(svg.encode()).decode()
+        return svg
 
     def _generate_sensor_graph(self, data: List[tuple], label: str, unit: str) -> str:
         """Generate IoT sensor data time-series graph"""
@@ -540,9 +573,10 @@ class WolframEngine:
         max_val = max(values)
         val_range = max_val - min_val if max_val != min_val else 1
 
-        # Generate polyline points
+        # Generate polyline points (long runs downsampled to the pixel budget)
         points = []
-        for i, (time, value) in enumerate(data):
+        series = lttb([(i, value) for i, (_, value) in enumerate(data)], settings.graph_max_points)
+        for i, value in series:
             x = 50 + (i / max(len(data) - 1, 1)) * 300
             y = 250 - ((value - min_val) / val_range) * 180
             points.append(f"{x:.1f},{y:.1f}")
@@ -577,7 +611,7 @@ class WolframEngine:
             <text x="345" y="270" font-size="10">{len(data)}</text>
         </svg>"""
 
-        return base64.b64encode(svg.encode()).decode()
+        return svg
 
 
 # Global Wolfram engine instance
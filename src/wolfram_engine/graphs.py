@@ -0,0 +1,124 @@
+"""Content-addressed store of rendered graphs, served as image/svg+xml"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Union
+from src.config import settings
+from src.utils.file_io import atomic_write
+import hashlib
+import re
+import threading
+
+GRAPH_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def graph_id(svg: Union[str, bytes]) -> str:
+    """Content hash identifying a graph"""
+    data = svg.encode("utf-8") if isinstance(svg, str) else svg
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def graph_url(graph_id: str) -> str:
+    """Path the graph is served from"""
+    return f"/graphs/{graph_id}.svg"
+
+
+class GraphStore:
+    """
+    Rendered graphs keyed by the hash of their SVG.
+
+    Identical parameters render identical SVG, so every session asking
+    for the same graph gets the same id and URL, and clients can cache
+    it indefinitely. Least recently used graphs are dropped from memory
+    once the stored SVG exceeds max_bytes.
+
+    With a directory, every graph is also written to
+    <directory>/<id[:2]>/<id>.svg and read back when it is not in memory,
+    so graph links in reports survive eviction, restarts and other
+    server workers. put() and get() then block on disk I/O; async
+    callers run them on the file I/O pool.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, directory: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory else None
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_reads = 0
+
+        self._graphs: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, svg: Union[str, bytes]) -> str:
+        """
+        Store a graph (no-op if the same SVG is already stored).
+
+        Returns:
+            The graph id
+        """
+        data = svg.encode("utf-8") if isinstance(svg, str) else svg
+        key = graph_id(data)
+        with self._lock:
+            if key in self._graphs:
+                self._graphs.move_to_end(key)
+                return key
+        if self.directory is not None:
+            path = self._path(key)
+            if not path.exists():
+                atomic_write(path, data)
+        self._remember(key, data)
+        return key
+
+    def get(self, graph_id: str) -> Optional[bytes]:
+        """SVG bytes of a graph, or None if unknown (or evicted, without a directory)"""
+        with self._lock:
+            data = self._graphs.get(graph_id)
+            if data is not None:
+                self._graphs.move_to_end(graph_id)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        if self.directory is None or not GRAPH_ID_PATTERN.fullmatch(graph_id):
+            return None
+        try:
+            data = self._path(graph_id).read_bytes()
+        except FileNotFoundError:
+            return None
+        self.disk_reads += 1
+        self._remember(graph_id, data)
+        return data
+
+    def stats(self) -> Dict[str, int]:
+        """Store counters"""
+        return {
+            "graphs": len(self._graphs),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_reads": self.disk_reads
+        }
+
+    def _path(self, graph_id: str) -> Path:
+        return self.directory / graph_id[:2] / f"{graph_id}.svg"
+
+    def _remember(self, key: str, data: bytes) -> None:
+        """Keep a graph in memory, dropping the least recently used past max_bytes"""
+        with self._lock:
+            if key in self._graphs:
+                self._graphs.move_to_end(key)
+                return
+            self._graphs[key] = data
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes and len(self._graphs) > 1:
+                _, evicted = self._graphs.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def __len__(self) -> int:
+        return len(self._graphs)
+
+
+# Shared graph store
+graph_store = GraphStore(max_bytes=settings.graph_store_max_bytes, directory=settings.graph_dir)
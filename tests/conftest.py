@@ -1,9 +1,32 @@
 """Test fixtures and conftest"""
+import shutil
+import tempfile
 import pytest
+from pathlib import Path
 from fastapi.testclient import TestClient
+from src.config import settings
 from src.agents import PartnerAgent, MentorAgent, EvaluatorAgent
 from src.scenarios import get_scenario
 
+# Everything the app writes goes to a temp tree, not the repo's lab_reports/.
+# Set before app.py (and its module-level stores) is imported.
+_output_root = Path(tempfile.mkdtemp(prefix="lab-tests-"))
+settings.reports_dir = str(_output_root / "lab_reports")
+settings.jobs_dir = str(_output_root / "lab_reports" / "jobs")
+settings.analytics_dir = str(_output_root / "lab_reports" / "analytics")
+settings.profile_dir = str(_output_root / "lab_reports" / "profiles")
+settings.export_cache_dir = str(_output_root / "lab_reports" / "exports" / "cache")
+settings.bulk_export_dir = str(_output_root / "lab_reports" / "exports" / "bulk")
+settings.scenario_cache_dir = str(_output_root / "lab_reports" / "cache" / "scenarios")
+settings.graph_dir = str(_output_root / "lab_reports" / "graphs")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def output_root():
+    """Temp tree the app writes reports, jobs, exports and analytics to"""
+    yield _output_root
+    shutil.rmtree(_output_root, ignore_errors=True)
+
 
 @pytest.fixture
 def client():
@@ -12,6 +35,14 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture
+def admin_headers(monkeypatch):
+    """Headers for admin endpoints (with an admin token configured)"""
+    from src.config import settings
+    monkeypatch.setattr(settings, "admin_token", "test-admin-token")
+    return {"X-Admin-Token": "test-admin-token"}
+
+
 @pytest.fixture
 def partner_agent():
     """Partner agent fixture"""
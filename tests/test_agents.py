@@ -84,3 +84,78 @@ async def test_agent_clear_history(mentor_agent):
     
     mentor_agent.clear_history()
     assert len(mentor_agent.conversation_history) == 0
+
+
+@pytest.mark.asyncio
+async def test_agent_history_high_water_mark(mentor_agent):
+    """Test history is trimmed past the high-water mark"""
+    from src.agents.base import AgentMessage
+
+    mentor_agent.max_history = 3
+    for i in range(5):
+        mentor_agent.add_to_history(AgentMessage(sender="Test", content=f"Message {i}", role="test"))
+
+    assert len(mentor_agent.conversation_history) == 3
+    assert mentor_agent.get_history()[0].content == "Message 2"
+
+
+def test_turn_log_is_compact():
+    """Test the columnar turn log behaves like a list and uses less memory"""
+    from dataclasses import make_dataclass
+    from src.agents.history import AgentMessage, TurnLog
+    from src.utils.memory import estimate_size
+
+    # Layout of the previous message representation: regular dataclass per turn
+    LegacyMessage = make_dataclass("LegacyMessage", ["sender", "content", "role", ("metadata", dict, None)])
+
+    log = TurnLog()
+    legacy = []
+    for i in range(500):
+        sender, role = ("Student", "student") if i % 2 == 0 else ("Alex", "partner")
+        log.append(AgentMessage(sender=sender, content=f"Turn {i}", role=role), step=i // 50 + 1)
+        legacy.append(LegacyMessage(sender, f"Turn {i}", role))
+
+    assert len(log) == 500
+    assert log[-1].content == "Turn 499"
+    assert [m.content for m in log[:2]] == ["Turn 0", "Turn 1"]
+    assert log.step(100) == 3
+    assert log.to_dicts()[1]["sender"] == "Alex"
+    assert estimate_size(log) < estimate_size(legacy) / 2
+
+
+def test_turn_log_iteration_survives_trimming():
+    """Test iterating while old turns are trimmed skips them instead of failing"""
+    from src.agents.history import AgentMessage, TurnLog
+
+    log = TurnLog()
+    for i in range(10):
+        log.append(AgentMessage(sender="Student", content=f"Turn {i}", role="student",
+                                metadata={"i": i} if i % 3 == 0 else None))
+
+    seen = []
+    for seq, turn in log.iter_items():
+        seen.append(seq)
+        if seq == 2:
+            log.drop_oldest(5)  # Turns 0-4 go away mid-iteration
+            log.append(AgentMessage(sender="Student", content="Late", role="student"))
+    assert seen == [0, 1, 2, 5, 6, 7, 8, 9]
+    assert log[1].metadata == {"i": 6}
+
+    assert log.trim(20) == 0
+    for i in range(20):
+        log.append(AgentMessage(sender="Student", content=f"More {i}", role="student"))
+    assert log.trim(20) == 8  # Overflow of 6, plus a tenth of the limit
+    assert len(log) == 18
+
+
+def test_agents_share_one_ai_client():
+    """Test per-session agents reuse the shared AI client instead of opening their own"""
+    from src.agents import AgentPool, EvaluatorAgent, shared_ai_client
+
+    pool = AgentPool(max_sessions=2)
+    first, second = pool.get("s1"), pool.get("s2")
+    assert first.partner is not second.partner
+    assert first.partner.client is second.mentor.client is EvaluatorAgent().client is shared_ai_client()
+
+    pool.get("s3")
+    assert "s1" not in pool and len(pool) == 2
@@ -1,6 +1,8 @@
 """Test API endpoints"""
 import pytest
 import json
+import re
+import time
 
 
 def test_root_endpoint(client):
@@ -131,3 +133,482 @@ def test_experiment_workflow(client):
     assert complete_response.status_code == 200
     complete_data = complete_response.json()
     assert complete_data["status"] == "completed"
+    assert "job_id" in complete_data
+
+    # 4. Report job is tracked
+    job_response = client.get(f"/jobs/{complete_data['job_id']}")
+    assert job_response.status_code == 200
+    assert job_response.json()["kind"] == "lab_report"
+
+
+def test_admin_profile_session(client, admin_headers):
+    """Test on-demand profiling start/stop"""
+    start_response = client.post("/admin/profile/start", params={"duration_seconds": 30}, headers=admin_headers)
+    assert start_response.status_code == 200
+    assert start_response.json()["running"] is True
+
+    status_response = client.get("/admin/profile", headers=admin_headers)
+    assert status_response.json()["running"] is True
+
+    stop_response = client.post("/admin/profile/stop", headers=admin_headers)
+    assert stop_response.status_code == 200
+    data = stop_response.json()
+    assert data["running"] is False
+    assert data["profile_file"].endswith(".prof")
+
+
+@pytest.mark.asyncio
+async def test_streamed_requests_profiled_until_body_ends(tmp_path, monkeypatch):
+    """Test slow-request timing covers a streamed body, not just the headers"""
+    import asyncio
+    import app as app_module
+    from starlette.requests import Request
+    from src.config import settings
+    from src.utils.profiling import RequestProfiler
+
+    profiler = RequestProfiler(str(tmp_path), slow_threshold_ms=50, sample_rate=1.0, max_session_seconds=10)
+    monkeypatch.setattr(app_module, "request_profiler", profiler)
+    monkeypatch.setattr(settings, "slow_request_threshold_ms", 50)
+
+    async def slow_body():
+        yield b"head"
+        await asyncio.sleep(0.1)
+        yield b"tail"
+
+    request = Request({"type": "http", "method": "GET", "path": "/simulate/interact/batch", "query_string": b"", "headers": []})
+    profile = profiler.start_request_profile()
+    body = app_module.profiled_body(slow_body(), request, profile, time.perf_counter(), 200)
+    assert [chunk async for chunk in body] == [b"head", b"tail"]
+
+    entry = json.loads((tmp_path / "slow_requests.log").read_text())
+    assert entry["duration_ms"] >= 100
+    assert entry["profile_file"].endswith(".prof")
+    next_profile = profiler.start_request_profile()  # The profiler was released
+    assert next_profile is not None
+    next_profile.disable()
+
+
+def test_admin_requires_token_or_loopback(client, admin_headers, monkeypatch):
+    """Test admin endpoints reject remote clients without the configured token"""
+    from src.config import settings
+
+    assert client.get("/admin/profile").status_code == 403
+    assert client.get("/admin/profile", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    monkeypatch.setattr(settings, "admin_token", None)
+    assert client.get("/admin/profile").status_code == 403  # TestClient is not a loopback client
+
+
+def test_admin_memory_report(client, admin_headers):
+    """Test memory accounting endpoints"""
+    response = client.get("/admin/memory", headers=admin_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert "sessions" in data["subsystems"]
+    assert "partner_history" in data["subsystems"]
+    assert data["high_water_marks"]["max_sessions"] > 0
+
+    baseline = client.post("/admin/memory/snapshot", headers=admin_headers).json()
+    assert baseline["top_growth"] == []
+    diff = client.post("/admin/memory/snapshot", headers=admin_headers).json()
+    assert diff["previous_snapshot"] is not None
+    client.post("/admin/memory/tracemalloc/stop", headers=admin_headers)
+
+
+def test_stream_session_report(client):
+    """Test GET /sessions/{id}/report streams markdown"""
+    session_id = client.post(
+        "/simulate/start",
+        json={"experiment_id": "osmosis", "student_name": "Bio Student"}
+    ).json()["session_id"]
+
+    response = client.get(f"/sessions/{session_id}/report")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/markdown")
+    assert f"**Session ID:** `{session_id}`" in response.text
+    assert "### Dialogue Transcript" in response.text
+
+
+def test_export_report_writes_files(client):
+    """Test POST /export/report writes exports off the event loop"""
+    session_id = client.post(
+        "/simulate/start",
+        json={"experiment_id": "hookes_law", "student_name": "Physics Student"}
+    ).json()["session_id"]
+
+    response = client.post(
+        "/export/report",
+        params={"session_id": session_id, "experiment_id": "hookes_law", "format": "json"}
+    )
+    assert response.status_code == 200
+    with open(response.json()["file_path"], encoding="utf-8") as f:
+        exported = json.load(f)
+    assert exported["session_id"] == session_id
+    assert exported["conversation"][0]["role"] == "partner"
+
+    response = client.post(
+        "/export/report",
+        params={"session_id": session_id, "experiment_id": "hookes_law", "format": "csv"}
+    )
+    assert response.status_code == 200
+    assert response.json()["file_path"].endswith(".csv")
+
+
+def test_download_session_export_streams(client):
+    """Test GET /sessions/{id}/export streams each format and a zip bundle"""
+    import csv
+    import io
+    import zipfile
+
+    session_id = client.post(
+        "/simulate/start",
+        json={"experiment_id": "osmosis", "student_name": "Bio Student"}
+    ).json()["session_id"]
+
+    response = client.get(f"/sessions/{session_id}/export", params={"format": "json"})
+    assert response.status_code == 200
+    assert "attachment" in response.headers["content-disposition"]
+    data = response.json()
+    assert data["session_id"] == session_id
+    assert data["conversation"][0]["role"] == "partner"
+
+    response = client.get(f"/sessions/{session_id}/export", params={"format": "csv"})
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["Type", "Speaker", "Content", "Timestamp"]
+    assert rows[1][0] == "partner"
+    assert rows[1][3].startswith(data["conversation"][0]["timestamp"][:10])
+
+    response = client.get(f"/sessions/{session_id}/export", params={"format": "html"})
+    assert response.text.lstrip().startswith("<!DOCTYPE html>")
+    assert response.text.rstrip().endswith("</html>")
+
+    response = client.get(f"/sessions/{session_id}/export", params={"format": "all"})
+    assert response.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert sorted(name.rsplit(".", 1)[1] for name in archive.namelist()) == ["csv", "html", "json", "md"]
+    markdown = client.get(f"/sessions/{session_id}/export").text
+    md_name = next(name for name in archive.namelist() if name.endswith(".md"))
+    # The report is dated at render time, so mask the date line when comparing two renders
+    mask_date = lambda text: re.sub(r"\*\*Date:\*\* .*", "**Date:** <masked>", text)
+    assert mask_date(archive.read(md_name).decode("utf-8")) == mask_date(markdown)
+
+    assert client.get(f"/sessions/{session_id}/export", params={"format": "pdf"}).status_code == 400
+    assert client.get("/sessions/missing/export").status_code == 404
+
+
+def test_export_report_cached_by_session_version(client):
+    """Test /export/report reuses artifacts until the session changes"""
+    from app import active_sessions
+
+    session_id = client.post(
+        "/simulate/start",
+        json={"experiment_id": "hookes_law", "student_name": "Physics Student"}
+    ).json()["session_id"]
+    params = {"session_id": session_id, "experiment_id": "hookes_law", "format": "markdown"}
+
+    first = client.post("/export/report", params=params)
+    assert first.status_code == 200
+    assert first.json()["cached"] is False
+    etag = first.headers["etag"]
+
+    second = client.post("/export/report", params=params)
+    assert second.json()["cached"] is True
+    assert second.json()["file_path"] == first.json()["file_path"]
+    assert second.headers["etag"] == etag
+
+    assert client.post("/export/report", params=params, headers={"If-None-Match": etag}).status_code == 412
+    assert client.post("/export/report", params={**params, "experiment_id": "osmosis"}).status_code == 400
+
+    active_sessions.record_observation(session_id, "step_1", "The spring stretched 4 cm")
+
+    third = client.post("/export/report", params=params, headers={"If-None-Match": etag})
+    assert third.status_code == 200
+    assert third.json()["cached"] is False
+    assert third.headers["etag"] != etag
+    with open(third.json()["file_path"], encoding="utf-8") as f:
+        assert "The spring stretched 4 cm" in f.read()
+
+
+def test_export_etag_changes_with_scenario(client):
+    """Test a scenario reload changes the export ETag of an unchanged session"""
+    import dataclasses
+    from src.scenarios import SCENARIOS, register_scenario
+
+    session_id = client.post("/simulate/start", json={"experiment_id": "osmosis"}).json()["session_id"]
+    params = {"session_id": session_id, "experiment_id": "osmosis", "format": "markdown"}
+    etag = client.post("/export/report", params=params).headers["etag"]
+
+    original = SCENARIOS["osmosis"]
+    register_scenario("osmosis", dataclasses.replace(original, description="Revised description"))
+    try:
+        reloaded = client.post("/export/report", params=params, headers={"If-None-Match": etag})
+        assert reloaded.status_code == 200
+        assert reloaded.headers["etag"] != etag
+    finally:
+        register_scenario("osmosis", original)
+
+
+def test_bulk_export_job():
+    """Test POST /export/bulk renders sessions into one archive"""
+    import io
+    import time
+    import zipfile
+    from fastapi.testclient import TestClient
+    from app import app, bulk_exporter
+
+    with TestClient(app) as client:
+        session_ids = [
+            client.post(
+                "/simulate/start",
+                json={"experiment_id": experiment_id, "student_name": "Student"}
+            ).json()["session_id"]
+            for experiment_id in ("osmosis", "hookes_law")
+        ]
+
+        response = client.post("/export/bulk", json={"session_ids": session_ids, "formats": ["markdown", "json"]})
+        assert response.status_code == 200
+        assert response.json()["sessions"] == 2
+        job_id = response.json()["job_id"]
+
+        for _ in range(120):
+            job = client.get(f"/jobs/{job_id}").json()
+            if job["status"] in ("succeeded", "failed"):
+                break
+            time.sleep(0.25)
+        assert job["status"] == "succeeded", job
+        assert job["progress"] == 1.0
+        assert job["result"]["files"] == 4
+
+        archive = zipfile.ZipFile(io.BytesIO(client.get(f"/export/bulk/{job_id}/download").content))
+        names = archive.namelist()
+        assert sorted(name.split("/")[0] for name in names) == sorted(session_ids * 2)
+        report = next(name for name in names if name.startswith(session_ids[0]) and name.endswith(".md"))
+        assert f"**Session ID:** `{session_ids[0]}`" in archive.read(report).decode("utf-8")
+        assert not list(bulk_exporter.snapshot_dir.glob("*.json"))
+
+        assert client.post("/export/bulk", json={"formats": ["pdf"]}).status_code == 400
+        since = client.post("/export/bulk", json={"since": "2000-01-01T00:00:00+00:00", "formats": ["csv"]})
+        assert since.status_code == 200
+
+        retention = bulk_exporter.retention_seconds
+        bulk_exporter.retention_seconds = -1
+        try:
+            assert bulk_exporter.prune() >= 1
+        finally:
+            bulk_exporter.retention_seconds = retention
+        assert client.get(f"/export/bulk/{job_id}/download").status_code == 410
+
+
+def test_experiment_catalog_conditional_and_compressed(client):
+    """Test catalog responses carry strong ETags, honor If-None-Match and are pre-compressed"""
+    from dataclasses import replace
+    from src.scenarios import get_scenario, register_scenario
+
+    first = client.get("/experiments/hookes_law", headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    assert "content-encoding" not in first.headers
+    etag = first.headers["etag"]
+    assert not etag.startswith("W/")
+    assert "max-age" in first.headers["cache-control"]
+
+    compressed = client.get("/experiments/hookes_law", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json() == first.json()
+
+    assert client.get("/experiments/hookes_law", headers={"If-None-Match": etag}).status_code == 304
+    listing_etag = client.get("/experiments").headers["etag"]
+    assert client.get("/experiments", headers={"If-None-Match": listing_etag}).status_code == 304
+
+    scenario = get_scenario("hookes_law")
+    try:
+        register_scenario("hookes_law", replace(scenario, title="Hooke's Law Revisited"))
+        changed = client.get("/experiments/hookes_law", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.json()["title"] == "Hooke's Law Revisited"
+        assert client.get("/experiments", headers={"If-None-Match": listing_etag}).status_code == 200
+    finally:
+        register_scenario("hookes_law", scenario)
+
+
+def test_search_experiments(client):
+    """Test GET /experiments/search"""
+    response = client.get("/experiments/search", params={"q": "titra"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["results"][0]["id"] == "acid_base_titration"
+    assert data["facets"]["subject"]["chemistry"] == 1
+
+    filtered = client.get("/experiments/search", params={"subject": "physics"}).json()
+    assert [r["id"] for r in filtered["results"]] == ["hookes_law"]
+
+    assert client.get("/experiments/search", params={"limit": 0}).status_code == 400
+
+
+def test_catalog_pagination_and_fields(client):
+    """Test cursor pages and fields= projection of the catalog endpoints"""
+    first = client.get("/experiments", params={"limit": 2, "fields": "id,title"}).json()
+    assert [e["id"] for e in first["experiments"]] == ["acid_base_titration", "hookes_law"]
+    assert set(first["experiments"][0]) == {"id", "title"}
+
+    second = client.get("/experiments", params={"limit": 2, "cursor": first["next_cursor"], "fields": "id"}).json()
+    assert second == {"experiments": [{"id": "osmosis"}], "next_cursor": None}
+
+    details = client.get("/experiments/hookes_law", params={"fields": "title,steps.title"}).json()
+    assert set(details) == {"title", "steps"}
+    assert set(details["steps"][0]) == {"title"}
+
+    assert client.get("/experiments", params={"fields": "secret"}).status_code == 400
+    assert client.get("/experiments", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/experiments/hookes_law", params={"fields": "steps.nope"}).status_code == 400
+
+
+def test_session_history_pages(client):
+    """Test GET /sessions/{id}/history pages turns with stable sequence numbers"""
+    from app import active_sessions
+
+    session_id = client.post(
+        "/simulate/start",
+        json={"experiment_id": "osmosis", "student_name": "Biology Student"}
+    ).json()["session_id"]
+    for i in range(4):
+        active_sessions.record_turn(session_id, "student", "Student", f"Message {i}", step=1)
+
+    page = client.get(f"/sessions/{session_id}/history", params={"limit": 3, "fields": "seq,content"}).json()
+    assert page["total"] == 5
+    assert [t["seq"] for t in page["turns"]] == [0, 1, 2]
+    assert set(page["turns"][0]) == {"seq", "content"}
+
+    active_sessions[session_id]["conversation"].drop_oldest(2)
+    rest = client.get(f"/sessions/{session_id}/history", params={"cursor": page["next_cursor"]}).json()
+    assert [t["content"] for t in rest["turns"]] == ["Message 2", "Message 3"]
+    assert [t["seq"] for t in rest["turns"]] == [3, 4]
+    assert rest["next_cursor"] is None
+
+    assert client.get("/sessions/missing/history").status_code == 404
+
+
+def test_responses_compressed_above_threshold(client):
+    """Test dynamic responses are compressed when large and accepted, streams included"""
+    from app import active_sessions
+
+    session_id = client.post(
+        "/simulate/start",
+        json={"experiment_id": "hookes_law", "student_name": "Physics Student"}
+    ).json()["session_id"]
+    for i in range(20):
+        active_sessions.record_turn(session_id, "student", "Student", f"The spring stretched {i} cm", step=2)
+
+    compressed = client.get(f"/sessions/{session_id}/history", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["vary"]
+    assert compressed.json()["total"] == 21
+
+    plain = client.get(f"/sessions/{session_id}/history", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == compressed.json()
+
+    small = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    streamed = client.get(f"/sessions/{session_id}/export", params={"format": "markdown"},
+                          headers={"Accept-Encoding": "gzip"})
+    assert streamed.headers["content-encoding"] == "gzip"
+    assert "The spring stretched 19 cm" in streamed.text
+
+
+def test_graph_served_by_content_hash(client):
+    """Test rendered graphs are immutable SVG assets with ETag/304"""
+    from app import graph_store
+
+    svg = '<svg xmlns="http://www.w3.org/2000/svg"><circle r="4"/></svg>'
+    graph_id = graph_store.put(svg)
+
+    response = client.get(f"/graphs/{graph_id}.svg")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("image/svg+xml")
+    assert "immutable" in response.headers["cache-control"]
+    assert response.text == svg
+
+    cached = client.get(f"/graphs/{graph_id}.svg", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+    assert client.get("/graphs/unknown.svg").status_code == 404
+
+
+def test_graphs_survive_eviction_and_compression_weakens_etag(client):
+    """Test graphs are read back from disk once evicted, and gzipped graphs carry a weak ETag"""
+    from app import graph_store
+
+    svg = '<svg xmlns="http://www.w3.org/2000/svg">' + '<circle r="4"/>' * 200 + '</svg>'
+    graph_id = graph_store.put(svg)
+    graph_store._graphs.clear()
+    graph_store.total_bytes = 0
+
+    response = client.get(f"/graphs/{graph_id}.svg", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.text == svg
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == f'W/"{graph_id}"'
+
+    cached = client.get(f"/graphs/{graph_id}.svg", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+    assert client.get("/graphs/..%2F..%2Fsecret.svg").status_code == 404
+
+
+def test_simulate_curve_deltas(client):
+    """Test POST /simulate/curve returns the full curve once, then appended points"""
+    params = {"spring_constant": 300, "max_displacement": 0.1}
+
+    first = client.post("/simulate/curve", json={"curve": "hookes_law", "params": params, "upto": 0.05})
+    assert first.status_code == 200
+    first = first.json()
+    assert first["mode"] == "full"
+
+    rest = client.post("/simulate/curve", json={
+        "curve": "hookes_law", "params": params, "cursor": first["cursor"]
+    }).json()
+    assert rest["mode"] == "append"
+    assert len(first["x"]) + len(rest["x"]) == rest["total"]
+
+    assert client.post("/simulate/curve", json={"curve": "unknown", "params": {}}).status_code == 404
+    assert client.post("/simulate/curve", json={"curve": "hookes_law", "params": {}}).status_code == 400
+
+
+def test_batch_interact_streams_ndjson(client):
+    """Test POST /simulate/interact/batch replays sessions concurrently, in order per session"""
+    sessions = [
+        client.post("/simulate/start", json={"experiment_id": "hookes_law"}).json()["session_id"]
+        for _ in range(2)
+    ]
+    turns = [
+        {"session_id": session_id, "experiment_id": "hookes_law",
+         "student_message": f"Reading {i} for {session_id}", "current_step": i}
+        for i in (1, 2) for session_id in sessions
+    ]
+    turns.append({"session_id": "ghost", "experiment_id": "missing", "student_message": "hi"})
+    turns.append({"session_id": "never-started", "experiment_id": "hookes_law", "student_message": "hi"})
+
+    response = client.post("/simulate/interact/batch", json={"turns": turns, "concurrency": 2})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == list(range(len(turns)))
+    by_index = {line["index"]: line for line in lines}
+    assert by_index[4]["status"] == 404
+    assert by_index[5]["status"] == 404 and by_index[5]["session_id"] == "never-started"
+    assert all(by_index[i]["status"] == 200 for i in range(4))
+
+    for session_id in sessions:
+        history = client.get(f"/sessions/{session_id}/history").json()
+        students = [t["content"] for t in history["turns"] if t["role"] == "student"]
+        assert students == [f"Reading 1 for {session_id}", f"Reading 2 for {session_id}"]
+
+    # Each session's agents only saw that session's turns
+    from app import session_agents
+    for session_id in sessions:
+        memory = session_agents.get(session_id).partner.experiment_memory
+        assert memory["step_2_observation"] == f"Reading 2 for {session_id}"
+
+    assert client.post("/simulate/interact/batch", json={"turns": [], "concurrency": 1000}).status_code == 400
+    assert client.post("/simulate/interact/batch", json={"turns": [], "concurrency": 0}).status_code == 400
@@ -0,0 +1,145 @@
+"""Test GitBook integration against a local fake GitBook server"""
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from src.integrations import GitBookIntegration, GitBookClient, GitBookAPIError
+
+
+@pytest_asyncio.fixture
+async def fake_gitbook():
+    """Local fake GitBook API: first call is rate limited, then pages are created"""
+    state = {"calls": 0, "fail_with": None}
+
+    async def create_page(request):
+        state["calls"] += 1
+        if state["fail_with"]:
+            return web.Response(status=state["fail_with"])
+        if state["calls"] == 1:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        body = await request.json()
+        assert request.headers["Authorization"] == "Bearer test-key"
+        return web.json_response({
+            "uid": "page-123",
+            "spaceId": request.match_info["space_id"],
+            "path": body["title"].lower().replace(" ", "-")
+        })
+
+    app = web.Application()
+    app.router.add_post("/v1/spaces/{space_id}/content", create_page)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+
+    state["base_url"] = f"http://{host}:{port}/v1"
+    yield state
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_client_retries_rate_limited_requests(fake_gitbook):
+    """Test 429 responses are retried honoring Retry-After"""
+    client = GitBookClient(fake_gitbook["base_url"], "test-key", retry_backoff_seconds=0.01)
+
+    response = await client.post("/spaces/space-1/content", {"title": "Lab Report"})
+    assert response["uid"] == "page-123"
+    assert fake_gitbook["calls"] == 2
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_client_gives_up_after_max_retries(fake_gitbook):
+    """Test persistent 5xx responses raise after max_retries"""
+    fake_gitbook["fail_with"] = 503
+    client = GitBookClient(fake_gitbook["base_url"], "test-key", max_retries=2, retry_backoff_seconds=0.01)
+
+    with pytest.raises(GitBookAPIError) as exc_info:
+        await client.post("/spaces/space-1/content", {"title": "Lab Report"})
+    assert exc_info.value.status_code == 503
+    assert fake_gitbook["calls"] == 3
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_report_published_to_fake_gitbook(fake_gitbook, tmp_path, monkeypatch):
+    """Test a lab report is saved locally and published through the pooled client"""
+    monkeypatch.chdir(tmp_path)
+    integration = GitBookIntegration(
+        client=GitBookClient(fake_gitbook["base_url"], "test-key", retry_backoff_seconds=0.01)
+    )
+    integration.api_key = "test-key"
+    integration.space_id = "space-1"
+
+    response = await integration.create_experiment_report(
+        session_id="session-1",
+        experiment_name="Hooke's Law",
+        scenario_data={"learning_objectives": [], "materials": [], "steps": []},
+        conversation_history=[{"sender": "Student", "content": "Hello", "role": "student"}],
+        observations={},
+        wolfram_results=[],
+        evaluation={"feedback": "Good work"}
+    )
+
+    assert response["success"] is True
+    assert response["page_id"] == "page-123"
+    assert response["gitbook_url"].startswith("https://app.gitbook.com/space-1/")
+    assert (tmp_path / response["local_file"]).exists()
+    await integration.client.aclose()
+
+
+def test_streamed_report_matches_built_report(tmp_path):
+    """Test the streaming renderer writes the same document chunk by chunk"""
+    from src.integrations.report import iter_comprehensive_report, write_chunks
+
+    conversation = [
+        {"sender": "Student" if i % 2 == 0 else "Alex", "content": f"Turn {i}", "role": "student"}
+        for i in range(1000)
+    ]
+    args = ("session-1", "Titration", {"learning_objectives": ["Learn"], "materials": ["Burette"]},
+            conversation, {"step_1_observation": "pink"}, [], {"detailed_feedback": "Nice"})
+
+    chunks = list(iter_comprehensive_report(*args, timestamp="2024-01-01 00:00:00"))
+    assert len(chunks) > 1000
+
+    path = tmp_path / "report.md"
+    preview = write_chunks(path, iter(chunks))
+    document = path.read_text(encoding="utf-8")
+    assert document == "".join(chunks)
+    assert preview == document[:300]
+    assert "**Alex** (student):\n> Turn 999" in document
+
+    # Generators work as transcript input
+    streamed = "".join(iter_comprehensive_report(
+        *args[:3], (turn for turn in conversation), *args[4:], timestamp="2024-01-01 00:00:00"
+    ))
+    assert streamed == document
+
+
+def test_report_templates_compiled_once_and_invalidated():
+    """Test static report sections are cached until the scenario changes"""
+    from dataclasses import replace
+    from src.integrations.report import (
+        ReportTemplateCache, iter_comprehensive_report, scenario_report_data
+    )
+    from src.scenarios import get_scenario, register_scenario, on_scenario_change
+
+    cache = ReportTemplateCache()
+    on_scenario_change(cache.invalidate)
+    scenario = get_scenario("hookes_law")
+
+    template = cache.get("hookes_law", scenario)
+    assert cache.get("hookes_law", scenario) is template
+    assert cache.compilations == 1
+
+    args = ("s1", scenario.title, scenario_report_data(scenario), [], {}, [], {})
+    assert "".join(iter_comprehensive_report(*args, timestamp="t", template=template)) == \
+        "".join(iter_comprehensive_report(*args, timestamp="t"))
+
+    try:
+        register_scenario("hookes_law", replace(scenario, materials=["Spring", "Laser"]))
+        updated = cache.get("hookes_law", get_scenario("hookes_law"))
+        assert cache.compilations == 2
+        assert "- Laser" in updated.report_sections
+    finally:
+        register_scenario("hookes_law", scenario)
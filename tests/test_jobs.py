@@ -0,0 +1,139 @@
+"""Test background jobs"""
+import asyncio
+import json
+import pytest
+from src.jobs import JobQueue, PermanentJobError
+
+
+async def wait_for_job(queue, job_id, timeout=5.0):
+    """Poll until a job has finished"""
+    for _ in range(int(timeout / 0.01)):
+        job = await queue.get(job_id)
+        if job.finished:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+async def wait_for_path(path, exists=True, timeout=5.0):
+    """Poll until a file is written (or removed): job state is persisted off the loop"""
+    for _ in range(int(timeout / 0.01)):
+        if path.exists() == exists:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{path} {'missing' if exists else 'still exists'}")
+
+
+@pytest.mark.asyncio
+async def test_job_succeeds_and_persists(tmp_path):
+    """Test a job runs in the background and its state is persisted"""
+    queue = JobQueue(str(tmp_path), workers=2)
+
+    async def handler(job):
+        return {"doubled": job.payload["value"] * 2}
+
+    queue.register("double", handler)
+    job = await queue.submit("double", {"value": 21})
+    assert job.status == "queued"
+
+    job = await wait_for_job(queue, job.job_id)
+    assert job.status == "succeeded"
+    assert job.result == {"doubled": 42}
+
+    path = tmp_path / "finished" / f"{job.job_id}.json"
+    await wait_for_path(path)
+    persisted = json.loads(path.read_text())
+    assert persisted["status"] == "succeeded"
+    assert "payload" not in persisted
+    assert not (tmp_path / f"{job.job_id}.json").exists()
+    await queue.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_job_retries_then_fails(tmp_path):
+    """Test failing jobs are retried up to max_attempts"""
+    queue = JobQueue(str(tmp_path), max_attempts=3, retry_backoff_seconds=0.01)
+    calls = []
+
+    async def flaky(job):
+        calls.append(job.attempts)
+        if len(calls) < 2:
+            raise RuntimeError("temporary failure")
+        return {"ok": True}
+
+    async def broken(job):
+        raise RuntimeError("permanent failure")
+
+    async def rejected(job):
+        raise PermanentJobError("do not retry")
+
+    queue.register("flaky", flaky)
+    queue.register("broken", broken)
+    queue.register("rejected", rejected)
+
+    flaky_job = await wait_for_job(queue, (await queue.submit("flaky", {})).job_id)
+    assert flaky_job.status == "succeeded"
+    assert flaky_job.attempts == 2
+
+    broken_job = await wait_for_job(queue, (await queue.submit("broken", {})).job_id)
+    assert broken_job.status == "failed"
+    assert broken_job.attempts == 3
+    assert broken_job.error == "permanent failure"
+
+    rejected_job = await wait_for_job(queue, (await queue.submit("rejected", {})).job_id)
+    assert rejected_job.status == "failed"
+    assert rejected_job.attempts == 1
+    await queue.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_unfinished_jobs_are_recovered(tmp_path):
+    """Test persisted unfinished jobs are re-queued by a new queue"""
+    first = JobQueue(str(tmp_path))
+    first.register("noop", lambda job: asyncio.sleep(10))
+    job = await first.submit("noop", {"value": 7})
+    await first.update_progress(job, 0.5)
+    await first.shutdown()
+    assert "payload" not in json.loads((tmp_path / f"{job.job_id}.json").read_text())
+
+    second = JobQueue(str(tmp_path))
+
+    async def handler(job):
+        return {"recovered": job.payload["value"]}
+
+    second.register("noop", handler)
+    second.ensure_started()
+    recovered = await wait_for_job(second, job.job_id)
+    assert recovered.result == {"recovered": 7}
+    await wait_for_path(tmp_path / f"{job.job_id}.payload", exists=False)
+    await second.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_finished_job_files_expire(tmp_path):
+    """Test finished job files are pruned at startup and stay readable until then"""
+    import os
+    import time
+
+    queue = JobQueue(str(tmp_path), retention_seconds=60)
+
+    async def handler(job):
+        return {"ok": True}
+
+    queue.register("noop", handler)
+    job = await wait_for_job(queue, (await queue.submit("noop", {})).job_id)
+
+    path = tmp_path / "finished" / f"{job.job_id}.json"
+    await wait_for_path(path)
+    await queue.shutdown()
+
+    restarted = JobQueue(str(tmp_path), retention_seconds=60)
+    assert (await restarted.get(job.job_id)).result == {"ok": True}
+
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    restarted.ensure_started()
+    await restarted._recovery_task
+    assert not path.exists()
+    assert await restarted.get(job.job_id) is None
+    await restarted.shutdown()
@@ -54,3 +54,238 @@ def test_scenario_safety_notes(osmosis_scenario):
     for note in osmosis_scenario.safety_notes:
         assert isinstance(note, str)
         assert len(note) > 0
+
+
+def test_compiled_scenario_turns(hookes_law_scenario):
+    """Test compiled scenarios index steps and precompute progress"""
+    import dataclasses
+    from src.scenarios import get_compiled_scenario, register_scenario
+
+    compiled = get_compiled_scenario("hookes_law")
+    assert compiled.step_count == 4
+    assert get_compiled_scenario("hookes_law") is compiled
+
+    turn = compiled.turn(2)
+    assert turn.step is hookes_law_scenario.get_step(2)
+    assert turn.progress == 0.5
+    assert (turn.next_step, turn.next_progress, turn.is_final) == (3, 75.0, False)
+    assert compiled.turn(4).is_final and compiled.turn(4).next_step == 4
+
+    fallback = compiled.turn(9)
+    assert fallback.step is hookes_law_scenario.steps[0]
+    assert fallback.next_step == 4
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        compiled.title = "Changed"
+
+    try:
+        register_scenario("hookes_law", dataclasses.replace(hookes_law_scenario, steps=hookes_law_scenario.steps[:2]))
+        assert get_compiled_scenario("hookes_law").step_count == 2
+    finally:
+        register_scenario("hookes_law", hookes_law_scenario)
+    assert get_compiled_scenario("missing") is None
+
+
+def test_scenario_catalog_files(tmp_path):
+    """Test file-based scenarios load lazily, reuse the compiled cache and hot reload"""
+    import os
+    from src.scenarios import SCENARIOS, ScenarioCatalog, get_scenario, parse_scenario, ScenarioLoadError
+
+    scenarios_dir = tmp_path / "scenarios"
+    scenarios_dir.mkdir()
+    definition = scenarios_dir / "ohms_law.yaml"
+    definition.write_text(
+        "title: Ohm's Law\n"
+        "description: Relate voltage, current and resistance.\n"
+        "subject: physics\n"
+        "level: beginner\n"
+        "duration_minutes: 30\n"
+        "learning_objectives: [Measure resistance]\n"
+        "materials: [Battery, Resistor, Multimeter]\n"
+        "steps:\n"
+        "  - title: Build the circuit\n"
+        "    instructions: Connect the resistor to the battery\n"
+        "  - title: Measure\n"
+        "    instructions: Record voltage and current\n",
+        encoding="utf-8"
+    )
+    catalog = ScenarioCatalog(str(scenarios_dir), str(tmp_path / "cache"))
+
+    try:
+        assert catalog.refresh() == {"added": ["ohms_law"], "updated": [], "removed": []}
+        assert "ohms_law" in SCENARIOS and not SCENARIOS.is_loaded("ohms_law")
+        scenario = get_scenario("ohms_law")
+        assert scenario.title == "Ohm's Law"
+        assert [s.step_number for s in scenario.steps] == [1, 2]
+        assert SCENARIOS.is_loaded("ohms_law")
+
+        restarted = ScenarioCatalog(str(scenarios_dir), str(tmp_path / "cache"))
+        assert restarted.refresh()["added"] == ["ohms_law"]
+        assert restarted.compilations == 0
+
+        definition.write_text(definition.read_text(encoding="utf-8").replace("Ohm's Law", "Ohm's Law II"), encoding="utf-8")
+        os.utime(definition, ns=(0, 10**18))
+        assert restarted.refresh()["updated"] == ["ohms_law"]
+        assert get_scenario("ohms_law").title == "Ohm's Law II"
+
+        definition.write_text("title: [broken", encoding="utf-8")
+        assert restarted.refresh() == {"added": [], "updated": [], "removed": []}
+        assert "ohms_law.yaml" in restarted.errors
+        assert get_scenario("ohms_law").title == "Ohm's Law II"
+
+        definition.unlink()
+        assert restarted.refresh()["removed"] == ["ohms_law"]
+        assert get_scenario("ohms_law") is None
+    finally:
+        SCENARIOS.pop("ohms_law", None)
+
+    with pytest.raises(ScenarioLoadError):
+        parse_scenario({"title": "No steps", "description": "x", "subject": "physics",
+                        "duration_minutes": 5, "learning_objectives": [], "materials": [], "steps": []}, "empty")
+
+
+def test_scenario_search_index(hookes_law_scenario):
+    """Test prefix search, facets, ranking and incremental re-indexing"""
+    from dataclasses import replace
+    from src.scenarios import ScenarioSearchIndex, SCENARIOS
+
+    registry = dict(SCENARIOS.items())
+    index = ScenarioSearchIndex(lambda: registry)
+
+    result = index.search("spr")
+    assert [r["id"] for r in result["results"]] == ["hookes_law"]
+    assert result["facets"]["subject"] == {"physics": 1}
+
+    everything = index.search("", limit=2)
+    assert everything["total"] == 3 and len(everything["results"]) == 2
+    assert index.search("", offset=2)["results"] == index.search("")["results"][2:]
+    assert index.search("", subject="biology")["results"][0]["id"] == "osmosis"
+    assert index.search("", level="advanced")["total"] == 0
+    assert index.search("spring titration")["total"] == 0
+
+    indexed = index.indexed
+    registry["hookes_law"] = replace(hookes_law_scenario, title="Elastic Bands", materials=["Rubber band"])
+    index.invalidate("hookes_law")
+    assert index.search("rubber")["results"][0]["id"] == "hookes_law"
+    assert index.indexed == indexed + 1
+
+    del registry["osmosis"]
+    index.invalidate("osmosis")
+    assert index.search("osmosis")["total"] == 0
+    assert len(index) == 2
+
+
+def test_scenario_search_skips_scenarios_that_fail_to_load():
+    """Test a lazy scenario whose loader fails is left out of the index instead of failing the search"""
+    from src.scenarios import ScenarioLoadError, ScenarioRegistry, ScenarioSearchIndex, SCENARIOS
+
+    def broken():
+        raise ScenarioLoadError("broken.yaml: missing")
+
+    registry = ScenarioRegistry(dict(SCENARIOS.items()))
+    registry.set_loader("broken", broken)
+    index = ScenarioSearchIndex(lambda: registry)
+
+    assert index.search("")["total"] == 3
+    assert index.search("osmo")["results"][0]["id"] == "osmosis"
+
+
+def test_scenario_search_uses_compiled_documents(tmp_path):
+    """Test file-defined scenarios are searchable without loading their bodies"""
+    from src.scenarios import SCENARIOS, ScenarioCatalog, ScenarioSearchIndex
+
+    scenarios_dir = tmp_path / "scenarios"
+    scenarios_dir.mkdir()
+    (scenarios_dir / "pendulum.json").write_text(
+        '{"title": "Pendulum", "description": "Swing.", "subject": "physics", "duration_minutes": 20,'
+        ' "learning_objectives": ["Time a swing"], "materials": ["String"],'
+        ' "steps": [{"title": "Swing", "instructions": "Release the bob"}]}',
+        encoding="utf-8"
+    )
+    catalog = ScenarioCatalog(str(scenarios_dir), str(tmp_path / "cache"))
+
+    try:
+        catalog.refresh()
+        restarted = ScenarioCatalog(str(scenarios_dir), str(tmp_path / "cache"))
+        restarted.refresh()
+        assert restarted.compilations == 0
+
+        index = ScenarioSearchIndex(lambda: SCENARIOS, documents=restarted.search_document)
+        result = index.search("pend")
+        assert [r["id"] for r in result["results"]] == ["pendulum"]
+        assert result["results"][0]["subject"] == "physics"
+        assert index.search("bob")["total"] == 1
+        assert not SCENARIOS.is_loaded("pendulum")
+        assert index.search("osmo")["results"][0]["id"] == "osmosis"
+    finally:
+        SCENARIOS.pop("pendulum", None)
+
+
+def test_scenario_catalog_overrides_and_duplicates(tmp_path):
+    """Test deleting an override restores the built-in and duplicate ids are rejected"""
+    from src.scenarios import BUILTIN_SCENARIOS, ScenarioCatalog, get_scenario, register_scenario
+
+    definition = (
+        "id: hookes_law\n"
+        "title: {title}\n"
+        "description: Springs.\n"
+        "subject: physics\n"
+        "duration_minutes: 20\n"
+        "learning_objectives: [Stretch]\n"
+        "materials: [Spring]\n"
+        "steps:\n"
+        "  - title: Hang\n"
+        "    instructions: Hang a mass\n"
+    )
+    scenarios_dir = tmp_path / "scenarios"
+    scenarios_dir.mkdir()
+    first = scenarios_dir / "a_springs.yaml"
+    second = scenarios_dir / "b_springs.yaml"
+    first.write_text(definition.format(title="Springs A"), encoding="utf-8")
+    second.write_text(definition.format(title="Springs B"), encoding="utf-8")
+    catalog = ScenarioCatalog(str(scenarios_dir), str(tmp_path / "cache"))
+
+    try:
+        assert catalog.refresh()["added"] == ["hookes_law"]
+        assert get_scenario("hookes_law").title == "Springs A"
+        assert "duplicate id 'hookes_law'" in catalog.errors["b_springs.yaml"]
+
+        first.unlink()
+        catalog.refresh()
+        assert get_scenario("hookes_law").title == "Springs B"
+        assert "b_springs.yaml" not in catalog.errors
+
+        second.unlink()
+        assert catalog.refresh()["updated"] == ["hookes_law"]
+        assert get_scenario("hookes_law") is BUILTIN_SCENARIOS["hookes_law"]
+    finally:
+        register_scenario("hookes_law", BUILTIN_SCENARIOS["hookes_law"])
+
+
+def test_scenario_file_removed_before_first_use(tmp_path):
+    """Test a lazily registered scenario whose file disappears reads as missing and is reported"""
+    import shutil
+    from src.scenarios import SCENARIOS, ScenarioCatalog, get_compiled_scenario, get_scenario
+
+    scenarios_dir = tmp_path / "scenarios"
+    scenarios_dir.mkdir()
+    definition = scenarios_dir / "pendulum.json"
+    definition.write_text(
+        '{"title": "Pendulum", "description": "Swing.", "subject": "physics", "duration_minutes": 20,'
+        ' "learning_objectives": ["Time a swing"], "materials": ["String"],'
+        ' "steps": [{"title": "Swing", "instructions": "Release the bob"}]}',
+        encoding="utf-8"
+    )
+    catalog = ScenarioCatalog(str(scenarios_dir), str(tmp_path / "cache"))
+
+    try:
+        assert catalog.refresh()["added"] == ["pendulum"]
+        definition.unlink()
+        shutil.rmtree(tmp_path / "cache")
+
+        assert "pendulum" in SCENARIOS
+        assert get_scenario("pendulum") is None
+        assert get_compiled_scenario("pendulum") is None
+        assert "pendulum.json" in catalog.errors
+    finally:
+        SCENARIOS.pop("pendulum", None)
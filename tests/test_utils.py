@@ -0,0 +1,509 @@
+"""Test utilities"""
+import json
+import os
+import pytest
+from src.utils.profiling import RequestProfiler
+from src.utils.memory import MemoryMonitor, estimate_size
+from src.utils.sessions import SessionStore
+
+
+@pytest.mark.asyncio
+async def test_profiler_keeps_only_slow_requests(tmp_path):
+    """Test slow requests are profiled and logged, fast ones discarded"""
+    profiler = RequestProfiler(str(tmp_path), slow_threshold_ms=100, sample_rate=1.0, max_session_seconds=10)
+
+    fast = profiler.start_request_profile()
+    assert fast is not None
+    assert await profiler.finish_request_profile(fast, 5, {"path": "/simulate/interact"}) is None
+
+    slow = profiler.start_request_profile()
+    sum(range(1000))
+    profile_file = await profiler.finish_request_profile(slow, 250, {"path": "/simulate/interact"})
+    assert profile_file is not None
+
+    log_lines = (tmp_path / "slow_requests.log").read_text().splitlines()
+    assert len(log_lines) == 1
+    entry = json.loads(log_lines[0])
+    assert entry["path"] == "/simulate/interact"
+    assert entry["profile_file"] == profile_file
+
+
+@pytest.mark.asyncio
+async def test_profiler_skips_requests_during_session(tmp_path):
+    """Test per-request profiles are skipped while a session runs"""
+    profiler = RequestProfiler(str(tmp_path), slow_threshold_ms=100, sample_rate=1.0, max_session_seconds=10)
+
+    profiler.start_session(5)
+    assert profiler.start_request_profile() is None
+    with pytest.raises(RuntimeError):
+        profiler.start_session(5)
+
+    result = await profiler.stop_session()
+    assert result["running"] is False
+
+
+@pytest.mark.asyncio
+async def test_profiler_session_stops_when_idle(tmp_path):
+    """Test the time box stops a session without further requests"""
+    import asyncio
+
+    profiler = RequestProfiler(str(tmp_path), slow_threshold_ms=100, sample_rate=1.0, max_session_seconds=1)
+    profiler.start_session(30)  # Clamped to max_session_seconds
+
+    for _ in range(40):
+        await asyncio.sleep(0.05)
+        if profiler.status()["running"] is False and profiler.status()["last_profile_file"]:
+            break
+    status = profiler.status()
+    assert status["running"] is False
+    assert status["last_profile_file"].endswith(".prof")
+
+
+def test_session_store_high_water_marks():
+    """Test sessions and turns are evicted oldest-first"""
+    store = SessionStore(max_sessions=2, max_turns=3)
+    store.create("s1", "hookes_law")
+    store.create("s2", "osmosis")
+    assert "s1" in store  # touching s1 makes s2 least recently used
+    store.create("s3", "hookes_law")
+
+    assert set(store) == {"s1", "s3"}
+    assert store.evicted_sessions == 1
+
+    for i in range(5):
+        store.record_turn("s1", "student", "Student", f"message {i}")
+    assert [t.content for t in store["s1"]["conversation"]] == ["message 2", "message 3", "message 4"]
+    assert store.evicted_turns == 2
+
+
+def test_memory_monitor_reports_and_evicts():
+    """Test subsystem size estimates and eviction callbacks"""
+    history = [f"message {i}" for i in range(10)]
+
+    def evict():
+        excess = len(history) - 4
+        del history[:excess]
+        return excess
+
+    monitor = MemoryMonitor()
+    monitor.register("history", lambda: history, evict=evict)
+
+    sizes = monitor.subsystem_sizes()
+    assert sizes["history"]["items"] == 10
+    assert sizes["history"]["bytes"] >= estimate_size(history[0]) * 10
+
+    assert monitor.enforce_limits() == {"history": 6}
+    assert len(history) == 4
+
+
+def test_report_store_deduplicates_identical_reports(tmp_path):
+    from src.utils.report_store import ReportStore
+
+    store = ReportStore(str(tmp_path))
+    first = store.write("s1", "report_1.md", ["# Report\n", "body\n"])
+    retry = store.write("s1", "report_2.md", ["# Report\n", "body\n"])
+
+    assert retry.deduplicated
+    assert retry.path == first.path
+    assert not (tmp_path / "report_2.md").exists()
+    assert first.path.read_text(encoding="utf-8") == "# Report\nbody\n"
+    assert first.preview == "# Report\nbody\n"
+    assert len(store.versions("s1")) == 1
+
+    changed = store.write("s1", "report_3.md", ["# Report v2\n"])
+    assert not changed.deduplicated
+    assert [v["digest"] for v in store.versions("s1")] == [first.digest, changed.digest]
+    assert len(list((tmp_path / "objects").glob("*/*.md"))) == 2
+
+    # The index survives a restart
+    assert ReportStore(str(tmp_path)).latest("s1")["digest"] == changed.digest
+
+
+def test_report_store_compaction(tmp_path):
+    from src.utils.report_store import ReportStore
+
+    session_id = "0b8f0c4e-3f44-4c4e-9a55-2c5d6d7e8f90"
+    for ts in ("20250101_100000", "20250101_100001"):
+        (tmp_path / f"Titration_{session_id}_{ts}.md").write_text("same", encoding="utf-8")
+    (tmp_path / f"Titration_{session_id}_20250102_090000.md").write_text("newer", encoding="utf-8")
+    (tmp_path / "README.md").write_text("readme", encoding="utf-8")
+
+    store = ReportStore(str(tmp_path))
+    stats = store.compact()
+
+    assert stats["adopted"] == 3
+    assert stats["duplicates_removed"] >= 1
+    assert sorted(p.name for p in tmp_path.glob("*.md")) == [
+        "README.md",
+        f"Titration_{session_id}_20250102_090000.md"
+    ]
+
+    versions = store.versions(session_id)
+    assert len(versions) == 2
+    assert store.path_for(versions[0]).read_text(encoding="utf-8") == "same"
+    assert store.path_for(versions[1]).read_text(encoding="utf-8") == "newer"
+
+    # Compaction is idempotent
+    assert ReportStore(str(tmp_path)).compact()["adopted"] == 0
+
+
+def test_atomic_writer_keeps_old_content_on_error(tmp_path):
+    from src.utils.file_io import atomic_write, atomic_writer
+
+    path = tmp_path / "nested" / "report.md"
+    atomic_write(path, "v1")
+
+    with pytest.raises(RuntimeError):
+        with atomic_writer(path) as f:
+            f.write("partial")
+            raise RuntimeError("disk full")
+
+    assert path.read_text(encoding="utf-8") == "v1"
+    assert [p.name for p in path.parent.iterdir()] == ["report.md"]
+
+
+@pytest.mark.asyncio
+async def test_async_file_io_bounds_concurrency(tmp_path):
+    import asyncio
+    import threading
+    from src.utils.file_io import AsyncFileIO
+
+    file_io = AsyncFileIO(max_workers=4, max_concurrency=2)
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_write(i):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        (tmp_path / f"{i}.txt").write_text(str(i))
+        threading.Event().wait(0.02)
+        with lock:
+            active -= 1
+        return threading.current_thread().name
+
+    try:
+        names = await asyncio.gather(*(file_io.run(slow_write, i) for i in range(6)))
+        await file_io.write_json(tmp_path / "data.json", {"ok": True})
+        assert await file_io.read_text(tmp_path / "data.json") == '{"ok": true}'
+    finally:
+        file_io.shutdown()
+
+    assert peak <= 2
+    assert all(name.startswith("file-io") for name in names)
+    assert len(list(tmp_path.glob("*.txt"))) == 6
+
+
+@pytest.mark.asyncio
+async def test_export_pipeline_renders_once(tmp_path, monkeypatch):
+    import sys
+    import types
+    from src.utils.export import ReportExporter
+
+    calls = []
+    fake_markdown = types.ModuleType("markdown")
+    fake_markdown.markdown = lambda text, extensions=None: calls.append(text) or f"<p>{text}</p>"
+    monkeypatch.setitem(sys.modules, "markdown", fake_markdown)
+
+    exporter = ReportExporter()
+    exporter.exports_dir = tmp_path
+    result = await exporter.run_pipeline(
+        "# Report",
+        [{"role": "student", "sender": "Ada", "content": "hi"}],
+        {"step_1": "blue"},
+        {"session_id": "s1"},
+        "report"
+    )
+
+    assert calls == ["# Report"]
+    assert set(result.files) == {"markdown", "html", "pdf", "csv", "json"}
+    assert "<p># Report</p>" in (tmp_path / "report.html").read_text(encoding="utf-8")
+    assert set(result.timings_ms) == {"render", "markdown", "html", "pdf", "csv", "json", "total"}
+
+
+def _fake_pdf_renderer():
+    """PDF backend for worker processes: writes the HTML length, or hangs on 'slow'"""
+    import time
+
+    def render(html, pdf_path):
+        if html == "slow":
+            time.sleep(30)
+        with open(pdf_path, "w") as f:
+            f.write(str(len(html)))
+        return pdf_path
+
+    return render
+
+
+@pytest.mark.asyncio
+async def test_pdf_render_service_timeout_and_queue(tmp_path):
+    import asyncio
+    from src.utils.pdf_renderer import PdfRenderService, PdfQueueFullError, PdfRenderTimeout
+
+    service = PdfRenderService(workers=1, max_queue=0, timeout_seconds=20, loader=_fake_pdf_renderer)
+    try:
+        path = await service.render("<p>hi</p>", str(tmp_path / "a.pdf"))
+        assert open(path).read() == "9"
+
+        slow = asyncio.ensure_future(service.render("slow", str(tmp_path / "b.pdf"), timeout_seconds=0.5))
+        await asyncio.sleep(0)
+        with pytest.raises(PdfQueueFullError):
+            await service.render("<p>hi</p>", str(tmp_path / "c.pdf"))
+        with pytest.raises(PdfRenderTimeout):
+            await slow
+
+        # The hung worker was replaced
+        path = await service.render("<p>again</p>", str(tmp_path / "d.pdf"))
+        assert open(path).read() == "12"
+        assert service.stats()["timeouts"] == 1
+        assert service.stats()["rendered"] == 2
+    finally:
+        service.shutdown()
+
+
+def test_export_cache_evicts_and_invalidates(tmp_path):
+    from src.utils.export_cache import ExportArtifactCache
+
+    cache = ExportArtifactCache(str(tmp_path), max_bytes=150)
+
+    def export(session_id, version, fmt):
+        path = cache.artifact_dir(session_id, version, fmt) / "report.txt"
+        path.parent.mkdir(parents=True)
+        path.write_text("x" * 100)
+        return cache.put(session_id, "osmosis", version, fmt, {"file_path": str(path)}, [str(path)])
+
+    first = export("s1", 0, "csv")
+    assert cache.get("s1", 0, "csv") == {"file_path": first.files[0]}
+    assert cache.get("s1", 1, "csv") is None
+
+    # Over the size bound: the least recently used artifact is deleted
+    export("s2", 0, "csv")
+    assert cache.get("s1", 0, "csv") is None
+    assert not cache.artifact_dir("s1", 0, "csv").exists()
+    assert cache.stats()["evictions"] == 1
+
+    cache.invalidate("s2")
+    assert len(cache) == 0
+    cache.collect()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_analytics_dataset_partitions_turns(tmp_path):
+    import csv
+    from datetime import datetime
+    from src.utils.analytics import AnalyticsSink
+
+    sink = AnalyticsSink(str(tmp_path / "ndjson"), flush_rows=100)
+    store = SessionStore(max_sessions=10, max_turns=10, analytics=sink)
+    store.create("s1", "osmosis", "Ada")
+
+    turn_at = datetime(2025, 3, 14, 9, 30).timestamp()
+    store.record_turn("s1", "student", "Student", "Water moved", step=1, timestamp=turn_at)
+    store.record_turn("s1", "partner", "Alex", "Why?", step=1, latency_ms=812.5)
+    store.record_observation("s1", "step_1", "Potato shrank")
+    store.record_wolfram_result("s1", {"query": "q", "result": "r", "numeric_result": 1.5, "latency_ms": 40.0})
+
+    assert sink.pending() == 4
+    assert sink.flush_sync() == 4
+
+    with open(tmp_path / "ndjson" / "turns" / "date=2025-03-14" / f"part-{os.getpid()}.ndjson") as f:
+        first = json.loads(f.readline())
+    assert first["timestamp"] == "2025-03-14T09:30:00"
+    assert first["student_name"] == "Ada"
+    assert first["content_chars"] == len("Water moved")
+
+    turn_files = list((tmp_path / "ndjson" / "turns").glob("date=*/*.ndjson"))
+    assert len(turn_files) == 2
+    latencies = [json.loads(line)["latency_ms"] for path in turn_files for line in open(path)]
+    assert 812.5 in latencies
+    assert store["s1"]["conversation"][1].metadata == {"latency_ms": 812.5}
+    assert list((tmp_path / "ndjson" / "wolfram_results").glob("date=*/*.ndjson"))
+
+    # CSV partitions get one header, then only appended rows
+    sink = AnalyticsSink(str(tmp_path / "csv"), file_format="csv")
+    for content in ("a", "b"):
+        sink.append("turns", {"session_id": "s1", "role": "student", "content": content,
+                              "timestamp": "2025-03-14T10:00:00"})
+        sink.flush_sync()
+    with open(tmp_path / "csv" / "turns" / "date=2025-03-14" / f"part-{os.getpid()}.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["content"] for row in rows] == ["a", "b"]
+
+
+def test_analytics_compaction_keeps_late_rows_and_types(tmp_path):
+    """Test rows appended after a part is rotated land in a new part, and CSV values get their types"""
+    from src.utils.analytics import AnalyticsSink, coerce_row
+
+    sink = AnalyticsSink(str(tmp_path), file_format="csv")
+    row = {"session_id": "s1", "step": 2, "latency_ms": 12.5, "content": "a", "timestamp": "2025-03-14T10:00:00"}
+    sink.append("turns", row)
+    sink.flush_sync()
+
+    part = tmp_path / "turns" / "date=2025-03-14" / f"part-{os.getpid()}.csv"
+    rotated = sink._rotate(part)
+    sink.append("turns", dict(row, content="late"))
+    sink.flush_sync()
+
+    (early,) = sink._read_part(rotated)
+    (late,) = sink._read_part(part)
+    assert late["content"] == "late"
+
+    coerced = coerce_row("turns", early)
+    assert coerced["step"] == 2 and coerced["latency_ms"] == 12.5
+    assert coerced["content_chars"] is None
+    assert coerced["content"] == "a"
+    assert coerce_row("observations", {"value": 3})["value"] == "3"
+
+
+def test_fast_json_and_encoding_negotiation(monkeypatch):
+    """Test dumps output and Accept-Encoding negotiation"""
+    import json
+    from src.scenarios import ExperimentLevel
+    from src.utils import responses
+    from src.utils.compression import negotiate_encoding
+    from src.utils.responses import dumps
+
+    data = {"level": ExperimentLevel.BEGINNER, "tags": {"a"}, "text": "π = MRT", 1: None}
+    assert json.loads(dumps(data)) == {"level": "beginner", "tags": ["a"], "text": "π = MRT", "1": None}
+
+    # orjson and the stdlib fallback agree on non-finite floats
+    data = {"slope": float("nan"), "points": [1.5, float("inf")]}
+    fast = dumps(data)
+    monkeypatch.setattr(responses, "orjson", None)
+    assert dumps(data) == fast == b'{"slope":null,"points":[1.5,null]}'
+
+    assert negotiate_encoding("gzip, deflate, br", ("br", "gzip")) == "br"
+    assert negotiate_encoding("gzip, br;q=0", ("br", "gzip")) == "gzip"
+    assert negotiate_encoding("*", ("gzip",)) == "gzip"
+    assert negotiate_encoding("identity", ("br", "gzip")) is None
+    assert negotiate_encoding(None, ("gzip",)) is None
+
+
+@pytest.mark.asyncio
+async def test_graph_store_deduplicates_and_evicts():
+    """Test rendered graphs are stored once per content hash and evicted by size"""
+    from src.wolfram_engine import WolframEngine
+    from src.wolfram_engine.graphs import GraphStore, graph_id
+
+    result = await WolframEngine().compute_hookes_law(300, 0.1)
+    assert result.graph_svg.startswith("<svg")
+
+    store = GraphStore(max_bytes=2 * len(result.graph_svg.encode()) + 10)
+    first = store.put(result.graph_svg)
+    assert store.put(result.graph_svg) == first == graph_id(result.graph_svg)
+    assert len(store) == 1
+    assert store.get(first) == result.graph_svg.encode()
+
+    store.put(result.graph_svg.replace("Hooke", "Spring"))
+    store.get(first)  # Most recently used
+    store.put(result.graph_svg.replace("Hooke", "Elastic"))
+    assert len(store) == 2
+    assert store.get(first) is not None
+    assert store.get(graph_id(result.graph_svg.replace("Hooke", "Spring"))) is None
+
+
+def test_curve_delta_sends_only_new_points():
+    """Test curve deltas: full arrays once, then appended points, full again on new params"""
+    from src.wolfram_engine import WolframEngine
+    from src.wolfram_engine.curves import CurveError, curve_delta
+
+    engine = WolframEngine()
+    params = {"acid_concentration": 0.1, "acid_volume": 20.0, "base_concentration": 0.1}
+
+    first = curve_delta(engine, "titration", params, upto=10.0)
+    assert first["mode"] == "full"
+    assert first["x_label"] == "Volume of Base (mL)"
+    assert len(first["x"]) == len(first["y"]) == first["revealed"]
+    assert max(first["x"]) <= 10.0
+
+    second = curve_delta(engine, "titration", params, upto=20.0, cursor=first["cursor"])
+    assert second["mode"] == "append"
+    assert "params" not in second
+    assert min(second["x"]) > 10.0
+    assert second["revealed"] == first["revealed"] + len(second["x"])
+
+    unchanged = curve_delta(engine, "titration", params, upto=20.0, cursor=second["cursor"])
+    assert unchanged["x"] == [] and unchanged["mode"] == "append"
+
+    reshaped = curve_delta(engine, "titration", {**params, "acid_volume": 25.0}, upto=20.0,
+                           cursor=second["cursor"])
+    assert reshaped["mode"] == "full"
+
+    complete = curve_delta(engine, "hookes_law", {"spring_constant": 300, "max_displacement": 0.1})
+    assert complete["revealed"] == complete["total"] == 20
+    assert complete["y"][-1] == 30.0
+
+    with pytest.raises(CurveError):
+        curve_delta(engine, "hookes_law", {"spring_constant": -1, "max_displacement": 0.1})
+    with pytest.raises(CurveError):
+        curve_delta(engine, "titration", params, cursor="not a cursor")
+
+
+@pytest.mark.asyncio
+async def test_lttb_bounds_sensor_graphs():
+    """Test LTTB keeps endpoints and peaks, and sensor graphs stay within the point budget"""
+    import re
+    from src.config import settings
+    from src.wolfram_engine import WolframEngine
+    from src.wolfram_engine.downsampling import lttb
+
+    series = [(i, 0.0) for i in range(1000)]
+    series[637] = (637, 50.0)
+    sampled = lttb(series, 100)
+    assert len(sampled) == 100
+    assert sampled[0] == series[0] and sampled[-1] == series[-1]
+    assert (637, 50.0) in sampled
+    assert lttb(series[:10], 100) == series[:10]
+
+    result = await WolframEngine().simulate_temperature_sensor(20.0, 3600)
+    polyline = re.search(r'<polyline points="([^"]+)"', result.graph_svg).group(1)
+    assert len(polyline.split()) <= settings.graph_max_points
+    assert "3600 data points" in result.graph_svg
+
+
+def test_report_store_compaction_alongside_writer(tmp_path):
+    """Test a compactor with its own store (as the CLI) keeps a live writer's reports and temp files"""
+    import time
+    from src.utils.report_store import ReportStore, TMP_GRACE_SECONDS
+
+    server = ReportStore(str(tmp_path))
+    first = server.write("s1", "report_1.md", ["first"])
+
+    compactor = ReportStore(str(tmp_path))
+    compactor.versions("s1")  # Index cached before the server writes again
+    second = server.write("s2", "report_2.md", ["second"])
+
+    in_flight = tmp_path / "objects" / "tmp-inflight"
+    in_flight.write_text("partial")
+    stale = tmp_path / "objects" / "tmp-stale"
+    stale.write_text("abandoned")
+    old = time.time() - TMP_GRACE_SECONDS - 60
+    os.utime(stale, (old, old))
+
+    assert compactor.compact()["objects_removed"] == 0
+    assert second.object_path.exists() and first.object_path.exists()
+    assert in_flight.exists() and not stale.exists()
+
+    server.write("s3", "report_3.md", ["third"])  # Server re-reads the compacted index
+    assert [v["file"] for v in ReportStore(str(tmp_path)).versions("s2")] == ["report_2.md"]
+    assert ReportStore(str(tmp_path)).latest("s1")["digest"] == first.digest
+
+
+def test_catalog_cache_keys_pages_by_position():
+    """Test equivalent cursors share a cached page and on-demand views use the regular compression level"""
+    import gzip
+    from src.scenarios import list_scenarios
+    from src.utils.catalog_cache import CatalogResponseCache
+    from src.utils.pagination import encode_cursor
+
+    cache = CatalogResponseCache(list_scenarios, min_compress_bytes=1, gzip_level=1)
+    page = cache.listing(encode_cursor({"after": "acid_base_titration"}), limit=1)
+    assert cache.listing(encode_cursor({"after": "acid_base_titration", "extra": 1}), limit=1) is page
+    assert cache.builds == 1
+
+    full = cache.listing()
+    assert gzip.decompress(full.encoded["gzip"]) == full.body
+    assert full.encoded["gzip"] == gzip.compress(full.body, compresslevel=9, mtime=0)
+    assert page.encoded["gzip"] == gzip.compress(page.body, compresslevel=1, mtime=0)